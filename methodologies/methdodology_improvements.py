@@ -7,6 +7,10 @@ def calculate_weighted_confidence_score(sources):
     """
     Replaces our naive 'more sources = higher confidence' approach
     with a true quality-weighted system.
+
+    Implemented (1, 2, 3 and 4) in research_engine/confidence_scoring.py, with
+    a noisy-OR of source weights standing in for the Bayesian update;
+    scripts/rescore_cache.py re-scores the cache after the weights change.
     """
     # 1. SOURCE AUTHORITY WEIGHTS
     authority_weights = {
@@ -51,6 +55,11 @@ def detect_outliers_and_reconcile(market_sizes):
     Reconcile wildly different market size estimates
     (Because when one source says $1B and another says $36B, we're doing
     something wrong by just averaging them)
+
+    Implemented (1 and 2) in research_engine/market_reconciliation.py:
+    reconcile_sizes for one list of sizes, reconcile_results for batches of
+    market sizing results. Methodology grouping (3) still needs sources to
+    report their estimation method.
     """
     # 1. OUTLIER DETECTION
     # Use z-scores or IQR method to identify statistical outliers
@@ -113,6 +122,9 @@ def sensitivity_analysis(market_sizing_model, assumptions):
     """
     Don't present entrepreneurs with a black box number.
     Show them which assumptions matter most.
+
+    Implemented (1, 2 and 4) in research_engine/market_sensitivity.py and
+    served by POST /market-size/sensitivity, which is fast enough for (3).
     """
     # 1. TORNADO ANALYSIS
     # Vary each input assumption by ±20% and measure impact on final estimate
@@ -0,0 +1,186 @@
+# agent_compaction.py - Keeps browser agent prompts roughly flat across long runs
+#
+# Browser-Use appends every model output, tool message and action result to the
+# agent's message history, so with max_steps=30 and vision enabled the late steps
+# resend everything the early steps saw. HistoryCompactor runs as an
+# ``on_step_start`` hook and, once the history is longer than the policy allows,
+# collapses the older steps into one summary of the facts they extracted and
+# drops any screenshots or DOM dumps still attached to them.
+#
+# The hook rewrites Browser-Use's private message history (the message
+# manager's state, ManagedMessage, MessageMetadata token counts), which only
+# the release pinned in requirements.txt is known to lay out this way. On any
+# other release it logs a warning and leaves the history alone.
+
+import logging
+from importlib import metadata
+from typing import Dict, Any, List, Optional
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+try:
+    from browser_use.agent.message_manager.views import ManagedMessage, MessageMetadata
+except ImportError:
+    ManagedMessage = MessageMetadata = None
+
+logger = logging.getLogger(__name__)
+
+# Browser-Use releases whose message history layout this hook was written against
+SUPPORTED_BROWSER_USE = ("0.2.",)
+
+# Marker so a previous summary is recognised and folded into the next one
+SUMMARY_PREFIX = "Summary of earlier research steps (older history compacted):"
+
+DEFAULT_POLICY = {
+    'enabled': True,
+    'keep_recent_steps': 4,      # Steps kept verbatim at the end of the history
+    'compact_every': 2,          # Only rebuild the summary every N steps
+    'max_fact_chars': 400,       # Per extracted fact
+    'max_summary_chars': 4000,   # Whole summary message
+}
+
+
+class HistoryCompactor:
+    """Agent ``on_step_start`` hook that compacts older steps into a fact summary"""
+
+    def __init__(self, policy: Optional[Dict[str, Any]] = None):
+        self.policy = {**DEFAULT_POLICY, **(policy or {})}
+        self.compactions = 0
+        self.tokens_saved = 0
+        if self.policy['enabled'] and not internals_supported():
+            logger.warning("History compaction disabled: browser-use %s is not a supported release %s",
+                           _browser_use_version(), SUPPORTED_BROWSER_USE)
+            self.policy['enabled'] = False
+
+    async def __call__(self, agent):
+        if not self.policy['enabled']:
+            return
+        try:
+            self.compact(agent)
+        except Exception as e:
+            # Never let housekeeping break a research run
+            logger.warning("History compaction skipped: %s", e)
+
+    def compact(self, agent):
+        n_steps = getattr(agent.state, 'n_steps', 0)
+        if n_steps <= self.policy['keep_recent_steps'] or n_steps % self.policy['compact_every']:
+            return
+
+        message_manager = agent._message_manager
+        history = message_manager.state.history
+        managed = history.messages
+
+        # Initial messages (system prompt, task, example) always stay at the front
+        head = [m for m in managed if self._is_init(m)]
+        body = [m for m in managed if not self._is_init(m)]
+        # So do messages ahead of the first step, like the "task history memory starts here" marker
+        while body and not isinstance(body[0].message, AIMessage) and not self._is_summary(body[0]):
+            head.append(body.pop(0))
+
+        steps = self._group_steps(body)
+        if len(steps) <= self.policy['keep_recent_steps']:
+            return
+
+        old_steps = steps[:-self.policy['keep_recent_steps']]
+        recent = [m for step in steps[-self.policy['keep_recent_steps']:] for m in step]
+
+        # Drop images and DOM dumps the recent steps may still carry; the hook runs
+        # before this step's fresh browser state is added
+        for m in recent:
+            m.message = self._strip_heavy_content(m.message)
+
+        old_tokens = sum(m.metadata.tokens for step in old_steps for m in step)
+        summary = HumanMessage(content=self._build_summary(old_steps))
+        summary_tokens = self._count_tokens(message_manager, summary)
+
+        summary_entry = ManagedMessage(message=summary, metadata=MessageMetadata(tokens=summary_tokens))
+        history.messages = head + [summary_entry] + recent
+        history.current_tokens = sum(m.metadata.tokens for m in history.messages)
+
+        self.compactions += 1
+        self.tokens_saved += max(0, old_tokens - summary_tokens)
+        logger.info("Compacted %d older agent steps (%d -> %d tokens)", len(old_steps), old_tokens, summary_tokens)
+
+    def _is_init(self, managed) -> bool:
+        return managed.metadata.message_type == 'init' or isinstance(managed.message, SystemMessage)
+
+    def _is_summary(self, managed) -> bool:
+        return isinstance(managed.message, HumanMessage) and str(managed.message.content).startswith(SUMMARY_PREFIX)
+
+    def _group_steps(self, managed: List[Any]) -> List[List[Any]]:
+        """Split the non-init history into steps, each starting at a model output"""
+        steps = []
+        for m in managed:
+            if not steps or isinstance(m.message, AIMessage) or self._is_summary(m):
+                steps.append([m])
+            else:
+                steps[-1].append(m)
+        return steps
+
+    def _build_summary(self, old_steps: List[List[Any]]) -> str:
+        max_fact = self.policy['max_fact_chars']
+        lines = [SUMMARY_PREFIX]
+
+        for step in old_steps:
+            for m in step:
+                message = m.message
+                content = message.content if isinstance(message.content, str) else ''
+                if content.startswith(SUMMARY_PREFIX):
+                    # Carry forward facts from the previous compaction
+                    lines.extend(content[len(SUMMARY_PREFIX):].strip().splitlines())
+                elif isinstance(message, AIMessage):
+                    for call in message.tool_calls or []:
+                        state = call.get('args', {}).get('current_state', {})
+                        memory = state.get('memory')
+                        if memory:
+                            lines.append(f"- Progress: {memory[:max_fact]}")
+                elif isinstance(message, HumanMessage) and content:
+                    # Action results: extracted page content, navigation outcomes, errors
+                    fact = ' '.join(content.split())
+                    if fact:
+                        lines.append(f"- Found: {fact[:max_fact]}")
+
+        # Keep the order but drop exact repeats
+        seen = set()
+        unique = []
+        for line in lines:
+            if line and line not in seen:
+                seen.add(line)
+                unique.append(line)
+
+        text = '\n'.join(unique)
+        if len(text) > self.policy['max_summary_chars']:
+            # Oldest facts go first; the most recent ones are most relevant
+            text = SUMMARY_PREFIX + '\n...\n' + text[-self.policy['max_summary_chars']:].split('\n', 1)[-1]
+        return text
+
+    def _strip_heavy_content(self, message):
+        """Remove screenshots and interactive-element dumps from an old message"""
+        if isinstance(message.content, list):
+            parts = [p for p in message.content if not (isinstance(p, dict) and p.get('type') in ('image_url', 'image'))]
+            if len(parts) != len(message.content):
+                message.content = parts or ''
+        if isinstance(message, HumanMessage) and isinstance(message.content, str) and 'Interactive elements' in message.content:
+            message.content = message.content.split('Interactive elements', 1)[0] + '[page elements omitted]'
+        return message
+
+    def _count_tokens(self, message_manager, message) -> int:
+        counter = getattr(message_manager, '_count_tokens', None)
+        if counter:
+            return counter(message)
+        return len(str(message.content)) // 4
+
+    def stats(self) -> Dict[str, int]:
+        return {"compactions": self.compactions, "tokens_saved": self.tokens_saved}
+
+
+def _browser_use_version() -> Optional[str]:
+    try:
+        return metadata.version("browser-use")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def internals_supported() -> bool:
+    """Whether the installed Browser-Use keeps its message history the way this hook expects"""
+    version = _browser_use_version()
+    return ManagedMessage is not None and version is not None and version.startswith(SUPPORTED_BROWSER_USE)
@@ -1,8 +1,15 @@
 # api.py
 import os
+import asyncio
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
+from typing import Dict, List, Union
 from dotenv import load_dotenv
+from single_flight import SingleFlight
+from idea_similarity import make_cache_key
+from research_cache import get_research_cache
+from cache_manager import CacheManager
+from market_sensitivity import sensitivity_analysis, SENSITIVITY_VARIATION, THRESHOLD_TARGETS_USD
 
 load_dotenv()
 
@@ -45,30 +52,68 @@ def get_problem_service():
         )
     return problem
 
+# Identical requests already being researched wait for that run instead of starting another.
+# Set SINGLE_FLIGHT_LOCK_DIR to coalesce across uvicorn workers as well.
+in_flight = SingleFlight(lock_dir=os.getenv("SINGLE_FLIGHT_LOCK_DIR"))
+
+# Expiry sweeps and size-budget eviction for the shared research cache
+cache_manager = CacheManager(get_research_cache())
+
 app = FastAPI()
 
+@app.on_event("startup")
+async def start_cache_manager():
+    cache_manager.start()
+
+@app.on_event("shutdown")
+async def stop_cache_manager():
+    await cache_manager.stop()
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "message": "Research Engine API is running"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    occupancy = await asyncio.to_thread(cache_manager.occupancy)
+    return {
+        "cache": get_research_cache().stats(),
+        "occupancy": occupancy,
+        "single_flight": in_flight.stats(),
+    }
+
 class BusinessRequest(BaseModel):
     description: str
     industry: str
     product_type: str
     problem_statement: str = None  # Optional problem statement
+    force_refresh: bool = False  # Skip cached results and run fresh research
 
 class ProblemRequest(BaseModel):
     description: str
     industry: str
     problem_statement: str
+    force_refresh: bool = False  # Skip cached results and run fresh research
+
+class SensitivityRequest(BaseModel):
+    tam_usd: float
+    multipliers: Dict[str, Union[float, List[float]]] = None  # Overrides of the default SAM/SOM multipliers
+    variation: float = SENSITIVITY_VARIATION  # Fraction each assumption is varied by
+    targets_usd: List[float] = list(THRESHOLD_TARGETS_USD)  # SOM targets for the threshold analysis
 
 @app.post("/market-size")
 async def get_market_size(request: BusinessRequest):
     try:
-        result = await get_market_sizing_service().research_market_size(
-            request.description,
-            request.industry,
-            request.product_type
+        service = get_market_sizing_service()
+        result = await in_flight.do(
+            make_cache_key("market_size", request.description, request.industry, request.product_type,
+                           str(request.force_refresh)),
+            lambda: service.research_market_size(
+                request.description,
+                request.industry,
+                request.product_type,
+                force_refresh=request.force_refresh
+            )
         )
         
         # Check if we got an error response
@@ -82,14 +127,28 @@ async def get_market_size(request: BusinessRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/market-size/sensitivity")
+async def get_market_sensitivity(request: SensitivityRequest):
+    # Pure arithmetic on the model the client already has; no research is run
+    try:
+        return sensitivity_analysis(request.tam_usd, request.multipliers, request.variation, request.targets_usd)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/competition")
 async def analyze_competition(request: BusinessRequest):
     try:
-        result = await get_competition_service().analyze_competition(
-            request.description,
-            request.industry,
-            request.product_type,
-            request.problem_statement
+        service = get_competition_service()
+        result = await in_flight.do(
+            make_cache_key("competition", request.description, request.industry, request.product_type,
+                           request.problem_statement, str(request.force_refresh)),
+            lambda: service.analyze_competition(
+                request.description,
+                request.industry,
+                request.product_type,
+                request.problem_statement,
+                force_refresh=request.force_refresh
+            )
         )
         
         # Check if we got an error response with no useful data
@@ -106,10 +165,16 @@ async def analyze_competition(request: BusinessRequest):
 @app.post("/problem-validation")
 async def validate_problem(request: ProblemRequest):
     try:
-        result = await get_problem_service().validate_problem(
-            request.description,
-            request.problem_statement,
-            request.industry
+        service = get_problem_service()
+        result = await in_flight.do(
+            make_cache_key("problem_validation", request.description, request.problem_statement, request.industry,
+                           str(request.force_refresh)),
+            lambda: service.validate_problem(
+                request.description,
+                request.problem_statement,
+                request.industry,
+                force_refresh=request.force_refresh
+            )
         )
         
         # Check if we got an error response with no useful data
@@ -0,0 +1,120 @@
+# bench_json_extract.py - Timing for json_extract.extract_json on realistic and pathological agent output
+#
+#   python benchmarks/bench_json_extract.py            # new extractor only
+#   python benchmarks/bench_json_extract.py --legacy   # also the old market sizing regexes, on small inputs
+#
+# Pathological cases are the inputs that made the old lazy DOTALL patterns
+# backtrack: long runs of unmatched braces and keys, truncated objects, and
+# brace-heavy prose ahead of the real answer. Times should grow linearly with
+# size for the new extractor.
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+# --- Path Setup ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+research_engine_dir = os.path.dirname(script_dir)
+if research_engine_dir not in sys.path:
+    sys.path.append(research_engine_dir)
+# --- End Path Setup ---
+
+from json_extract import extract_json
+
+RECORDED_RESULT = os.path.join(research_engine_dir, "fixtures", "recorded_results", "market_sizing.json")
+
+
+def legacy_extract_json(text):
+    """The market sizing extractor this module replaced, kept for comparison"""
+    json_match = re.search(r'(\{[^{}]*?"market_data"[^{}]*?\{.*?\}.*?\})', text, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    json_match = re.search(r'(\{.*?"market_data".*?\})', text, re.DOTALL)
+    if json_match:
+        json_text = json_match.group(1)
+        brace_count = 0
+        end_pos = 0
+        for i, char in enumerate(json_text):
+            if char == '{':
+                brace_count += 1
+            elif char == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    end_pos = i + 1
+                    break
+        if end_pos > 0:
+            try:
+                return json.loads(json_text[:end_pos])
+            except json.JSONDecodeError:
+                pass
+    json_match = re.search(r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})', text)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1))
+        except json.JSONDecodeError:
+            pass
+    return {}
+
+
+def build_cases(repeat):
+    """(name, text) pairs; ``repeat`` scales every case"""
+    with open(RECORDED_RESULT, "r") as f:
+        answer = json.dumps(json.load(f), indent=2)
+    prose = "Visited the Statista page {blocked} and noted \"market_data\" was behind a paywall.\n"
+    return [
+        ("fenced_json", f"Research complete.\n```json\n{answer}\n```\n"),
+        ("prose_then_json", prose * repeat + answer),
+        ("truncated_json", prose * (repeat // 10) + answer[: len(answer) // 2] * 3),
+        ("unclosed_keys", '{"market_data" ' * repeat + answer),
+        ("unclosed_keys_no_answer", '{"market_data" ' * repeat),
+        ("brace_storm", "{ " * repeat + answer + " }" * (repeat // 2)),
+        ("unterminated_strings", '{"note": "cut off\n' * repeat + answer),
+        ("many_small_objects", '{"step": 1, "ok": true} ' * repeat + answer),
+        ("deep_unclosed_wrapper", '{"a": ' * repeat + answer),
+    ]
+
+
+def time_call(fn, text, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON extraction from agent output")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated repeat counts (default 100,1000,10000)")
+    parser.add_argument("--rounds", type=int, default=5, help="Best-of rounds per measurement (default 5)")
+    parser.add_argument("--legacy", action="store_true", help="Also time the old regex extractor")
+    parser.add_argument("--legacy-max-chars", type=int, default=8000,
+                        help="Skip the old extractor above this input size; it is cubic on some cases (default 8000)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(f"{'case':<26}{'repeat':>8}{'chars':>10}{'extract_json ms':>17}{'legacy ms':>12}  found")
+    for repeat in sizes:
+        for name, text in build_cases(repeat):
+            result = extract_json(text, expected_keys=("market_data",))
+            new_ms = time_call(lambda t: extract_json(t, expected_keys=("market_data",)), text, args.rounds)
+            legacy_ms = "-"
+            if args.legacy and len(text) <= args.legacy_max_chars:
+                legacy_ms = f"{time_call(legacy_extract_json, text, 1):.2f}"
+            found = "market_data" in (result or {})
+            print(f"{name:<26}{repeat:>8}{len(text):>10}{new_ms:>17.2f}{legacy_ms:>12}  {found}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# bench_parsers.py - Throughput of the result parsers over the fixed sample corpus
+#
+#   python benchmarks/bench_parsers.py                          # timings + correctness
+#   python benchmarks/bench_parsers.py --output before.json     # save a report
+#   python benchmarks/bench_parsers.py --compare before.json    # % change against it
+#   python benchmarks/bench_parsers.py --scaling 10,100,1000    # also time growing text results
+#
+# Every case in fixtures/parser_corpus/manifest.json is parsed once and checked
+# against its expectations, then each parser it goes through is timed as the
+# best of --rounds runs of --iterations calls. The corpus files never change,
+# so a report saved on one commit can be compared with a run on another; only
+# compare reports taken on the same machine. Exits non-zero when a parse result
+# no longer matches the manifest.
+#
+# --scaling adds generated text-format results with n evidence sources (problem
+# validation) and n competitors (competition). Every size parses about the same
+# number of characters per round (--scaling-chars), and the rounds cycle through
+# the sizes, so a small case is not timed on a handful of sub-millisecond calls
+# while a large one gets a warm, quiet machine. Past the fixed per-call cost
+# of the smallest sizes, MB/s should then stay roughly flat as n grows; a rate
+# that keeps falling from 100 to 3000 items means parse cost is no longer linear.
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# --- Path Setup ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+research_engine_dir = os.path.dirname(script_dir)
+if research_engine_dir not in sys.path:
+    sys.path.append(research_engine_dir)
+# --- End Path Setup ---
+
+from research_modules.market_sizing import MarketSizingService
+from research_modules.competitive_analysis import CompetitiveAnalysisService
+from research_modules.problem_validation import ProblemValidationService
+
+CORPUS_DIR = os.path.join(research_engine_dir, "fixtures", "parser_corpus")
+INDUSTRY = "Technology"
+
+# Parsers timed for each service, entry point last; the entry points call
+# _extract_json first, so it is timed on its own as well
+SERVICE_PARSERS = {
+    "market_sizing": ("_extract_json", "_process_result"),
+    "competition": ("_extract_json", "_process_result"),
+    "problem_validation": ("_extract_json", "_parse_validation_result"),
+}
+
+
+# Generated text-format results for --scaling; the same n always gives the same text
+VALIDATION_HEAD = """PROBLEM VALIDATION SUMMARY:
+Exists: Yes
+Severity: 7
+Frequency: 8
+Willingness to Pay: $20-50/month
+Market Size: 2.3 million small clinics
+Confidence Level: 7
+
+EVIDENCE:
+"""
+
+VALIDATION_SOURCE = """Forum thread {i}: Forum post (2024-03-{day:02d} - Medium)
+- "We lose hours every week to phone scheduling" (post {i})
+- Owners describe manual scheduling as their top admin burden
+"""
+
+VALIDATION_TAIL = """
+ALTERNATIVE SOLUTIONS:
+Calendly:
+- Approach: Self-serve booking links
+- Limitations: Not built for clinics
+- Pricing: $10/month
+
+PROBLEM STATEMENT FEEDBACK:
+Accurate, but should name the clinic segment.
+
+RESEARCH LIMITATIONS:
+- Statista blocked by CAPTCHA
+"""
+
+COMPETITOR = """{i}. **Competitor {i}**
+   - **Website:** [competitor{i}.com](https://competitor{i}.com)
+   - **Products:** Booking software, Patient reminders
+   - **Target Audience:** Small clinics
+   - **Pricing Model:** $49/month per provider
+   - **Unique Selling Points:** Insurance checks, Two-way SMS
+   - **Market Position:** Regional challenger
+   - **Founded Year:** 2016
+   - **Funding:** $12M Series A
+
+"""
+
+COMPETITION_TAIL = """**Market Gaps:**
+1. No clinic-specific workflows
+
+**Barriers to Entry:**
+1. Network effects
+
+**Market Concentration:** Fragmented
+
+**Emerging Trends:**
+1. AI receptionists
+
+**Sources:**
+1. [Clinic Software Report](https://example.com/report) - Industry overview
+
+**Research Limitations:**
+- Crunchbase blocked
+
+**Confidence Score:** 8
+"""
+
+
+def build_services():
+    """The three services without their constructors; parsing needs no LLM or cache"""
+    return {
+        "market_sizing": MarketSizingService.__new__(MarketSizingService),
+        "competition": CompetitiveAnalysisService.__new__(CompetitiveAnalysisService),
+        "problem_validation": ProblemValidationService.__new__(ProblemValidationService),
+    }
+
+
+def load_corpus():
+    """Manifest cases, each with its file's content under "text" ("blocks" for source blocks)"""
+    with open(os.path.join(CORPUS_DIR, "manifest.json"), "r") as f:
+        cases = json.load(f)["cases"]
+    for case in cases:
+        with open(os.path.join(CORPUS_DIR, case["file"]), "r") as f:
+            if case["format"] == "source_blocks":
+                case["blocks"] = json.load(f)
+                case["text"] = "".join(title + details for title, details in case["blocks"])
+            else:
+                case["text"] = f.read()
+    return cases
+
+
+def scaling_cases(sizes):
+    """Generated cases with n evidence sources and n competitors, checked like corpus cases"""
+    cases = []
+    for n in sizes:
+        validation = VALIDATION_HEAD + "".join(VALIDATION_SOURCE.format(i=i, day=i % 28 + 1) for i in range(n)) + VALIDATION_TAIL
+        competition = "**Competitors:**\n\n" + "".join(COMPETITOR.format(i=i + 1) for i in range(n)) + COMPETITION_TAIL
+        cases.append({"file": f"generated/problem_validation_n{n}", "service": "problem_validation",
+                      "format": "generated", "text": validation, "expect": {"evidence": n}})
+        cases.append({"file": f"generated/competition_n{n}", "service": "competition",
+                      "format": "generated", "text": competition, "expect": {"competitors": n}})
+    return cases
+
+
+def case_calls(case, services):
+    """(parser name, zero-argument call) pairs for a case, entry point last"""
+    service = services[case["service"]]
+    if case["format"] == "source_blocks":
+        blocks = case["blocks"]
+        return [("_parse_source_block", lambda: [service._parse_source_block(title, details) for title, details in blocks])]
+    text = case["text"]
+    calls = []
+    for name in SERVICE_PARSERS[case["service"]]:
+        method = getattr(service, name)
+        if name == "_process_result":
+            calls.append((name, lambda method=method: method(text, INDUSTRY)))
+        else:
+            calls.append((name, lambda method=method: method(text)))
+    return calls
+
+
+def resolve(value, path):
+    """Follow a dotted path such as "market_data.sources.0.publisher" into a parse result"""
+    for part in path.split("."):
+        if isinstance(value, list):
+            value = value[int(part)] if part.isdigit() and int(part) < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def check_expectations(case, result):
+    """Messages for every manifest expectation the parse result misses"""
+    failures = []
+    for path, expected in case["expect"].items():
+        actual = resolve(result, path)
+        if isinstance(actual, list) and isinstance(expected, int) and not isinstance(expected, bool):
+            actual = len(actual)
+        if actual != expected:
+            failures.append(f"{case['file']}: {path} expected {expected!r}, got {actual!r}")
+    return failures
+
+
+def parse_case(case, services):
+    """Result of a case's entry parser, with the parsers' progress prints silenced"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return case_calls(case, services)[-1][1]()
+
+
+def best_time_us(call, rounds, iterations):
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                call()
+            best = min(best, time.perf_counter() - started)
+    return best * 1e6 / iterations
+
+
+def interleaved_times_us(cases, services, rounds, chars_per_round):
+    """(case file, parser) -> best us per call, parsing about chars_per_round characters
+    per measurement and cycling through every case in each round"""
+    best = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            for case in cases:
+                iterations = max(1, chars_per_round // len(case["text"]))
+                for name, call in case_calls(case, services):
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        call()
+                    us = (time.perf_counter() - started) * 1e6 / iterations
+                    key = (case["file"], name)
+                    best[key] = min(best.get(key, float("inf")), us)
+    return best
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=research_engine_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the result parsers on the sample corpus")
+    parser.add_argument("--rounds", type=int, default=5, help="Best-of rounds per measurement (default 5)")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per round (default 200)")
+    parser.add_argument("--cases", default="", help="Only cases whose file name contains this text")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    parser.add_argument("--compare", help="Report JSON from an earlier run to show % change against")
+    parser.add_argument("--scaling", default="", help="Comma-separated item counts for generated text results, e.g. 10,100,1000")
+    parser.add_argument("--scaling-chars", type=int, default=400000,
+                        help="Characters parsed per scaling measurement (default 400000)")
+    args = parser.parse_args()
+
+    services = build_services()
+    cases = [case for case in load_corpus() if args.cases in case["file"]]
+    generated = scaling_cases([int(n) for n in args.scaling.split(",") if n.strip()])
+    scaled_times = interleaved_times_us(generated, services, args.rounds, args.scaling_chars) if generated else {}
+    baseline = {}
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = {(r["case"], r["parser"]): r["us_per_call"] for r in json.load(f)["results"]}
+
+    results = []
+    failures = []
+    print(f"{'case':<40}{'parser':<26}{'chars':>8}{'us/call':>11}{'MB/s':>9}{'vs base':>9}  ok")
+    for case in cases + generated:
+        case_failures = check_expectations(case, parse_case(case, services))
+        failures.extend(case_failures)
+        for name, call in case_calls(case, services):
+            us = scaled_times.get((case["file"], name)) or best_time_us(call, args.rounds, args.iterations)
+            mb_per_s = len(case["text"]) / us if us else 0.0
+            previous = baseline.get((case["file"], name))
+            change = f"{(us - previous) / previous * 100:+.1f}%" if previous else "-"
+            print(f"{case['file']:<40}{name:<26}{len(case['text']):>8}{us:>11.1f}{mb_per_s:>9.2f}{change:>9}  {not case_failures}")
+            results.append({"case": case["file"], "format": case["format"], "parser": name,
+                             "chars": len(case["text"]), "us_per_call": round(us, 3),
+                             "mb_per_s": round(mb_per_s, 3), "ok": not case_failures})
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "rounds": args.rounds,
+            "iterations": args.iterations,
+            "scaling_chars": args.scaling_chars if generated else None,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
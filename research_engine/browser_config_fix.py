@@ -3,6 +3,9 @@
 Browser Configuration Fix
 Updated based on official Browser-Use documentation to prevent stuck processes
 """
+import logging
+
+logger = logging.getLogger(__name__)
 
 def get_enhanced_browser_config():
     """
@@ -41,9 +44,49 @@ def get_enhanced_agent_config():
     return {
         'max_steps': 30,  # Reduced from 60 to prevent infinite loops
         'step_timeout': 30,  # 30 seconds per step
-        'use_vision': True  # Enable vision capabilities by default
+        'use_vision': True,  # Enable vision capabilities by default
+        'speculative_start': True,  # Warm up the browser on fallback queries while the LLM writes its own
+        'history_compaction': {
+            'enabled': True,
+            'keep_recent_steps': 4,  # Older steps are collapsed into a fact summary
+            'compact_every': 2,
+            'max_fact_chars': 400,
+            'max_summary_chars': 4000
+        }
     }
 
+async def warm_up_browser(browser_session, query, search_url="https://duckduckgo.com/?q={query}"):
+    """
+    Start the browser and open a search for ``query`` so the agent's first step
+    lands on results instead of a blank page. Runs alongside LLM query generation;
+    any failure is logged and the agent simply navigates on its own.
+    """
+    from urllib.parse import quote_plus
+    
+    try:
+        await browser_session.start()
+        page = await browser_session.get_current_page()
+        await page.goto(search_url.format(query=quote_plus(query)), wait_until="domcontentloaded", timeout=15000)
+        logger.info("Browser warmed up on speculative query: %s", query)
+        return True
+    except Exception as e:
+        logger.warning("Speculative browser warm-up failed, agent will navigate itself: %s", e)
+        return False
+
+def merge_search_queries(llm_queries, speculative_queries, limit=9):
+    """
+    Combine the queries already running speculatively with the LLM-generated ones,
+    speculative first (their results are already open), without duplicates
+    """
+    merged = []
+    seen = set()
+    for query in list(speculative_queries) + list(llm_queries):
+        key = ' '.join(query.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(query)
+    return merged[:limit]
+
 # Create a test function that can be run without getting stuck
 async def test_browser_config():
     """
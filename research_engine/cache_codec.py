@@ -0,0 +1,110 @@
+# cache_codec.py - Versioned, optionally compressed encoding for cache entries
+#
+# Problem validation and competition results carry long evidence excerpts and
+# competitor lists, so plain stdlib-json files are large and slow to load. Each
+# encoded entry starts with a small header naming the format version and the
+# compression used; the body is JSON produced by orjson when it is installed.
+# Plain-JSON files from before the codec are only ever stored under retired key
+# formats (see research_cache.py), so anything without the header is rejected
+# like any other unreadable entry.
+#
+# Header: b"RC" + version byte + compression byte
+
+import os
+import gzip
+import json
+import zlib
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = b"RC"
+FORMAT_VERSION = 1
+
+COMPRESSION_IDS = {"none": 0, "gzip": 1, "zstd": 2}
+COMPRESSION_NAMES = {v: k for k, v in COMPRESSION_IDS.items()}
+
+# Below this size compression costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+
+
+def default_compression() -> str:
+    """RESEARCH_CACHE_COMPRESSION, else zstd when installed, else gzip"""
+    name = os.getenv("RESEARCH_CACHE_COMPRESSION")
+    if name:
+        name = name.lower()
+        if name not in COMPRESSION_IDS:
+            raise ValueError(f"RESEARCH_CACHE_COMPRESSION must be one of {tuple(COMPRESSION_IDS)}")
+        if name == "zstd" and zstandard is None:
+            raise ValueError("RESEARCH_CACHE_COMPRESSION=zstd needs the zstandard package")
+        return name
+    return "zstd" if zstandard is not None else "gzip"
+
+
+def dumps_json(value: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # Non-string keys or exotic types; stdlib json is more forgiving
+            pass
+    return json.dumps(value).encode()
+
+
+def loads_json(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode(value: Any, compression: str = "none") -> bytes:
+    body = dumps_json(value)
+    if len(body) < MIN_COMPRESS_BYTES:
+        compression = "none"
+    if compression == "zstd":
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+    elif compression == "gzip":
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+    return MAGIC + bytes([FORMAT_VERSION, COMPRESSION_IDS[compression]]) + body
+
+
+def decode(data: Union[bytes, str]) -> Any:
+    """Decode an entry written by ``encode``.
+
+    Raises ValueError for anything unreadable, so callers can treat it as corrupt.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    if not data.startswith(MAGIC):
+        raise ValueError("Cache entry has no codec header")
+    if len(data) < 4:
+        raise ValueError("Truncated cache entry header")
+    version, compression_id = data[2], data[3]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache entry version {version}")
+    compression = COMPRESSION_NAMES.get(compression_id)
+    body = data[4:]
+    try:
+        if compression == "zstd":
+            if zstandard is None:
+                raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif compression == "gzip":
+            body = gzip.decompress(body)
+        elif compression != "none":
+            raise ValueError(f"Unknown cache entry compression {compression_id}")
+    except (OSError, EOFError, zlib.error) as e:
+        raise ValueError(f"Corrupt compressed cache entry: {e}")
+    except Exception as e:
+        if zstandard is not None and isinstance(e, zstandard.ZstdError):
+            raise ValueError(f"Corrupt compressed cache entry: {e}")
+        raise
+    return loads_json(body)
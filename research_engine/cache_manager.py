@@ -0,0 +1,159 @@
+# cache_manager.py - Keeps the research cache inside a size budget
+#
+# The research cache used to grow forever: expired results were skipped on read
+# but never deleted. CacheManager periodically sweeps entries that can no longer
+# be served (past TTL plus the stale window), removes files left behind by old
+# key formats, and evicts least-recently or least-frequently used results until
+# the cache fits its byte and entry budget. Sweeps run in a worker thread from a
+# background task, so request handling never waits on them.
+
+import os
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from research_cache import ResearchCache, FileBackend, DEFAULT_TTLS, DEFAULT_TTL, DEFAULT_MAX_STALE
+
+# Pre-ResearchCache cache directory; nothing writes here any more. Like the live
+# cache directory it is git-ignored, so sweeps only ever remove local leftovers
+LEGACY_CACHE_DIRS = [os.path.join(os.path.dirname(__file__), "cache")]
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+class CacheManager:
+    """Expiry sweeps, budget enforcement and occupancy reporting for a ResearchCache"""
+
+    def __init__(self, cache: ResearchCache, max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None, policy: Optional[str] = None,
+                 sweep_interval: Optional[float] = None):
+        self.cache = cache
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("RESEARCH_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("RESEARCH_CACHE_ENTRY_BUDGET", "5000"))
+        self.policy = (policy or os.getenv("RESEARCH_CACHE_EVICTION", "lru")).lower()
+        if self.policy not in EVICTION_POLICIES:
+            raise ValueError(f"RESEARCH_CACHE_EVICTION must be one of {EVICTION_POLICIES}")
+        self.sweep_interval = sweep_interval if sweep_interval is not None else float(os.getenv("RESEARCH_CACHE_SWEEP_SECONDS", "600"))
+        self.last_sweep: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def namespaces(self) -> List[str]:
+        """Result namespaces: the configured ones plus any seen at runtime"""
+        names = set(self.cache.ttls) | set(self.cache.stats()["namespaces"])
+        return sorted(n for n in names if not n.startswith("ideas_"))
+
+    def _entries(self) -> List[Dict[str, Any]]:
+        """Every stored result with its size, including its similarity-index record"""
+        entries = []
+        for namespace in self.namespaces():
+            index_sizes = {}
+            if not namespace.startswith("lowconf_"):
+                index_sizes = {key: size for key, size, _ in self.cache.backend.entry_info(f"ideas_{namespace}")}
+            for key, size, stored_at in self.cache.backend.entry_info(namespace):
+                last_access, hits = self.cache.access_info(namespace, key)
+                entries.append({
+                    "namespace": namespace,
+                    "key": key,
+                    "bytes": size + index_sizes.get(key, 0),
+                    "stored_at": stored_at,
+                    "last_access": max(last_access, stored_at),
+                    "hits": hits,
+                })
+        return entries
+
+    def occupancy(self) -> Dict[str, Any]:
+        entries = self._entries()
+        by_namespace: Dict[str, Dict[str, int]] = {}
+        for entry in entries:
+            usage = by_namespace.setdefault(entry["namespace"], {"entries": 0, "bytes": 0})
+            usage["entries"] += 1
+            usage["bytes"] += entry["bytes"]
+        total_bytes = sum(e["bytes"] for e in entries)
+        return {
+            "entries": len(entries),
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "byte_utilization": round(total_bytes / self.max_bytes, 3) if self.max_bytes else 0.0,
+            "policy": self.policy,
+            "by_namespace": by_namespace,
+            "last_sweep": self.last_sweep,
+        }
+
+    def sweep(self) -> Dict[str, Any]:
+        """Delete unservable entries, then evict until the cache fits its budget"""
+        started = time.time()
+        expired = 0
+        survivors = []
+        for entry in self._entries():
+            if started - entry["stored_at"] >= self.cache.expiry_horizon(entry["namespace"]):
+                self.cache.delete_sync(entry["namespace"], entry["key"])
+                expired += 1
+            else:
+                survivors.append(entry)
+
+        orphans = self._sweep_orphans()
+
+        evicted = 0
+        total_bytes = sum(e["bytes"] for e in survivors)
+        if total_bytes > self.max_bytes or len(survivors) > self.max_entries:
+            for entry in sorted(survivors, key=self._eviction_rank):
+                if total_bytes <= self.max_bytes and len(survivors) - evicted <= self.max_entries:
+                    break
+                self.cache.delete_sync(entry["namespace"], entry["key"])
+                total_bytes -= entry["bytes"]
+                evicted += 1
+
+        self.last_sweep = {
+            "at": started,
+            "duration_seconds": round(time.time() - started, 3),
+            "expired": expired,
+            "orphans": orphans,
+            "evicted": evicted,
+        }
+        if expired or orphans or evicted:
+            print(f"Cache sweep removed {expired} expired, {orphans} orphaned and {evicted} evicted entries")
+        return self.last_sweep
+
+    def _eviction_rank(self, entry: Dict[str, Any]) -> Tuple[float, ...]:
+        """Lowest rank is evicted first"""
+        if self.policy == "lfu":
+            return (entry["hits"], entry["last_access"])
+        return (entry["last_access"],)
+
+    def _sweep_orphans(self) -> int:
+        """Remove files from retired key formats once nothing could still serve them"""
+        # Retired formats only ever held research results, never knowledge-base documents
+        result_ttls = [ttl for ns, ttl in DEFAULT_TTLS.items() if not ns.startswith("kb_")]
+        horizon = max(result_ttls, default=DEFAULT_TTL) + DEFAULT_MAX_STALE
+        removed = 0
+        if isinstance(self.cache.backend, FileBackend):
+            namespaces = self.namespaces()
+            known = namespaces + [f"ideas_{n}" for n in namespaces]
+            removed += self.cache.backend.sweep_orphans(known, horizon)
+        for legacy_dir in LEGACY_CACHE_DIRS:
+            if os.path.isdir(legacy_dir):
+                removed += FileBackend(legacy_dir).sweep_orphans([], horizon)
+        return removed
+
+    def start(self) -> asyncio.Task:
+        """Run sweeps in the background on the current event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                print(f"Cache sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
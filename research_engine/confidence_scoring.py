@@ -0,0 +1,304 @@
+# confidence_scoring.py - Quality-weighted confidence scores shared by the research services
+#
+# Counting sources rewards ten forum posts over two market research reports.
+# Here every source gets a weight from three factors: the authority of its
+# publisher type (AUTHORITY_WEIGHTS), how old it is (recency_multiplier,
+# against the current year rather than a hard-coded one) and, for market
+# sizing, whether it agrees with the reconciled consensus. Each weighted source
+# is treated as independent evidence that the findings hold, so the evidence
+# term is 1 - prod(1 - EVIDENCE_PER_SOURCE * weight): strong sources add a
+# lot, weak ones a little, and no number of weak ones reaches certainty. The
+# 0-10 score blends that with how complete the service's analysis is.
+#
+# Weights are computed for a flat array of every source of every result and
+# reduced per result with np.add.reduceat, so a whole cache can be re-scored
+# in one pass (scripts/rescore_cache.py) whenever the weights change.
+
+import datetime
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from section_parser import number_or_zero
+
+# Authority of each publisher type, out of 10
+AUTHORITY_WEIGHTS = {
+    "market_research_report": 10,   # Paid market research (Gartner, etc)
+    "financial_report": 9,          # Annual reports, investor decks
+    "industry_association": 8,      # Industry association reports
+    "academic_study": 8,            # Academic papers, university research
+    "government_data": 7,           # Census data, economic reports
+    "news_article": 5,              # News publications
+    "company_blog": 3,              # Company blogs (biased but useful)
+    "forum_discussion": 2,          # Forums, Reddit, etc (anecdotal)
+}
+# Authority of a source no pattern recognises, by its self-reported quality
+QUALITY_AUTHORITY = {"high": 8, "medium": 5, "low": 2}
+UNKNOWN_AUTHORITY = 4
+# Added to the authority of a source that explains its methodology (max 10)
+METHODOLOGY_BONUS = 2
+
+# Evidence types the problem validation agent reports
+TYPE_AUTHORITY = {
+    "research_study": "academic_study",
+    "survey": "academic_study",
+    "news_article": "news_article",
+    "forum_post": "forum_discussion",
+    "review": "forum_discussion",
+}
+# Publisher, title and URL patterns, checked in order
+AUTHORITY_PATTERNS = [(authority, re.compile(pattern)) for authority, pattern in (
+    ("forum_discussion", r"reddit|forum|quora|stack ?(?:exchange|overflow)|hacker ?news|news\.ycombinator|discord|trustpilot|capterra|\bg2\b"),
+    ("company_blog", r"\bblog\b|medium\.com|substack|wordpress"),
+    ("market_research_report", r"gartner|forrester|\bidc\b|grand ?view|statista|ibisworld|mordor|markets ?and ?markets|"
+                               r"fortune business|allied market|precedence research|technavio|research ?and ?markets|"
+                               r"euromonitor|frost|mckinsey|deloitte|\bpwc\b|\bbcg\b|\bbain\b|accenture|verified market|"
+                               r"straits research|imarc|market research|market report"),
+    ("financial_report", r"annual report|10-k|10-q|sec\.gov|investor|earnings|prospectus|pitchbook|crunchbase|cb insights"),
+    ("government_data", r"\.gov\b|census|bureau|ministry|department of|eurostat|\boecd\b|world bank|\bimf\b|\bsba\b"),
+    ("academic_study", r"\.edu\b|\.ac\.[a-z]{2}\b|universit|journal of|arxiv|ssrn|harvard business|\bhbr\b"),
+    ("industry_association", r"association|council|federation|institute|consortium|chamber of commerce|alliance"),
+    ("news_article", r"news|times|post\b|journal|techcrunch|forbes|reuters|bloomberg|\bwsj\b|cnbc|\bbbc\b|guardian|"
+                     r"economist|business insider|venturebeat|wired|verge|axios|fast company|inc\.com|entrepreneur"),
+)]
+
+# Recency multiplier by age in years: (maximum age, multiplier), oldest last
+RECENCY_STEPS = ((1, 1.0), (3, 0.8), (5, 0.6))
+OLD_DATA_MULTIPLIER = 0.4
+UNKNOWN_DATE_MULTIPLIER = 0.6
+
+# Market sizing sources that agree with the consensus get a slight boost;
+# outliers are penalised unless they explain their methodology
+CONSENSUS_MULTIPLIER = 1.1
+OUTLIER_MULTIPLIER = 0.6
+# Sources the agent could not read (CAPTCHA, paywall) count for less
+BLOCKED_MULTIPLIER = 0.5
+# Sources pre-seeded from the knowledge base and returned unchanged were
+# counted by the run that found them; here they are only corroboration
+KNOWN_SOURCE_MULTIPLIER = 0.5
+
+# Lowest score a result needs to be cached long-term; weaker results only go
+# to the short-lived lowconf_<service> tier. Problem validation's evidence is
+# mostly forum posts and reviews (forum_discussion authority) checked against
+# two completeness items, so a well-supported validation scores about a point
+# below a market sizing or competition result backed by reports and filings.
+MARKET_CACHE_THRESHOLD = 5  # market sizing and competition
+PROBLEM_VALIDATION_CACHE_THRESHOLD = 4
+CACHE_THRESHOLDS = {
+    "market_sizing": MARKET_CACHE_THRESHOLD,
+    "competition": MARKET_CACHE_THRESHOLD,
+    "problem_validation": PROBLEM_VALIDATION_CACHE_THRESHOLD,
+}
+
+# Evidence a single full-weight source contributes, and the share of the
+# 0-10 score that comes from evidence rather than analysis completeness
+EVIDENCE_PER_SOURCE = 0.5
+EVIDENCE_SHARE = 0.8
+
+_YEAR = re.compile(r'\b(19[89]\d|20\d\d)\b')
+
+
+def current_year() -> int:
+    return datetime.date.today().year
+
+
+def year_of(value: Any) -> Optional[int]:
+    """The year in a date, year or free-text value; None when there is none"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    found = _YEAR.search(str(value)) if value else None
+    return int(found.group(1)) if found else None
+
+
+def recency_multiplier(years: Any, today: Optional[int] = None) -> np.ndarray:
+    """Discount for data age, vectorized over an array of years (NaN when unknown)"""
+    age = (today or current_year()) - np.asarray(years, dtype=float)
+    conditions = [age <= max_age for max_age, _ in RECENCY_STEPS]
+    multiplier = np.select(conditions, [value for _, value in RECENCY_STEPS], OLD_DATA_MULTIPLIER)
+    return np.where(np.isnan(age), UNKNOWN_DATE_MULTIPLIER, multiplier)
+
+
+@lru_cache(maxsize=4096)
+def _classify(text: str, kind: str) -> Optional[str]:
+    if kind in TYPE_AUTHORITY:
+        return TYPE_AUTHORITY[kind]
+    for authority, pattern in AUTHORITY_PATTERNS:
+        if pattern.search(text):
+            return authority
+    return None
+
+
+def source_authority(source: Dict[str, Any]) -> Tuple[str, float]:
+    """Publisher type of a source and its authority out of 10"""
+    text = " ".join(str(source.get(field) or "") for field in ("publisher", "name", "source", "report_title", "url")).lower()
+    authority = _classify(text, str(source.get("type") or "").strip().lower())
+    if authority:
+        weight = AUTHORITY_WEIGHTS[authority]
+    else:
+        label = str(source.get("source_quality") or source.get("credibility") or "").strip().lower()
+        authority = "unknown"
+        weight = QUALITY_AUTHORITY.get(label, UNKNOWN_AUTHORITY)
+    if source.get("methodology"):
+        weight = min(weight + METHODOLOGY_BONUS, 10)
+    return authority, float(weight)
+
+
+def _source_year(source: Dict[str, Any]) -> Optional[int]:
+    for field in ("publication_date", "date", "base_year"):
+        year = year_of(source.get(field))
+        if year:
+            return year
+    return None
+
+
+def source_weights(sources: Sequence[Dict[str, Any]], consensus: Any = False,
+                   today: Optional[int] = None) -> Dict[str, Any]:
+    """Per-source arrays "weight", "authority" (out of 10), "recency" and "alignment", plus the publisher types.
+
+    ``consensus`` (one flag, or one per source) says whether the sources'
+    outlier flags come from a consensus of at least two sources.
+    """
+    types, authority, years, outlier, blocked, carried = [], [], [], [], [], []
+    for source in sources:
+        kind, weight = source_authority(source)
+        types.append(kind)
+        authority.append(weight)
+        year = _source_year(source)
+        years.append(np.nan if year is None else year)
+        # +1 agrees with the consensus, -1 penalised outlier, 0 neither
+        outlier.append(1 if source.get("outlier") is False else -1 if source.get("outlier") and not source.get("methodology") else 0)
+        blocked.append(source.get("access_status") not in (None, "", "accessible"))
+        carried.append(bool(source.get("from_knowledge_base")))
+
+    authority = np.array(authority, dtype=float)
+    recency = recency_multiplier(np.array(years, dtype=float), today)
+    outlier = np.array(outlier, dtype=int) * np.broadcast_to(np.asarray(consensus, dtype=bool), len(outlier))
+    alignment = np.select([outlier > 0, outlier < 0], [CONSENSUS_MULTIPLIER, OUTLIER_MULTIPLIER], 1.0)
+    alignment = np.where(np.array(blocked, dtype=bool), alignment * BLOCKED_MULTIPLIER, alignment)
+    alignment = np.where(np.array(carried, dtype=bool), alignment * KNOWN_SOURCE_MULTIPLIER, alignment)
+    return {
+        "weight": np.minimum(authority / 10 * recency * alignment, 1.0),
+        "authority": authority,
+        "recency": recency,
+        "alignment": alignment,
+        "types": types,
+    }
+
+
+def score_batch(source_groups: Sequence[Sequence[Dict[str, Any]]], completeness: Sequence[float],
+                consensus: Optional[Sequence[bool]] = None, today: Optional[int] = None) -> Dict[str, Any]:
+    """Vectorized confidence for many results: per-result arrays "score" (0-10),
+    "evidence" (0-1) and "weighted_sources", plus the flat per-source weights.
+    ``consensus`` flags the groups whose outlier flags come from a reconciliation."""
+    lengths = np.array([len(group) for group in source_groups], dtype=int)
+    flat = [source for group in source_groups for source in group]
+    per_source = np.repeat(np.asarray(consensus if consensus is not None else [False] * len(lengths), dtype=bool), lengths)
+    weights = source_weights(flat, per_source, today)
+
+    # log(1 - r) summed per result is the log of the chance every source is wrong
+    doubt = np.log1p(-EVIDENCE_PER_SOURCE * weights["weight"])
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(int)
+    nonempty = lengths > 0
+    log_doubt = np.zeros(len(source_groups))
+    weighted = np.zeros(len(source_groups))
+    if nonempty.any():
+        log_doubt[nonempty] = np.add.reduceat(doubt, starts[nonempty])
+        weighted[nonempty] = np.add.reduceat(weights["weight"], starts[nonempty])
+    evidence = 1 - np.exp(log_doubt)
+    completeness = np.clip(np.asarray(completeness, dtype=float), 0, 1)
+    score = np.rint(10 * (EVIDENCE_SHARE * evidence + (1 - EVIDENCE_SHARE) * completeness))
+    return {"score": score.astype(int), "evidence": evidence, "weighted_sources": weighted,
+            "lengths": lengths, "starts": starts, "sources": weights}
+
+
+# --- Service adapters: (holder of confidence_score/data_quality, sources, completeness, consensus) ---
+
+def _fraction(checks: Sequence[Any]) -> float:
+    return sum(float(check) for check in checks) / len(checks)
+
+
+def _market_sizing_view(result: Dict[str, Any]):
+    market_data = result.get("market_data")
+    if not isinstance(market_data, dict):
+        return None
+    breakdown = market_data.get("market_breakdown") or {}
+    completeness = _fraction([
+        bool(breakdown.get("tam") or breakdown.get("sam")),
+        bool(breakdown.get("growth_drivers") or breakdown.get("geographic_regions")),
+    ])
+    reconciliation = market_data.get("reconciliation") or {}
+    return market_data, market_data.get("sources"), completeness, (reconciliation.get("sources_used") or 0) >= 2
+
+
+def _competition_view(result: Dict[str, Any]):
+    completeness = _fraction([
+        min(len(result.get("competitors") or []) / 3, 1.0),
+        len(result.get("market_gaps") or []) >= 2,
+        len(result.get("barriers_to_entry") or []) >= 2,
+        result.get("market_concentration") not in (None, "", "unknown"),
+    ])
+    return result, result.get("sources"), completeness, False
+
+
+def _problem_validation_view(result: Dict[str, Any]):
+    validation = result.get("problem_validation") or {}
+    completeness = _fraction([
+        min(len(result.get("alternative_solutions") or []) / 2, 1.0),
+        validation.get("exists") is not None
+        and number_or_zero(validation.get("severity")) > 0 and number_or_zero(validation.get("frequency")) > 0,
+    ])
+    return result, result.get("evidence"), completeness, False
+
+
+SERVICE_VIEWS: Dict[str, Callable] = {
+    "market_sizing": _market_sizing_view,
+    "competition": _competition_view,
+    "problem_validation": _problem_validation_view,
+}
+
+
+def score_results(service: str, results: Sequence[Dict[str, Any]], today: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+    """Re-score many results of one service in a single vectorized pass.
+
+    Sets each result's confidence_score and data_quality["confidence"] (the
+    breakdown), and tags every source with its publisher type and weight.
+    Returns the breakdowns, None for results that are not dicts of that service.
+    """
+    if service not in SERVICE_VIEWS:
+        raise ValueError(f"Unknown service for confidence scoring: {service}")
+    views = [SERVICE_VIEWS[service](result) if isinstance(result, dict) else None for result in results]
+    groups = [[source for source in (view[1] or []) if isinstance(source, dict)] if view else [] for view in views]
+    batch = score_batch(groups, [view[2] if view else 0.0 for view in views],
+                        [bool(view and view[3]) for view in views], today)
+    sources = batch["sources"]
+
+    breakdowns: List[Optional[Dict[str, Any]]] = []
+    for row, (view, group) in enumerate(zip(views, groups)):
+        if view is None:
+            breakdowns.append(None)
+            continue
+        start = batch["starts"][row]
+        for offset, source in enumerate(group):
+            source["authority"] = sources["types"][start + offset]
+            source["quality_weight"] = round(float(sources["weight"][start + offset]), 3)
+        holder = view[0]
+        breakdown = {
+            "score": int(batch["score"][row]),
+            "evidence": round(float(batch["evidence"][row]), 4),
+            "completeness": round(view[2], 4),
+            "weighted_sources": round(float(batch["weighted_sources"][row]), 3),
+            "scored_in": today or current_year(),
+        }
+        holder["confidence_score"] = breakdown["score"]
+        if not isinstance(holder.get("data_quality"), dict):
+            holder["data_quality"] = {}
+        holder["data_quality"]["confidence"] = breakdown
+        breakdowns.append(breakdown)
+    return breakdowns
+
+
+def score_result(service: str, result: Dict[str, Any], today: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """score_results for a single result"""
+    return score_results(service, [result], today)[0]
@@ -0,0 +1,166 @@
+# fake_llm.py - Deterministic stand-in chat model for offline and load testing
+#
+# ScriptedChatModel answers from a JSON script of regex rules instead of calling
+# a provider, and sleeps for a latency drawn from a configurable distribution so
+# the services, parsers and API can be benchmarked end to end without keys or a
+# network. Select it with LLM_PROVIDER=fake (see llm_provider.create_chat_model).
+#
+# Script format:
+#   {
+#     "rules": [
+#       {"match": "<regex>", "response": "<text>"},
+#       {"match": "<regex>", "response_file": "<path relative to script>", "agent_done": true}
+#     ],
+#     "default_response": "OK"
+#   }
+# Rules are tried in order against the whole prompt. ``agent_done`` wraps the
+# response in a Browser-Use ``done`` action so an agent finishes in one step
+# with the recorded final result. The default script's first rule answers the
+# "capital of France" probe Browser-Use sends when an Agent is constructed, so
+# the fake passes its connection check like a real provider.
+
+import os
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+DEFAULT_SCRIPT_PATH = Path(__file__).parent / "fixtures" / "fake_llm_script.json"
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays scripted responses with simulated latency"""
+
+    rules: List[Dict[str, Any]] = []
+    default_response: str = "OK"
+    latency_mean: float = 0.5
+    latency_stddev: float = 0.2
+    latency_distribution: str = "lognormal"
+    seed: int = 0
+    model_name: str = "scripted-fake"
+
+    @classmethod
+    def from_script(cls, script_path: Optional[str] = None, **kwargs) -> "ScriptedChatModel":
+        """Load rules from a JSON script, resolving response_file paths next to it"""
+        script_path = Path(script_path or DEFAULT_SCRIPT_PATH)
+        with open(script_path, "r") as f:
+            script = json.load(f)
+
+        rules = []
+        for rule in script.get("rules", []):
+            response = rule.get("response", "")
+            if rule.get("response_file"):
+                with open(script_path.parent / rule["response_file"], "r") as f:
+                    response = f.read()
+            if rule.get("agent_done"):
+                response = _agent_done_action(response)
+            rules.append({"match": rule["match"], "response": response})
+
+        return cls(rules=rules, default_response=script.get("default_response", "OK"), **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "ScriptedChatModel":
+        """Build from FAKE_LLM_* environment variables"""
+        distribution = os.getenv("FAKE_LLM_LATENCY_DIST", "lognormal")
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"FAKE_LLM_LATENCY_DIST must be one of {LATENCY_DISTRIBUTIONS}")
+        return cls.from_script(
+            os.getenv("FAKE_LLM_SCRIPT"),
+            latency_mean=float(os.getenv("FAKE_LLM_LATENCY_MEAN", "0.5")),
+            latency_stddev=float(os.getenv("FAKE_LLM_LATENCY_STDDEV", "0.2")),
+            latency_distribution=distribution,
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = _prompt_text(messages)
+        time.sleep(self._latency(prompt))
+        return self._respond(prompt)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = _prompt_text(messages)
+        await asyncio.sleep(self._latency(prompt))
+        return self._respond(prompt)
+
+    def _respond(self, prompt: str) -> ChatResult:
+        content = self.default_response
+        for rule in self.rules:
+            if re.search(rule["match"], prompt, re.IGNORECASE | re.DOTALL):
+                content = rule["response"]
+                break
+
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _latency(self, prompt: str) -> float:
+        """Latency for this prompt; the same prompt and seed always wait the same time"""
+        digest = hashlib.md5(f"{self.seed}:{prompt}".encode()).hexdigest()
+        rng = random.Random(int(digest[:16], 16))
+
+        if self.latency_distribution == "constant":
+            latency = self.latency_mean
+        elif self.latency_distribution == "uniform":
+            latency = rng.uniform(self.latency_mean - self.latency_stddev, self.latency_mean + self.latency_stddev)
+        elif self.latency_distribution == "normal":
+            latency = rng.gauss(self.latency_mean, self.latency_stddev)
+        else:
+            # Lognormal parameterised so the draws have the requested mean and stddev
+            if self.latency_mean <= 0:
+                return 0.0
+            variance = math.log(1 + (self.latency_stddev / self.latency_mean) ** 2)
+            mu = math.log(self.latency_mean) - variance / 2
+            latency = rng.lognormvariate(mu, math.sqrt(variance))
+        return max(0.0, latency)
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    parts = []
+    for message in messages:
+        content = message.content
+        if isinstance(content, list):
+            content = " ".join(p.get("text", "") if isinstance(p, dict) else str(p) for p in content)
+        parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _agent_done_action(final_result: str) -> str:
+    """Wrap a final result in the JSON a Browser-Use agent parses in raw tool-calling mode"""
+    return json.dumps({
+        "current_state": {
+            "evaluation_previous_goal": "Success - research complete",
+            "memory": "Returning recorded research result",
+            "next_goal": "Finish the task",
+        },
+        "action": [{"done": {"text": final_result, "success": True}}],
+    })
@@ -0,0 +1,141 @@
+# idea_similarity.py - Canonical cache keys and near-duplicate idea matching
+#
+# Users resubmit the same idea with small rewordings ("An AI tool that..." vs
+# "AI-powered tool which..."), and every variant used to trigger a fresh
+# 30-step browser run. make_cache_key canonicalizes the inputs before hashing
+# them so punctuation, case and spacing never change the key. IdeaIndex is a
+# MinHash/LSH index over the idea text, so a near-identical submission in the
+# same scope (for example the same industry and product type) can reuse earlier
+# research, while unrelated ideas never collide.
+
+import re
+import random
+import hashlib
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Words that carry no meaning for matching business ideas
+STOPWORDS = frozenset(
+    "a an the and or of for to in on at by with that which who is are be will "
+    "can our their its it this these those from into as using via".split()
+)
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32                      # 32 bands x 4 rows
+DEFAULT_SIMILARITY_THRESHOLD = 0.7  # Estimated Jaccard needed to reuse research
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def make_cache_key(*parts: Optional[str]) -> str:
+    """Fixed-length key from canonicalized inputs; order matters, formatting does not"""
+    canonical = "\x1f".join(normalize_text(part) for part in parts)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def make_scope(*parts: Optional[str]) -> str:
+    """Fields that must match exactly before two ideas are compared"""
+    return make_cache_key(*parts)[:16]
+
+
+def _shingles(text: str) -> set:
+    words = [w for w in normalize_text(text).split() if w not in STOPWORDS]
+    joined = " ".join(words)
+    if len(joined) <= SHINGLE_SIZE:
+        return {joined} if joined else set()
+    return {joined[i:i + SHINGLE_SIZE] for i in range(len(joined) - SHINGLE_SIZE + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with fixed permutations so they can be persisted"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_permutations = num_permutations
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_permutations)
+        ]
+
+    def signature(self, text: str) -> List[int]:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "big")
+            for s in _shingles(text)
+        ]
+        if not hashes:
+            return [_MAX_HASH] * self.num_permutations
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._permutations
+        ]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Fraction of matching MinHash slots, an estimate of Jaccard similarity"""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class IdeaIndex:
+    """LSH buckets over MinHash signatures, partitioned by scope"""
+
+    def __init__(self, bands: int = LSH_BANDS, hasher: Optional[MinHasher] = None):
+        self.hasher = hasher or MinHasher()
+        self.bands = bands
+        self.rows = self.hasher.num_permutations // bands
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], set] = {}
+        self._signatures: Dict[str, Tuple[str, List[int]]] = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _band_keys(self, scope: str, signature: List[int]) -> Iterable[Tuple[str, int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield scope, band, tuple(signature[start:start + self.rows])
+
+    def add(self, key: str, scope: str, signature: List[int]):
+        self.remove(key)
+        self._signatures[key] = (scope, signature)
+        for band_key in self._band_keys(scope, signature):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str):
+        entry = self._signatures.pop(key, None)
+        if entry is None:
+            return
+        scope, signature = entry
+        for band_key in self._band_keys(scope, signature):
+            bucket = self._buckets.get(band_key)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def query(self, scope: str, signature: List[int],
+              threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> List[Tuple[str, float]]:
+        """Keys in the same scope whose estimated similarity clears the threshold, best first"""
+        candidates = set()
+        for band_key in self._band_keys(scope, signature):
+            candidates.update(self._buckets.get(band_key, ()))
+
+        matches = []
+        for key in candidates:
+            similarity = estimate_similarity(signature, self._signatures[key][1])
+            if similarity >= threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
@@ -0,0 +1,155 @@
+# json_extract.py - Linear-time extraction of JSON objects from agent output
+#
+# Agent final results mix prose, markdown fences and one or more JSON objects,
+# and are sometimes truncated mid-object. The services used to find the JSON
+# with lazy DOTALL patterns and character-by-character brace counting, which
+# backtrack badly on long transcripts full of braces and quotes.
+#
+# extract_json scans the text once and records every balanced {...} span, with
+# strings and escapes respected and nesting kept. Each outermost span is decoded
+# in place with JSONDecoder.raw_decode. When a span fails to decode, the error
+# position tells us which nested spans were already parsed cleanly and which
+# ones contain the error, so no character is decoded more than about twice.
+# The candidate objects are then ranked by how well they match the caller's
+# schema.
+
+import re
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Characters that can change the scanner's state; everything else is skipped in C
+_SCAN_PATTERN = re.compile(r'[{}"\\\n]')
+# An object must open with a key or close at once; "{blocked}" or "{ {" fails here
+# without running the decoder
+_OBJECT_OPENING = re.compile(r'\{\s*(["}])?')
+
+_decoder = json.JSONDecoder()
+
+# How far below a span that failed to decode we keep looking for complete objects.
+# Agent JSON is a handful of levels deep; the cap keeps brace-heavy garbage linear.
+MAX_FAILED_DEPTH = 32
+
+
+class _Span:
+    __slots__ = ("start", "end", "children")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.end = -1
+        self.children: List["_Span"] = []
+
+
+def _scan_spans(text: str) -> List[_Span]:
+    """Outermost balanced-brace spans of text, each carrying its nested spans"""
+    roots: List[_Span] = []
+    stack: List[_Span] = []
+    in_string = False
+    escaped_at = -1
+
+    def abandon_open_spans():
+        # Spans that never close (truncated output, stray quotes) are dropped;
+        # the complete objects nested inside them are still candidates
+        orphans = [child for span in stack for child in span.children]
+        roots.extend(sorted(orphans, key=lambda span: span.start))
+        stack.clear()
+
+    for match in _SCAN_PATTERN.finditer(text):
+        pos = match.start()
+        char = match.group()
+        if not stack:
+            if char == "{":
+                stack.append(_Span(pos))
+            continue
+        if in_string:
+            if pos == escaped_at:
+                continue
+            if char == "\\":
+                escaped_at = pos + 1
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                # JSON strings cannot hold raw newlines, so this was never JSON
+                in_string = False
+                abandon_open_spans()
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "{":
+            stack.append(_Span(pos))
+        elif char == "}":
+            span = stack.pop()
+            span.end = pos + 1
+            if stack:
+                stack[-1].children.append(span)
+            else:
+                roots.append(span)
+
+    abandon_open_spans()
+    return roots
+
+
+def _decode_spans(text: str, spans: List[_Span]) -> Iterator[Tuple[Any, int]]:
+    """Decoded values with their source length, descending into nested spans only where the parent failed"""
+    # Iterative walk so deeply nested input cannot exhaust the Python stack;
+    # each level carries the error position its parent failed at, if any
+    pending = [(iter(spans), None, 0)]
+    while pending:
+        level, known_error, depth = pending[-1]
+        span = next(level, None)
+        if span is None:
+            pending.pop()
+            continue
+        if known_error is not None and span.start < known_error < span.end:
+            # Decoding this span would stop at the same error as its parent
+            pending.append((iter(span.children), known_error, depth + 1))
+            continue
+        opening = _OBJECT_OPENING.match(text, span.start)
+        if opening.group(1) is None:
+            # Nothing was parsed, so looking inside is cheap and does not count as depth
+            pending.append((iter(span.children), opening.end(), depth))
+            continue
+        try:
+            # Decode a slice: JSONDecodeError counts newlines from the start of
+            # its input, which would make every failure cost O(len(text))
+            value, end = _decoder.raw_decode(text[span.start:span.end])
+        except json.JSONDecodeError as e:
+            if depth < MAX_FAILED_DEPTH:
+                pending.append((iter(span.children), span.start + e.pos, depth + 1))
+            continue
+        except RecursionError:
+            # Nested too deeply for the decoder; so are its children
+            continue
+        yield value, end
+
+
+def iter_json_objects(text: str) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """(object, source length) for every JSON object in text not nested inside another decoded object"""
+    if not isinstance(text, str) or "{" not in text:
+        return
+    for value, length in _decode_spans(text, _scan_spans(text)):
+        if isinstance(value, dict):
+            yield value, length
+
+
+def extract_json(text: str, expected_keys: Sequence[str] = (),
+                 validate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 require_match: bool = False) -> Optional[Dict[str, Any]]:
+    """Best JSON object in text for the expected schema, or None.
+
+    Candidates must pass ``validate`` when given. Among them, the one with the
+    most ``expected_keys`` at its top level wins, and the longer object breaks
+    ties. With ``require_match`` an object holding none of the keys is never
+    returned.
+    """
+    best = None
+    best_rank = None
+    for candidate, length in iter_json_objects(text):
+        if validate is not None and not validate(candidate):
+            continue
+        matched = sum(1 for key in expected_keys if key in candidate)
+        if require_match and expected_keys and not matched:
+            continue
+        rank = (matched, length)
+        if best_rank is None or rank > best_rank:
+            best, best_rank = candidate, rank
+    return best
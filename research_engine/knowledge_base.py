@@ -0,0 +1,243 @@
+# knowledge_base.py - Evidence from earlier runs, reused to pre-seed new research
+#
+# Every market sizing and competition run in a vertical collects sources and
+# competitors that the next idea in the same vertical would otherwise rediscover
+# from scratch. IndustryKnowledgeBase keeps one document per industry in the
+# research cache (namespaces ``kb_market_sizing`` and ``kb_competition``), fed
+# from each run's validated result. Items remember the product types and idea
+# keywords they were found for, so a lookup ranks the evidence closest to the
+# new idea first. The services put the top items into the agent task as known
+# evidence and ask the agent to verify them and spend its steps on the gaps.
+#
+# A pre-seeded source or competitor the agent hands back unchanged is not new
+# evidence. The services run results through mark_known_sources and
+# mark_known_competitors, which drop repeats of the same item and tag the
+# carried-over ones ``from_knowledge_base``. Confidence scoring down-weights
+# tagged sources, and recording skips every tagged item so it does not raise
+# its own seen count.
+#
+# Updates are serialized per process only. Workers sharing a file or SQLite
+# cache can interleave read-modify-writes of one industry document (and each
+# keeps its own hot-tier copy), so a concurrent run's new items may be lost.
+# They come back the next time a run in the industry finds them; the knowledge
+# base only seeds prompts, so nothing served depends on it being complete.
+
+import time
+import asyncio
+from typing import Dict, Any, List, Optional
+from idea_similarity import normalize_text, make_cache_key, STOPWORDS
+from research_cache import ResearchCache, get_research_cache
+
+# Per-industry caps; the least-seen, oldest items are dropped first
+MAX_SOURCES_PER_INDUSTRY = 60
+MAX_COMPETITORS_PER_INDUSTRY = 80
+MAX_KEYWORDS_PER_ITEM = 30
+
+# How much evidence goes into a task prompt
+SEED_SOURCES = 6
+SEED_COMPETITORS = 8
+
+
+def extract_keywords(text: Optional[str], limit: int = 12) -> List[str]:
+    """Distinct content words of an idea, in order of first appearance"""
+    keywords = []
+    for word in normalize_text(text).split():
+        if len(word) >= 4 and word not in STOPWORDS and word not in keywords:
+            keywords.append(word)
+            if len(keywords) >= limit:
+                break
+    return keywords
+
+
+class IndustryKnowledgeBase:
+    """Per-industry store of market-size sources and competitors seen in earlier runs"""
+
+    def __init__(self, cache: Optional[ResearchCache] = None):
+        self.cache = cache or get_research_cache()
+        # Read-modify-write of an industry document must not interleave within a
+        # process; across processes see the header
+        self._lock = asyncio.Lock()
+
+    def _key(self, industry: str) -> str:
+        return make_cache_key(industry)
+
+    async def record_market_sizing(self, industry: str, product_type: str, business_idea: str,
+                                   result: Dict[str, Any]):
+        """Add the validated sources of a market sizing result"""
+        sources = result.get("market_data", {}).get("sources", [])
+        items = {}
+        for source in sources:
+            # Carried-over sources were not seen again; re-recording them would rank them up forever
+            if source.get("publisher") and source.get("market_size") is not None and not source.get("from_knowledge_base"):
+                items[source_identity(source)] = source
+        await self._record("kb_market_sizing", industry, product_type, business_idea, "sources", items,
+                           MAX_SOURCES_PER_INDUSTRY)
+
+    async def record_competition(self, industry: str, product_type: str, business_idea: str,
+                                 result: Dict[str, Any]):
+        """Add the validated competitors of a competitive analysis result"""
+        items = {}
+        for competitor in result.get("competitors", []):
+            # Same as sources: a carried-over competitor was not found again
+            if competitor.get("name") and not competitor.get("from_knowledge_base"):
+                items[competitor_identity(competitor)] = competitor
+        await self._record("kb_competition", industry, product_type, business_idea, "competitors", items,
+                           MAX_COMPETITORS_PER_INDUSTRY)
+
+    async def _record(self, namespace: str, industry: str, product_type: str, business_idea: str,
+                      field: str, items: Dict[str, Dict[str, Any]], cap: int):
+        if not items:
+            return
+        keywords = extract_keywords(business_idea)
+        product_type = normalize_text(product_type)
+        now = time.time()
+
+        async with self._lock:
+            document = await self.cache.get(namespace, self._key(industry)) or {"industry": industry, field: []}
+            known = {entry["id"]: entry for entry in document.get(field, [])}
+
+            for identity, data in items.items():
+                entry = known.get(identity)
+                if entry is None:
+                    entry = known[identity] = {"id": identity, "first_seen": now, "seen_count": 0,
+                                               "product_types": [], "keywords": []}
+                # Newer runs carry fresher figures; keep the latest data for the item
+                entry["data"] = data
+                entry["last_seen"] = now
+                entry["seen_count"] += 1
+                if product_type and product_type not in entry["product_types"]:
+                    entry["product_types"].append(product_type)
+                entry["keywords"] = (entry["keywords"] + [k for k in keywords if k not in entry["keywords"]])[-MAX_KEYWORDS_PER_ITEM:]
+
+            entries = sorted(known.values(), key=lambda e: (e["seen_count"], e["last_seen"]), reverse=True)
+            document[field] = entries[:cap]
+            await self.cache.set(namespace, self._key(industry), document)
+
+    async def lookup(self, industry: str, product_type: str, business_idea: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Known sources and competitors for an industry, most relevant to this idea first"""
+        keywords = set(extract_keywords(business_idea))
+        product_type = normalize_text(product_type)
+        market_doc, competition_doc = await asyncio.gather(
+            self.cache.get("kb_market_sizing", self._key(industry)),
+            self.cache.get("kb_competition", self._key(industry)),
+        )
+
+        def rank(entries: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+            def score(entry):
+                overlap = len(keywords & set(entry.get("keywords", [])))
+                same_product = product_type in entry.get("product_types", [])
+                return (same_product * 3 + overlap, entry.get("seen_count", 0), entry.get("last_seen", 0))
+            return [entry["data"] for entry in sorted(entries, key=score, reverse=True)[:limit]]
+
+        return {
+            "sources": rank((market_doc or {}).get("sources", []), SEED_SOURCES),
+            "competitors": rank((competition_doc or {}).get("competitors", []), SEED_COMPETITORS),
+        }
+
+
+def source_identity(source: Dict[str, Any]) -> str:
+    """Publisher and report title, normalized: the same report under any formatting"""
+    return normalize_text(f"{source.get('publisher')} {source.get('report_title', '')}")
+
+
+def mark_known_sources(sources: List[Dict[str, Any]], known_sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One source per report, with ``from_knowledge_base`` set on those the agent
+    returned with the pre-seeded figure unchanged.
+
+    A report listed twice (pre-seeded copy and a re-found one) keeps the copy
+    found this run, so it counts once in reconciliation, bootstrap and scoring.
+    """
+    known = {source_identity(source): source.get("market_size") for source in known_sources}
+    kept: Dict[str, Dict[str, Any]] = {}
+    for source in sources:
+        if not isinstance(source, dict):
+            continue
+        identity = source_identity(source)
+        carried_over = identity in known and source.get("market_size") == known[identity]
+        if carried_over:
+            source["from_knowledge_base"] = True
+        else:
+            source.pop("from_knowledge_base", None)
+        if identity not in kept or (kept[identity].get("from_knowledge_base") and not carried_over):
+            kept[identity] = source
+    return list(kept.values())
+
+
+def competitor_identity(competitor: Dict[str, Any]) -> str:
+    """Competitor name, normalized"""
+    return normalize_text(competitor.get("name"))
+
+
+# The details format_known_competitors shows the agent; a competitor returned
+# with all of them unchanged was copied from the prompt rather than found again
+COMPETITOR_SEED_FIELDS = ("website", "pricing_model", "market_position")
+
+
+def mark_known_competitors(competitors: List[Dict[str, Any]],
+                           known_competitors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One entry per competitor, with ``from_knowledge_base`` set on those the agent
+    returned with the pre-seeded details unchanged; like mark_known_sources, a
+    competitor listed twice keeps the copy found this run.
+    """
+    def details(competitor):
+        return tuple(competitor.get(field) or "" for field in COMPETITOR_SEED_FIELDS)
+
+    known = {competitor_identity(c): details(c) for c in known_competitors}
+    kept: Dict[str, Dict[str, Any]] = {}
+    for competitor in competitors:
+        if not isinstance(competitor, dict):
+            continue
+        identity = competitor_identity(competitor)
+        carried_over = identity in known and details(competitor) == known[identity]
+        if carried_over:
+            competitor["from_knowledge_base"] = True
+        else:
+            competitor.pop("from_knowledge_base", None)
+        if identity not in kept or (kept[identity].get("from_knowledge_base") and not carried_over):
+            kept[identity] = competitor
+    return list(kept.values())
+
+
+def format_known_sources(sources: List[Dict[str, Any]]) -> str:
+    """Task-prompt block listing known market-size sources, or "" when there are none"""
+    if not sources:
+        return ""
+    lines = []
+    for s in sources:
+        size = f"{s.get('currency', 'USD')} {s.get('market_size')} {s.get('market_size_unit', 'billion')}"
+        growth = f", CAGR {s.get('growth_rate')}%" if s.get("growth_rate") is not None else ""
+        lines.append(f'- {s.get("publisher")}: "{s.get("report_title", "")}" ({s.get("publication_date") or "date unknown"}) '
+                     f"- {size} (base year {s.get('base_year')}{growth}, {s.get('geographic_scope', 'Global')}) {s.get('url', '')}")
+    return _known_block("market size sources", lines)
+
+
+def format_known_competitors(competitors: List[Dict[str, Any]]) -> str:
+    """Task-prompt block listing known competitors, or "" when there are none"""
+    if not competitors:
+        return ""
+    lines = []
+    for c in competitors:
+        details = "; ".join(str(part) for part in (c.get("pricing_model"), c.get("market_position")) if part)
+        lines.append(f"- {c.get('name')} ({c.get('website') or 'website unknown'}){': ' + details if details else ''}")
+    return _known_block("competitors", lines)
+
+
+def _known_block(label: str, lines: List[str]) -> str:
+    return (
+        f"\n        **Known Evidence From Earlier Research (pre-seeded):**\n"
+        f"        Earlier research in this industry already found these {label}:\n"
+        + "\n".join(f"            {line}" for line in lines)
+        + "\n        Include the ones relevant to this business idea in your output, updating figures only if you"
+        f"\n        find newer data. Do not spend steps re-researching them; use your steps for what is missing.\n"
+    )
+
+
+_knowledge_base: Optional[IndustryKnowledgeBase] = None
+
+
+def get_knowledge_base() -> IndustryKnowledgeBase:
+    """Process-wide knowledge base shared by the research services"""
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = IndustryKnowledgeBase()
+    return _knowledge_base
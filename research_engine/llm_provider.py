@@ -3,16 +3,349 @@
 import os
 import time
 import random
+import asyncio
+from collections import deque
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+from llm_scheduler import RateLimitCallbackHandler
 from typing import Dict, Any, Optional, List, Union
 
 # Load environment variables from .env file
 project_root = Path(__file__).parent.parent
 load_dotenv(project_root / ".env")
 
+# Which chat model backs the services: "openai" (default) or "fake" for the
+# scripted offline stand-in used in load tests (see fake_llm.py)
+SUPPORTED_PROVIDERS = ("openai", "fake")
+
+ANTHROPIC_MODEL = "claude-3-5-sonnet-20240620"
+
+
+def get_llm_provider_name() -> str:
+    """Provider selected via the LLM_PROVIDER environment variable"""
+    provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    if provider not in SUPPORTED_PROVIDERS:
+        raise ValueError(f"Unsupported LLM_PROVIDER '{provider}', expected one of {SUPPORTED_PROVIDERS}")
+    return provider
+
+
+def create_chat_model(api_key: Optional[str] = None,
+                      temperature: float = 0.1,
+                      max_tokens: int = 4000,
+                      timeout: int = 120,
+                      provider: Optional[str] = None,
+                      use_breaker: bool = True):
+    """Create the chat model the research services run on.
+
+    Every call goes through the provider's shared circuit breaker unless
+    ``use_breaker`` is False (ResilientLLM, which guards its calls itself).
+    With an ANTHROPIC_API_KEY set, OpenAI models come wrapped in a
+    ProviderFallbackChatModel, so calls refused by an open OpenAI circuit (or
+    failing outright) are answered by Anthropic instead.
+    """
+    provider = provider or get_llm_provider_name()
+    callbacks = [CircuitBreakerCallbackHandler(get_circuit_breaker(provider))] if use_breaker else []
+    
+    if provider == "fake":
+        from fake_llm import ScriptedChatModel
+        model = ScriptedChatModel.from_env()
+        model.callbacks = callbacks or None
+        return model
+    
+    if not api_key:
+        raise ValueError("OpenAI API key is required")
+    model = ChatOpenAI(
+        model="gpt-4o",
+        temperature=temperature,
+        max_tokens=max_tokens,
+        api_key=api_key,
+        include_response_headers=True,  # Lets the shared scheduler track rate limits
+        # The breaker goes first so an open circuit fails before queueing for rate limits
+        callbacks=callbacks + [RateLimitCallbackHandler("openai", max_tokens=max_tokens)],
+        timeout=timeout
+    )
+
+    anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not use_breaker or not anthropic_api_key:
+        return model
+    fallback = create_anthropic_model(
+        anthropic_api_key, temperature=temperature, max_tokens=max_tokens, timeout=timeout,
+        callbacks=[CircuitBreakerCallbackHandler(get_circuit_breaker("anthropic"))]
+    )
+    return ProviderFallbackChatModel(models=[model, fallback], model_name=model.model_name)
+
+
+def create_anthropic_model(api_key: str,
+                           temperature: float = 0.3,
+                           max_tokens: int = 4000,
+                           timeout: Optional[int] = None,
+                           callbacks: Optional[List[Any]] = None):
+    """Claude model used as the fallback provider"""
+    return ChatAnthropic(
+        model=ANTHROPIC_MODEL,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=timeout,
+        api_key=api_key,
+        callbacks=(callbacks or []) + [RateLimitCallbackHandler("anthropic", max_tokens=max_tokens)]
+    )
+
+
+class ProviderFallbackChatModel(BaseChatModel):
+    """Chat model that tries each provider's model in turn.
+
+    Each inner model keeps its own breaker and rate-limit callbacks, so a call
+    refused with CircuitOpenError, or failing, moves on to the next provider.
+    Unlike ``with_fallbacks`` the result is still a chat model, which
+    Browser-Use agents require (their settings validate the model type).
+    """
+
+    models: List[Any]
+    model_name: str = "provider-fallback"
+
+    @property
+    def _llm_type(self) -> str:
+        return "provider-fallback"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        errors = []
+        for model in self.models:
+            try:
+                return ChatResult(generations=[ChatGeneration(message=model.invoke(messages, stop=stop, **kwargs))])
+            except Exception as e:
+                errors.append(e)
+                print(f"{model.__class__.__name__} failed ({e}), trying the next provider")
+        raise errors[-1]
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        errors = []
+        for model in self.models:
+            try:
+                message = await model.ainvoke(messages, stop=stop, **kwargs)
+                return ChatResult(generations=[ChatGeneration(message=message)])
+            except Exception as e:
+                errors.append(e)
+                print(f"{model.__class__.__name__} failed ({e}), trying the next provider")
+        raise errors[-1]
+
+    def bind_tools(self, tools, **kwargs):
+        bound = [model.bind_tools(tools, **kwargs) for model in self.models]
+        return bound[0].with_fallbacks(bound[1:])
+
+    def with_structured_output(self, schema, **kwargs):
+        structured = [model.with_structured_output(schema, **kwargs) for model in self.models]
+        return structured[0].with_fallbacks(structured[1:])
+
+
+def get_agent_llm_options(llm) -> Dict[str, Any]:
+    """Extra Agent() kwargs needed for the given chat model"""
+    from fake_llm import ScriptedChatModel
+    primary = llm.models[0] if isinstance(llm, ProviderFallbackChatModel) else llm
+    if isinstance(primary, ScriptedChatModel):
+        # The fake model has no native tool calling; the agent parses its JSON text
+        return {"tool_calling_method": "raw"}
+    if primary is not llm and isinstance(primary, ChatOpenAI):
+        # Browser-Use picks a method by the model's class name, which the wrapper hides
+        return {"tool_calling_method": "function_calling"}
+    return {}
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker tracking rolling error rate and latency.
+
+    CLOSED lets every call through. Once the rolling window shows too many
+    failures (or too many slow calls) the breaker OPENs and calls are refused
+    without touching the provider. After ``open_timeout`` seconds it goes
+    HALF_OPEN and lets a few probe calls through; a successful probe closes
+    it again, a failed one re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self,
+                 name: str,
+                 window_size: int = 20,
+                 min_calls: int = 5,
+                 failure_rate_threshold: float = 0.5,
+                 slow_call_seconds: float = 30.0,
+                 slow_call_rate_threshold: float = 0.8,
+                 open_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_timeout = open_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        # Rolling window of (succeeded, latency_seconds) for the last N calls
+        self._calls = deque(maxlen=window_size)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN -> HALF_OPEN once the timeout has elapsed"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be sent to this provider right now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+        return False
+
+    def record_success(self, latency: float):
+        """Record a successful call and its latency"""
+        if self._state == self.HALF_OPEN:
+            if latency >= self.slow_call_seconds:
+                # Provider answers, but still too slowly to be worth using
+                self._trip()
+                return
+            print(f"Circuit breaker [{self.name}]: probe succeeded, closing circuit")
+            self._reset()
+            return
+        self._calls.append((True, latency))
+        self._evaluate()
+
+    def record_failure(self, latency: float = 0.0):
+        """Record a failed call"""
+        if self._state == self.HALF_OPEN:
+            print(f"Circuit breaker [{self.name}]: probe failed, re-opening circuit")
+            self._trip()
+            return
+        self._calls.append((False, latency))
+        self._evaluate()
+
+    def release(self):
+        """Give back a half-open probe slot whose call ended without a verdict (e.g. cancelled)"""
+        if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the breaker state for health checks and logging"""
+        total = len(self._calls)
+        failures = sum(1 for ok, _ in self._calls if not ok)
+        latencies = [latency for _, latency in self._calls]
+        return {
+            "provider": self.name,
+            "state": self.state,
+            "calls_in_window": total,
+            "failure_rate": failures / total if total else 0.0,
+            "avg_latency": sum(latencies) / total if total else 0.0,
+        }
+
+    def _evaluate(self):
+        total = len(self._calls)
+        if total < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._calls if not ok)
+        slow_calls = sum(1 for _, latency in self._calls if latency >= self.slow_call_seconds)
+        if failures / total >= self.failure_rate_threshold:
+            print(f"Circuit breaker [{self.name}]: failure rate {failures}/{total}, opening circuit")
+            self._trip()
+        elif slow_calls / total >= self.slow_call_rate_threshold:
+            print(f"Circuit breaker [{self.name}]: {slow_calls}/{total} slow calls, opening circuit")
+            self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        self._calls.clear()
+
+    def _reset(self):
+        self._state = self.CLOSED
+        self._half_open_in_flight = 0
+        self._calls.clear()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider, shared by every model created for it"""
+    if provider not in _breakers:
+        _breakers[provider] = CircuitBreaker(provider)
+    return _breakers[provider]
+
+
+class CircuitBreakerCallbackHandler(BaseCallbackHandler):
+    """Guards each chat-model call with a circuit breaker.
+
+    Attach via ``callbacks=[CircuitBreakerCallbackHandler(breaker)]``. A call
+    to a provider whose circuit is open raises CircuitOpenError before any
+    request is sent; every other call's outcome and latency feed the breaker,
+    so agents and plain calls trip and recover it together.
+    """
+
+    # Refusing the call only works if the error reaches the caller; running
+    # inline keeps the breaker on the event loop thread in async calls
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        # run_id -> start time of calls that have not finished yet
+        self._in_flight: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuit open for {self.breaker.name}, not calling the provider")
+        self._in_flight[run_id] = time.monotonic()
+        if probe:
+            # A cancelled async call reports neither end nor error; free the
+            # probe slot when its task finishes instead
+            try:
+                task = asyncio.current_task()
+            except RuntimeError:
+                # No running loop: a sync call always reports its end or error
+                task = None
+            # None when the loop runs us from a plain callback rather than a task
+            if task is not None:
+                task.add_done_callback(lambda _: self._abandon(run_id))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._in_flight.pop(run_id, None)
+        if started is not None:
+            self.breaker.record_success(time.monotonic() - started)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started = self._in_flight.pop(run_id, None)
+        if started is None:
+            return
+        if isinstance(error, Exception):
+            self.breaker.record_failure(time.monotonic() - started)
+        else:
+            # Cancelled or interrupted: says nothing about the provider
+            self.breaker.release()
+
+    def _abandon(self, run_id):
+        if self._in_flight.pop(run_id, None) is not None:
+            self.breaker.release()
+
+
 class ResilientLLM:
     """Resilient LLM provider with fallback capabilities"""
     
@@ -20,7 +353,8 @@ class ResilientLLM:
                  openai_api_key: Optional[str] = None, 
                  anthropic_api_key: Optional[str] = None,
                  max_retries: int = 3,
-                 retry_delay: int = 2):
+                 retry_delay: int = 2,
+                 breaker_config: Optional[Dict[str, Any]] = None):
         
         # First try constructor args, then environment variables
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
@@ -33,73 +367,93 @@ class ResilientLLM:
         
         # Initialize fallback model
         self.fallback_llm = self._init_anthropic()
+        
+        # One circuit breaker per provider so an outage on one side
+        # sends traffic straight to the other instead of retrying; without
+        # a config they are the breakers the services' models share
+        if breaker_config:
+            self.primary_breaker = CircuitBreaker("openai", **breaker_config)
+            self.fallback_breaker = CircuitBreaker("anthropic", **breaker_config)
+        else:
+            self.primary_breaker = get_circuit_breaker("openai")
+            self.fallback_breaker = get_circuit_breaker("anthropic")
     
-    def _init_openai(self) -> ChatOpenAI:
+    def _init_openai(self):
         """Initialize OpenAI LLM"""
+        if get_llm_provider_name() == "fake":
+            return create_chat_model(provider="fake", use_breaker=False)
         if not self.openai_api_key:
             raise ValueError("OpenAI API key is required")
         
-        return ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.1,
-            max_tokens=4000,
-            api_key=self.openai_api_key
-        )
+        # with_fallback records outcomes itself, so the model carries no breaker callback
+        return create_chat_model(api_key=self.openai_api_key, provider="openai", use_breaker=False)
     
-    def _init_anthropic(self) -> ChatAnthropic:
+    def _init_anthropic(self):
         """Initialize Anthropic LLM as fallback"""
+        if get_llm_provider_name() == "fake":
+            return create_chat_model(provider="fake", use_breaker=False)
         if not self.anthropic_api_key:
             raise ValueError("Anthropic API key is required for fallback")
         
-        return ChatAnthropic(
-            model="claude-3-5-sonnet-20240620",
-            temperature=0.3,
-            api_key=self.anthropic_api_key
-        )
+        # ChatAnthropic's own default completion budget, as before
+        return create_anthropic_model(self.anthropic_api_key, max_tokens=1024)
     
     async def get_llm(self, fallback: bool = False):
-        """Get LLM instance (primary or fallback)"""
+        """Get LLM instance (primary or fallback), skipping a provider whose circuit is open"""
         if fallback and self.fallback_llm:
             return self.fallback_llm
+        if self.primary_breaker.state == CircuitBreaker.OPEN and self.fallback_llm:
+            return self.fallback_llm
         return self.primary_llm
     
+    def breaker_stats(self) -> List[Dict[str, Any]]:
+        """Circuit breaker state for each provider"""
+        return [self.primary_breaker.stats(), self.fallback_breaker.stats()]
+    
     async def with_fallback(self, func, *args, **kwargs):
         """Run a function with fallback if it fails"""
         exceptions = []
         
-        # Try with primary LLM
-        for attempt in range(self.max_retries):
-            try:
-                return await func(self.primary_llm, *args, **kwargs)
-            except Exception as e:
-                exceptions.append(f"Primary LLM attempt {attempt+1} failed: {str(e)}")
-                
-                # Only sleep if we're going to retry
-                if attempt < self.max_retries - 1:
-                    # Exponential backoff with jitter
-                    delay = (2 ** attempt) * self.retry_delay + random.uniform(0, 1)
-                    print(f"Retrying in {delay:.2f} seconds...")
-                    time.sleep(delay)
-        
-        # If we get here, all primary attempts failed
-        print("Primary LLM failed, falling back to secondary LLM")
+        providers = [
+            ("Primary", self.primary_llm, self.primary_breaker),
+            ("Fallback", self.fallback_llm, self.fallback_breaker),
+        ]
         
-        # Try with fallback LLM
-        for attempt in range(self.max_retries):
-            try:
-                if not self.fallback_llm:
-                    raise ValueError("No fallback LLM available")
-                    
-                return await func(self.fallback_llm, *args, **kwargs)
-            except Exception as e:
-                exceptions.append(f"Fallback LLM attempt {attempt+1} failed: {str(e)}")
+        for label, llm, breaker in providers:
+            if not llm:
+                exceptions.append(f"{label} LLM not available")
+                continue
+            
+            for attempt in range(self.max_retries):
+                # An open circuit fails fast instead of waiting out the retries
+                if not breaker.allow_request():
+                    exceptions.append(f"{label} LLM circuit open, skipping")
+                    break
                 
-                # Only sleep if we're going to retry
-                if attempt < self.max_retries - 1:
-                    delay = (2 ** attempt) * self.retry_delay + random.uniform(0, 1)
-                    print(f"Retrying fallback in {delay:.2f} seconds...")
-                    time.sleep(delay)
+                start = time.monotonic()
+                try:
+                    result = await func(llm, *args, **kwargs)
+                    breaker.record_success(time.monotonic() - start)
+                    return result
+                except Exception as e:
+                    breaker.record_failure(time.monotonic() - start)
+                    exceptions.append(f"{label} LLM attempt {attempt+1} failed: {str(e)}")
+                    
+                    # Only sleep if we're going to retry on a provider that is still healthy
+                    if attempt < self.max_retries - 1 and breaker.state == CircuitBreaker.CLOSED:
+                        # Exponential backoff with jitter
+                        delay = (2 ** attempt) * self.retry_delay + random.uniform(0, 1)
+                        print(f"Retrying {label.lower()} in {delay:.2f} seconds...")
+                        await asyncio.sleep(delay)
+                except BaseException:
+                    # Cancelled or interrupted: no verdict on the provider, but a
+                    # half-open probe slot must not stay taken forever
+                    breaker.release()
+                    raise
+            
+            if label == "Primary":
+                print("Primary LLM failed, falling back to secondary LLM")
         
         # If we get here, both primary and fallback failed
         error_msg = "All LLM attempts failed:\n" + "\n".join(exceptions)
-        raise Exception(error_msg)
\ No newline at end of file
+        raise Exception(error_msg)
@@ -0,0 +1,367 @@
+# llm_scheduler.py - Shared rate-limit-aware scheduler for LLM traffic
+#
+# All three research services (and every browser agent they start) share one
+# scheduler per process. Each provider gets a request bucket (RPM) and a token
+# bucket (TPM); calls wait for capacity instead of bursting into 429s, and the
+# buckets are corrected from the provider's rate-limit response headers.
+# Waiting calls are served round-robin across analyses so one long agent run
+# cannot starve the others. Only the call at the head of the queue waits on a
+# timer (the bucket deficit); the rest sleep until they are woken as the head.
+
+import os
+import re
+import time
+import asyncio
+import threading
+import contextvars
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List
+from langchain_core.callbacks import AsyncCallbackHandler
+
+# Rough chars-per-token ratio for English prompts
+CHARS_PER_TOKEN = 4
+# Vision steps attach a screenshot; count it at roughly a high-detail tile cost
+TOKENS_PER_IMAGE = 800
+# Used when the model does not tell us its max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+# Bare reset numbers above this (2001-09-09) are Unix timestamps, not a delay in seconds
+EPOCH_THRESHOLD = 1_000_000_000
+
+# Defaults are conservative tier-1 limits; override per deployment via env
+DEFAULT_LIMITS = {
+    "openai": {
+        "rpm": int(os.getenv("OPENAI_RPM", "500")),
+        "tpm": int(os.getenv("OPENAI_TPM", "30000")),
+    },
+    "anthropic": {
+        "rpm": int(os.getenv("ANTHROPIC_RPM", "50")),
+        "tpm": int(os.getenv("ANTHROPIC_TPM", "40000")),
+    },
+}
+
+# Identifies which analysis a call belongs to, for fair queuing
+current_analysis = contextvars.ContextVar("current_analysis", default="default")
+
+
+def begin_analysis(analysis_id: str):
+    """Tag LLM calls made from the current task with an analysis id"""
+    current_analysis.set(analysis_id)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously up to its capacity"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        # Set when the provider tells us to back off entirely (429 retry-after)
+        self._blocked_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be consumed (0 if available now)"""
+        self._refill()
+        blocked = max(0.0, self._blocked_until - time.monotonic())
+        # A single call larger than the whole bucket is allowed once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return blocked
+        return max(blocked, (amount - self.tokens) / self.refill_per_second)
+
+    def consume(self, amount: float):
+        """Take ``amount`` from the bucket; negative amounts refund"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def sync(self, remaining: Optional[float] = None, limit: Optional[float] = None,
+             reset_seconds: Optional[float] = None):
+        """Correct the bucket from provider rate-limit headers"""
+        self._refill()
+        if limit:
+            self.capacity = float(limit)
+            self.refill_per_second = float(limit) / 60.0
+        if remaining is not None:
+            # The provider's view wins when it says we have less than we think
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0 and reset_seconds:
+                self.block_for(reset_seconds)
+
+    def block_for(self, seconds: float):
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class ProviderLimits:
+    """Request and token buckets plus the fair wait queue for one provider"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        # analysis_id -> tickets waiting, and the round-robin order of analyses
+        self.queues: Dict[str, deque] = {}
+        self.rotation: deque = deque()
+
+    def wait_time(self, estimated_tokens: float) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+
+
+class LLMScheduler:
+    """Queues LLM calls per provider and releases them at the rate limit.
+
+    State is guarded by a threading lock rather than asyncio primitives because
+    LangChain runs async callbacks for synchronous ``invoke`` calls on a
+    separate event loop in a worker thread; waiters are woken through their own
+    loop with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self._lock = threading.Lock()
+        self._providers: Dict[str, ProviderLimits] = {}
+        self._limits = limits or DEFAULT_LIMITS
+        self._next_ticket = 0
+        # ticket -> (event loop, event) of every waiting call
+        self._waiters: Dict[int, tuple] = {}
+
+    def _provider(self, name: str) -> ProviderLimits:
+        if name not in self._providers:
+            config = self._limits.get(name, {"rpm": 60, "tpm": 10000})
+            self._providers[name] = ProviderLimits(config["rpm"], config["tpm"])
+        return self._providers[name]
+
+    async def acquire(self, provider: str, estimated_tokens: int, analysis_id: Optional[str] = None):
+        """Wait for this call's turn and for bucket capacity, then reserve it"""
+        analysis_id = analysis_id or current_analysis.get()
+        woken = asyncio.Event()
+
+        with self._lock:
+            limits = self._provider(provider)
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            if analysis_id not in limits.queues:
+                limits.queues[analysis_id] = deque()
+                limits.rotation.append(analysis_id)
+            limits.queues[analysis_id].append(ticket)
+            self._waiters[ticket] = (asyncio.get_running_loop(), woken)
+
+        try:
+            while True:
+                with self._lock:
+                    # Cleared under the lock, so a wake-up after this check is never lost
+                    woken.clear()
+                    head_analysis = limits.rotation[0]
+                    is_turn = head_analysis == analysis_id and limits.queues[analysis_id][0] == ticket
+                    # Not our turn: sleep until the calls ahead make us the head
+                    wait = limits.wait_time(estimated_tokens) if is_turn else None
+                    if is_turn and wait <= 0:
+                        limits.requests.consume(1)
+                        limits.tokens.consume(estimated_tokens)
+                        limits.rotation.popleft()
+                        self._remove_ticket(limits, analysis_id, ticket)
+                        # Give the other analyses a turn before this one goes again
+                        if analysis_id in limits.queues:
+                            limits.rotation.append(analysis_id)
+                        self._wake_head(limits)
+                        return
+                try:
+                    await asyncio.wait_for(woken.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            # Cancelled while waiting - don't leave a dead ticket at the head of the queue
+            with self._lock:
+                self._remove_ticket(limits, analysis_id, ticket)
+                self._wake_head(limits)
+            raise
+
+    def _wake_head(self, limits: ProviderLimits):
+        """Wake the call now at the head of the queue; caller holds the lock"""
+        if not limits.rotation:
+            return
+        queue = limits.queues.get(limits.rotation[0])
+        waiter = self._waiters.get(queue[0]) if queue else None
+        if waiter is None:
+            return
+        loop, event = waiter
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # Its loop has closed; the call is gone with it
+            pass
+
+    def _remove_ticket(self, limits: ProviderLimits, analysis_id: str, ticket: int):
+        self._waiters.pop(ticket, None)
+        queue = limits.queues.get(analysis_id)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if not queue:
+            del limits.queues[analysis_id]
+            if analysis_id in limits.rotation:
+                limits.rotation.remove(analysis_id)
+
+    def record_usage(self, provider: str, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Charge or refund the difference between the estimate and real usage"""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            limits = self._provider(provider)
+            limits.tokens.consume(actual_tokens - estimated_tokens)
+            # A refund may let the head go sooner than it planned to
+            self._wake_head(limits)
+
+    def update_from_headers(self, provider: str, headers: Dict[str, Any]):
+        """Sync buckets from OpenAI ``x-ratelimit-*`` or Anthropic ``anthropic-ratelimit-*`` headers"""
+        if not headers:
+            return
+        headers = {str(k).lower(): v for k, v in dict(headers).items()}
+
+        with self._lock:
+            limits = self._provider(provider)
+            for kind, bucket in (("requests", limits.requests), ("tokens", limits.tokens)):
+                remaining = _to_float(headers.get(f"x-ratelimit-remaining-{kind}",
+                                                  headers.get(f"anthropic-ratelimit-{kind}-remaining")))
+                limit = _to_float(headers.get(f"x-ratelimit-limit-{kind}",
+                                              headers.get(f"anthropic-ratelimit-{kind}-limit")))
+                reset = _parse_reset(headers.get(f"x-ratelimit-reset-{kind}",
+                                                 headers.get(f"anthropic-ratelimit-{kind}-reset")))
+                if remaining is not None or limit is not None:
+                    bucket.sync(remaining=remaining, limit=limit, reset_seconds=reset)
+
+            retry_after = _to_float(headers.get("retry-after"))
+            if retry_after:
+                limits.requests.block_for(retry_after)
+            # The head recomputes its wait against the corrected buckets
+            self._wake_head(limits)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Current bucket levels and queue depth per provider"""
+        with self._lock:
+            return [
+                {
+                    "provider": name,
+                    "requests_available": round(limits.requests.tokens, 1),
+                    "tokens_available": round(limits.tokens.tokens),
+                    "waiting_calls": sum(len(q) for q in limits.queues.values()),
+                    "waiting_analyses": len(limits.rotation),
+                }
+                for name, limits in self._providers.items()
+            ]
+
+
+def estimate_tokens(messages: List[Any], max_tokens: Optional[int] = None) -> int:
+    """Estimate prompt plus completion tokens for a list of chat messages"""
+    prompt_tokens = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") in ("image_url", "image"):
+                    prompt_tokens += TOKENS_PER_IMAGE
+                else:
+                    text = part.get("text", "") if isinstance(part, dict) else str(part)
+                    prompt_tokens += len(text) // CHARS_PER_TOKEN
+        else:
+            prompt_tokens += len(str(content)) // CHARS_PER_TOKEN
+    return prompt_tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class RateLimitCallbackHandler(AsyncCallbackHandler):
+    """Holds each chat-model call until the shared scheduler releases it.
+
+    Attach to a chat model via ``callbacks=[RateLimitCallbackHandler("openai")]``
+    (with ``include_response_headers=True`` on ChatOpenAI so the buckets can be
+    synced from the response).
+    """
+
+    def __init__(self, provider: str, max_tokens: Optional[int] = None,
+                 scheduler: Optional[LLMScheduler] = None):
+        self.provider = provider
+        self.max_tokens = max_tokens
+        self.scheduler = scheduler or get_scheduler()
+        # run_id -> estimated tokens reserved for that call
+        self._in_flight: Dict[Any, int] = {}
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        estimated = sum(estimate_tokens(batch, self.max_tokens) for batch in messages)
+        await self.scheduler.acquire(self.provider, estimated)
+        self._in_flight[run_id] = estimated
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        estimated = self._in_flight.pop(run_id, None)
+        headers = None
+        actual = None
+
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or llm_output.get("usage") or {}
+        if usage:
+            actual = usage.get("total_tokens") or (
+                usage.get("input_tokens", 0) + usage.get("output_tokens", 0)) or None
+
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                metadata = getattr(message, "response_metadata", None) or {}
+                headers = headers or metadata.get("headers")
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if actual is None and usage_metadata:
+                    actual = usage_metadata.get("total_tokens")
+
+        if estimated is not None:
+            self.scheduler.record_usage(self.provider, estimated, actual)
+        self.scheduler.update_from_headers(self.provider, headers)
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._in_flight.pop(run_id, None)
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            self.scheduler.update_from_headers(self.provider, headers)
+
+
+def _to_float(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value) -> Optional[float]:
+    """Parse reset values like '6m0s', '20ms', '1s', an RFC 3339 timestamp or a Unix
+    timestamp into seconds from now"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if re.fullmatch(r'(?:\d+(?:\.\d+)?(?:h|ms|m|s))+', value):
+        seconds = 0.0
+        for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value):
+            seconds += float(amount) * {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit]
+        return seconds
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+    except ValueError:
+        pass
+    seconds = _to_float(value)
+    if seconds is not None and seconds > EPOCH_THRESHOLD:
+        # Too large for a delay, so it is the time the limit resets at
+        return max(0.0, seconds - time.time())
+    return seconds
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """Process-wide scheduler shared by every service and agent"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler()
+    return _scheduler
@@ -0,0 +1,145 @@
+# market_bootstrap.py - Bootstrap confidence intervals for TAM and growth rate
+#
+# confidence_score says how much to trust a result but not how wide the answer
+# is. Resampling a result's sources with replacement and recomputing the
+# estimate each time gives that width directly: the consensus TAM (geometric
+# mean of the non-outlier sources, as in market_reconciliation) and the mean
+# growth rate, each with a percentile interval.
+#
+# bootstrap_batch draws every resample of every group as one
+# (groups, resamples, sources) index array, so thousands of resamples of both
+# figures are a few NumPy calls rather than a Python loop per resample.
+
+import os
+import re
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from market_normalization import normalize_sources_batch, inflation_factor
+from market_reconciliation import reconcile_result
+
+# Resamples per interval (0 turns the stage off) and the default seed
+BOOTSTRAP_RESAMPLES = int(os.getenv("MARKET_BOOTSTRAP_RESAMPLES", "2000"))
+BOOTSTRAP_SEED = int(os.getenv("MARKET_BOOTSTRAP_SEED", "42"))
+# Two-sided coverage of the reported intervals
+CONFIDENCE_LEVEL = 0.9
+# Fewer values than this give no interval: one source resamples to itself
+MIN_BOOTSTRAP_SOURCES = 2
+# Growth rates outside this range (percent a year) are misreads, such as a year
+# taken from "CAGR 2023-2030", and are left out
+GROWTH_RATE_RANGE = (-100.0, 200.0)
+
+# The number right before a percent sign, else a string that is only a number
+_PERCENT = re.compile(r'(-?\d+(?:\.\d+)?)\s*%')
+_BARE_NUMBER = re.compile(r'\s*(-?\d+(?:\.\d+)?)\s*')
+
+
+def _compact(value_groups: Sequence[Sequence[float]]) -> tuple:
+    """Finite values of each group left-aligned in a NaN-padded matrix, with per-row counts"""
+    rows = [np.asarray(group, dtype=float) for group in value_groups]
+    rows = [row[np.isfinite(row)] for row in rows]
+    count = np.array([len(row) for row in rows], dtype=int)
+    matrix = np.full((len(rows), max(int(count.max(initial=0)), 1)), np.nan)
+    for index, row in enumerate(rows):
+        matrix[index, :len(row)] = row
+    return matrix, count
+
+
+def bootstrap_batch(value_groups: Sequence[Sequence[float]], resamples: int = BOOTSTRAP_RESAMPLES,
+                    level: float = CONFIDENCE_LEVEL, seed: Optional[int] = BOOTSTRAP_SEED) -> Dict[str, np.ndarray]:
+    """Percentile bootstrap of the mean of each group of values.
+
+    Returns per-group arrays "estimate" (the mean of the group itself), "low",
+    "high" and "count". Non-finite values are ignored; groups with fewer than
+    MIN_BOOTSTRAP_SOURCES values get NaN bounds.
+    """
+    if not 0 < level < 1:
+        raise ValueError("level must be between 0 and 1")
+    if resamples < 1:
+        raise ValueError("resamples must be at least 1")
+    matrix, count = _compact(value_groups)
+    rows, width = matrix.shape
+    safe_count = np.maximum(count, 1)
+
+    # Each row gains a trailing zero; resample columns past a row's count
+    # pick it, so every resample is one gather and one sum
+    padded = np.concatenate((np.nan_to_num(matrix), np.zeros((rows, 1))), axis=1).ravel()
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, safe_count[:, None, None], (rows, resamples, width))
+    picks = np.where(np.arange(width) < count[:, None, None], picks, width)
+    picks += (np.arange(rows) * (width + 1))[:, None, None]
+    means = padded[picks].sum(axis=2) / safe_count[:, None]
+
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(means, (tail, 100 - tail), axis=1)
+    enough = count >= MIN_BOOTSTRAP_SOURCES
+    return {
+        "estimate": np.where(count > 0, padded.reshape(rows, width + 1).sum(axis=1) / safe_count, np.nan),
+        "low": np.where(enough, low, np.nan),
+        "high": np.where(enough, high, np.nan),
+        "count": count,
+    }
+
+
+def _growth_rate(value: Any) -> float:
+    """A source's growth rate in percent; NaN when missing, not a number or out of range"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        rate = float(value)
+    elif isinstance(value, str):
+        match = _PERCENT.search(value) or _BARE_NUMBER.fullmatch(value)
+        rate = float(match.group(1)) if match else np.nan
+    else:
+        rate = np.nan
+    low, high = GROWTH_RATE_RANGE
+    return rate if low <= rate <= high else np.nan
+
+
+def _interval(batch: Dict[str, np.ndarray], row: int, digits: int) -> Optional[Dict[str, Any]]:
+    if batch["count"][row] < MIN_BOOTSTRAP_SOURCES:
+        return None
+    return {
+        "estimate": round(float(batch["estimate"][row]), digits),
+        "low": round(float(batch["low"][row]), digits),
+        "high": round(float(batch["high"][row]), digits),
+        "sources": int(batch["count"][row]),
+    }
+
+
+def bootstrap_result(result: Dict[str, Any], resamples: int = BOOTSTRAP_RESAMPLES,
+                     level: float = CONFIDENCE_LEVEL, seed: Optional[int] = BOOTSTRAP_SEED) -> Optional[Dict[str, Any]]:
+    """Bootstrap intervals for a market sizing result's TAM and growth rate.
+
+    Sizes are the reconciled sources (outliers left out) in dollars of the
+    reconciliation's price year. Sets market_data["confidence_intervals"] and
+    returns it; None when neither figure has enough sources or the stage is off.
+    """
+    market_data = result.get("market_data") if isinstance(result, dict) else None
+    sources = market_data.get("sources") if isinstance(market_data, dict) else None
+    if not isinstance(sources, list) or resamples < 1:
+        return None
+    reconciliation = market_data.get("reconciliation") or reconcile_result(result)
+
+    sources = [source for source in sources if isinstance(source, dict) and not source.get("outlier")]
+    normalized = normalize_sources_batch(sources)
+    sizes = normalized["value_usd"]
+    if reconciliation and reconciliation.get("price_year"):
+        sizes = sizes * inflation_factor(normalized["base_year"], np.full(len(sizes), float(reconciliation["price_year"])))
+    growth = [_growth_rate(source.get("growth_rate")) for source in sources]
+
+    # Both figures in one batch; TAM as log sizes, so its mean is the geometric mean
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_sizes = np.log(sizes)
+    batch = bootstrap_batch([log_sizes, growth], resamples, level, seed)
+    for name in ("estimate", "low", "high"):
+        batch[name][0] = np.exp(batch[name][0])
+    intervals = {"tam_usd": _interval(batch, 0, 0), "growth_rate": _interval(batch, 1, 2)}
+    if not any(intervals.values()):
+        return None
+
+    block: Dict[str, Any] = {"level": level, "resamples": resamples, "seed": seed,
+                             "price_year": reconciliation.get("price_year") if reconciliation else None}
+    block.update(intervals)
+    market_data["confidence_intervals"] = block
+    return block
+
@@ -0,0 +1,325 @@
+# market_normalization.py - Canonical USD values for the market sizes the agents extract
+#
+# Sources quote sizes as "$5.2 billion", "USD 4.5B", "€3,2 Mrd", "$450M",
+# "₹1,200 crore" or ranges such as "$4.5-5.2 billion". The parsers used to
+# understand only "$N billion|million|trillion" and dropped everything else,
+# and the server's calculator re-parsed the unit strings on its side.
+#
+# parse_market_size turns one such string into a number in its own currency.
+# normalize_batch then converts whole arrays of figures to USD at the exchange
+# rate of each figure's year and, when asked, to constant dollars of one price
+# year using US CPI. Both tables are offline annual averages so normalization
+# never needs the network; refresh them once a year.
+
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ===== OFFLINE TABLES =====
+# Annual average units of currency per 1 USD, 2015-2025 (2025 partly estimated)
+TABLE_FIRST_YEAR = 2015
+CURRENCY_PER_USD = {
+    "USD": [1.0] * 11,
+    "EUR": [0.901, 0.904, 0.885, 0.847, 0.893, 0.876, 0.845, 0.950, 0.925, 0.924, 0.885],
+    "GBP": [0.654, 0.738, 0.776, 0.749, 0.783, 0.779, 0.727, 0.808, 0.804, 0.782, 0.758],
+    "JPY": [121.0, 108.8, 112.2, 110.4, 109.0, 106.8, 109.8, 131.5, 140.5, 151.4, 149.0],
+    "CNY": [6.23, 6.64, 6.76, 6.62, 6.91, 6.90, 6.45, 6.73, 7.08, 7.19, 7.19],
+    "INR": [64.2, 67.2, 65.1, 68.4, 70.4, 74.1, 73.9, 78.6, 82.6, 83.7, 86.5],
+    "CAD": [1.279, 1.325, 1.298, 1.296, 1.327, 1.341, 1.254, 1.301, 1.350, 1.370, 1.400],
+    "AUD": [1.331, 1.345, 1.305, 1.338, 1.439, 1.453, 1.331, 1.442, 1.506, 1.515, 1.550],
+    "CHF": [0.962, 0.985, 0.985, 0.978, 0.994, 0.939, 0.914, 0.955, 0.899, 0.880, 0.840],
+    "KRW": [1131.0, 1160.0, 1131.0, 1100.0, 1166.0, 1180.0, 1144.0, 1292.0, 1306.0, 1364.0, 1400.0],
+    "BRL": [3.33, 3.49, 3.19, 3.65, 3.94, 5.16, 5.40, 5.16, 5.00, 5.39, 5.60],
+    "SGD": [1.375, 1.381, 1.381, 1.349, 1.364, 1.380, 1.344, 1.379, 1.343, 1.336, 1.320],
+    "SEK": [8.43, 8.56, 8.55, 8.69, 9.46, 9.21, 8.58, 10.11, 10.61, 10.57, 10.00],
+}
+# US CPI-U annual averages for the same years (2025 estimated)
+US_CPI = [237.0, 240.0, 245.1, 251.1, 255.7, 258.8, 271.0, 292.7, 304.7, 313.7, 322.0]
+# Yearly inflation assumed outside the CPI table
+CPI_EXTRAPOLATION_RATE = 0.025
+
+TABLE_LAST_YEAR = TABLE_FIRST_YEAR + len(US_CPI) - 1
+CURRENCIES = list(CURRENCY_PER_USD)
+_FX = np.array([CURRENCY_PER_USD[code] for code in CURRENCIES])
+_CPI = np.array(US_CPI)
+
+# ===== PARSING =====
+# Currency markers, longest first so "US$" and "C$" win over "$"
+_CURRENCY_TOKENS = [
+    (r"US\$|USD|U\.S\. dollars?|dollars?", "USD"),
+    (r"C\$|CA\$|CAD", "CAD"),
+    (r"A\$|AU\$|AUD", "AUD"),
+    (r"S\$|SGD", "SGD"),
+    (r"R\$|BRL", "BRL"),
+    (r"\$", "USD"),
+    (r"€|EUR|euros?", "EUR"),
+    (r"£|GBP|pounds?", "GBP"),
+    (r"¥|JPY|yen", "JPY"),
+    (r"CNY|RMB|yuan", "CNY"),
+    (r"₹|INR|Rs\.?|rupees?", "INR"),
+    (r"CHF", "CHF"),
+    (r"₩|KRW", "KRW"),
+    (r"SEK", "SEK"),
+]
+# Scale words and abbreviations, longest first
+_SCALE_TOKENS = [
+    (r"trillions?|trn|tn|t", 1e12),
+    (r"billions?|milliarden|milliarde|milliards?|mrd\.?|bln|bn|b", 1e9),
+    (r"crores?|cr", 1e7),
+    (r"millions?|millionen|mio\.?|mln|mn|mm|m", 1e6),
+    (r"lakhs?", 1e5),
+    (r"thousands?|tsd\.?|k", 1e3),
+]
+_CURRENCY_CODES = {}
+_SCALES = {}
+_UNIT_MULTIPLIERS = {}
+
+_CURRENCY = "|".join(tokens for tokens, _ in _CURRENCY_TOKENS)
+_SCALE = "(?:" + "|".join(tokens for tokens, _ in _SCALE_TOKENS) + r")(?![a-z0-9])"
+# "4.5", "3,2", "3,900", "1.234,5"
+_NUMBER = r"\d{1,3}(?:[.,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?"
+_AMOUNT = re.compile(
+    rf"(?:(?<![a-z])(?P<cur1>{_CURRENCY})\s*|(?<![\w.,]))(?P<num1>{_NUMBER})\s*(?P<scale1>{_SCALE})?"
+    rf"(?:\s*(?:-|–|—|to|and)\s*(?P<cur2>{_CURRENCY})?\s*(?P<num2>{_NUMBER})(?![\d.,%])\s*(?P<scale2>{_SCALE})?)?"
+    rf"(?:\s*(?P<cur3>{_CURRENCY})(?![a-z]))?",
+    re.IGNORECASE,
+)
+# A scale word inside a unit string such as "USD billion"
+_UNIT = re.compile(rf"(?<![a-z]){_SCALE}", re.IGNORECASE)
+# "450,000,000" - thousands separators make a bare number an amount
+_GROUPED = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+_YEAR = re.compile(r"(?<!\d)(19[5-9]\d|20\d{2})(?!\d)")
+
+# Unit words the services report sizes in, largest first
+UNIT_WORDS = [("trillion", 1e12), ("billion", 1e9), ("million", 1e6), ("thousand", 1e3)]
+
+
+def _lookup(table, tokens_list, token):
+    """Code or multiplier for a matched currency/scale token"""
+    key = token.lower().rstrip(".")
+    if key not in table:
+        for tokens, value in tokens_list:
+            if re.fullmatch(tokens, token, re.IGNORECASE):
+                table[key] = value
+                break
+    return table.get(key)
+
+
+def currency_code(token: Optional[str]) -> Optional[str]:
+    """ISO code for a currency marker such as "$", "€", "usd" or "RMB", or None"""
+    if not token:
+        return None
+    if token.upper() in CURRENCY_PER_USD:
+        return token.upper()
+    return _lookup(_CURRENCY_CODES, _CURRENCY_TOKENS, token.strip())
+
+
+def _scale(token: Optional[str]) -> Optional[float]:
+    return _lookup(_SCALES, _SCALE_TOKENS, token) if token else None
+
+
+def _to_float(number: str) -> float:
+    """A number with either thousands separators or a decimal comma"""
+    if "," in number and "." in number:
+        decimal = "," if number.rfind(",") > number.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        return float(number.replace(thousands, "").replace(decimal, "."))
+    for separator in (",", "."):
+        if separator in number:
+            head, *groups = number.split(separator)
+            if len(groups) > 1 or len(groups[0]) == 3 and separator == ",":
+                return float(number.replace(separator, ""))
+            return float(number.replace(separator, "."))
+    return float(number)
+
+
+def parse_market_size(text: Any, default_currency: str = "USD") -> Optional[Dict[str, Any]]:
+    """First money amount in text as {"value", "low", "high", "scale", "currency", "year"}, or None.
+
+    Values are in whole units of the quoted currency ("€3,2 Mrd" gives
+    value 3.2e9, currency "EUR"); low/high are the ends of a range or equal to
+    value; "scale" is the multiplier of the quoted unit (1e9 for "Mrd") or
+    None. A bare number only counts with a currency, a scale or thousands
+    separators, so years and percentages are skipped. "year" is the first
+    year mentioned anywhere in text, or None.
+    """
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return {"value": float(text), "low": float(text), "high": float(text),
+                "scale": None, "currency": default_currency, "year": None}
+    if not isinstance(text, str):
+        return None
+    for match in _AMOUNT.finditer(text):
+        groups = match.groupdict()
+        scale1, scale2 = _scale(groups["scale1"]), _scale(groups["scale2"])
+        currency = currency_code(groups["cur1"] or groups["cur2"] or groups["cur3"])
+        if not (currency or scale1 or scale2 or _GROUPED.fullmatch(groups["num1"])):
+            continue
+        if groups["num2"] and not scale2 and _YEAR.fullmatch(groups["num2"]):
+            # "$5.2 billion to 2030" is a figure and a year, not a range
+            groups["num2"] = None
+        low = _to_float(groups["num1"]) * (scale1 or scale2 or 1.0)
+        high = low
+        if groups["num2"]:
+            high = _to_float(groups["num2"]) * (scale2 or scale1 or 1.0)
+            low, high = min(low, high), max(low, high)
+        year = _YEAR.search(text)
+        return {
+            "value": (low + high) / 2,
+            "low": low,
+            "high": high,
+            "scale": scale1 or scale2,
+            "currency": currency or default_currency,
+            "year": int(year.group(1)) if year else None,
+        }
+    return None
+
+
+def split_unit(value: float, scale: Optional[float] = None) -> tuple:
+    """(amount, unit word) for a whole-unit value, e.g. (3.2, "billion") for 3.2e9.
+
+    A ``scale`` matching one of UNIT_WORDS keeps the quoted unit, so
+    "$3,900 million" stays (3900.0, "million").
+    """
+    for word, multiplier in UNIT_WORDS:
+        if scale == multiplier:
+            return round(value / multiplier, 6), word
+    for word, multiplier in UNIT_WORDS:
+        if abs(value) >= multiplier:
+            return round(value / multiplier, 6), word
+    return value, ""
+
+
+def unit_multiplier(unit: Optional[str]) -> float:
+    """Multiplier for a unit such as "billion", "USD bn" or "M"; 1 when unknown or empty"""
+    if not isinstance(unit, str):
+        return 1.0
+    if unit not in _UNIT_MULTIPLIERS:
+        match = _UNIT.search(unit)
+        _UNIT_MULTIPLIERS[unit] = _scale(match.group()) or 1.0 if match else 1.0
+    return _UNIT_MULTIPLIERS[unit]
+
+
+# ===== VECTORIZED CONVERSION =====
+def _cpi_at(years: np.ndarray) -> np.ndarray:
+    """CPI for each year, extrapolated at CPI_EXTRAPOLATION_RATE outside the table; NaN years give NaN"""
+    index = np.clip(np.nan_to_num(years - TABLE_FIRST_YEAR), 0, len(_CPI) - 1).astype(int)
+    offset = years - np.clip(years, TABLE_FIRST_YEAR, TABLE_LAST_YEAR)
+    return _CPI[index] * (1 + CPI_EXTRAPOLATION_RATE) ** offset
+
+
+def inflation_factor(from_years: Any, to_years: Any) -> np.ndarray:
+    """Multipliers restating dollars of from_years in dollars of to_years (element-wise)"""
+    return _cpi_at(np.asarray(to_years, dtype=float)) / _cpi_at(np.asarray(from_years, dtype=float))
+
+
+def normalize_batch(values: Sequence[float], currencies: Sequence[str], years: Sequence[Optional[int]],
+                    lows: Optional[Sequence[float]] = None, highs: Optional[Sequence[float]] = None,
+                    price_year: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """USD arrays "value_usd", "low_usd", "high_usd" and "base_year" for whole batches.
+
+    Each figure is converted at its own year's exchange rate (years outside the
+    table use the nearest year, missing years the latest). With price_year the
+    results are also restated in that year's dollars using US CPI. Unknown
+    currencies give NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    lows = values if lows is None else np.asarray(lows, dtype=float)
+    highs = values if highs is None else np.asarray(highs, dtype=float)
+    base_years = np.array([TABLE_LAST_YEAR if year is None else year for year in years], dtype=float)
+    base_years = np.nan_to_num(base_years, nan=TABLE_LAST_YEAR)
+    currency_index = np.array([CURRENCIES.index(code) if code in CURRENCY_PER_USD else -1 for code in currencies], dtype=int)
+    year_index = np.clip(base_years - TABLE_FIRST_YEAR, 0, len(_CPI) - 1).astype(int)
+
+    rates = _FX[currency_index, year_index]
+    rates = np.where(currency_index < 0, np.nan, rates)
+    factor = 1.0 / rates
+    if price_year is not None:
+        factor = factor * inflation_factor(base_years, price_year)
+    return {
+        "value_usd": values * factor,
+        "low_usd": lows * factor,
+        "high_usd": highs * factor,
+        "base_year": base_years.astype(int),
+    }
+
+
+def _canonical(batch: Dict[str, np.ndarray], i: int, currency: str, price_year: Optional[int]) -> Optional[Dict[str, Any]]:
+    value = batch["value_usd"][i]
+    if not np.isfinite(value):
+        return None
+    base_year = int(batch["base_year"][i])
+    return {
+        "value_usd": float(value),
+        "low_usd": float(batch["low_usd"][i]),
+        "high_usd": float(batch["high_usd"][i]),
+        "base_year": base_year,
+        "currency": currency,
+        "price_year": price_year or base_year,
+    }
+
+
+def normalize_market_size(text: Any, year: Optional[int] = None, currency: Optional[str] = None,
+                          price_year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Canonical {"value_usd", "low_usd", "high_usd", "base_year", "currency", "price_year"} for one figure.
+
+    A year or currency stated in text wins over the ``year`` and ``currency``
+    fallbacks. None when text holds no amount.
+    """
+    parsed = parse_market_size(text, default_currency=currency_code(currency) or "USD")
+    if not parsed:
+        return None
+    base_year = parsed["year"] or year
+    batch = normalize_batch([parsed["value"]], [parsed["currency"]], [base_year],
+                            [parsed["low"]], [parsed["high"]], price_year)
+    return _canonical(batch, 0, parsed["currency"], price_year)
+
+
+def _source_figure(source: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Parsed size of a market_data source, whether it holds a number plus unit or a string"""
+    size = source.get("market_size")
+    currency = currency_code(source.get("currency")) or "USD"
+    if isinstance(size, str):
+        size = f"{size} {source.get('market_size_unit') or ''}" if not re.search(r"[a-z]", size, re.I) else size
+        parsed = parse_market_size(size, default_currency=currency)
+    elif isinstance(size, (int, float)) and not isinstance(size, bool):
+        multiplier = unit_multiplier(source.get("market_size_unit"))
+        parsed = parse_market_size(float(size) * multiplier, default_currency=currency)
+        low, high = source.get("market_size_low"), source.get("market_size_high")
+        if isinstance(low, (int, float)) and isinstance(high, (int, float)):
+            parsed["low"], parsed["high"] = low * multiplier, high * multiplier
+    else:
+        return None
+    if parsed and not parsed["year"]:
+        base_year = source.get("base_year")
+        if not isinstance(base_year, int):
+            found = _YEAR.search(str(source.get("publication_date") or ""))
+            base_year = int(found.group(1)) if found else None
+        parsed["year"] = base_year
+    return parsed
+
+
+def normalize_sources_batch(sources: Sequence[Any], price_year: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """normalize_batch arrays aligned with sources, NaN where a source has no usable size"""
+    figures = [_source_figure(source) if isinstance(source, dict) else None for source in sources]
+    missing = np.array([figure is None for figure in figures], dtype=bool)
+    empty = {"value": np.nan, "low": np.nan, "high": np.nan, "currency": "USD", "year": None}
+    figures = [figure or empty for figure in figures]
+    batch = normalize_batch(
+        [figure["value"] for figure in figures],
+        [figure["currency"] for figure in figures],
+        [figure["year"] for figure in figures],
+        [figure["low"] for figure in figures],
+        [figure["high"] for figure in figures],
+        price_year,
+    )
+    batch["currency"] = [None if gone else figure["currency"] for figure, gone in zip(figures, missing)]
+    batch["base_year"] = np.where(missing, np.nan, batch["base_year"])
+    return batch
+
+
+def normalize_sources(sources: Sequence[Any], price_year: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+    """Canonical size for every source in one vectorized pass; None where a source has no usable size"""
+    batch = normalize_sources_batch(sources, price_year)
+    return [_canonical(batch, i, currency, price_year) if currency else None
+            for i, currency in enumerate(batch["currency"])]
@@ -0,0 +1,219 @@
+# market_reconciliation.py - Consensus market size and outlier flags across a result's sources
+#
+# When one source says $1B and another $36B, averaging them is wrong. Market
+# size estimates are right-skewed, so everything here works on log10 values:
+# a source is an outlier when it falls outside the IQR fences (four or more
+# sources) or has a modified z-score (median/MAD) above the threshold (three or
+# more), and is also at least MIN_OUTLIER_RATIO away from the median. The
+# consensus is the geometric mean of the remaining sources, reported with their
+# median, range and log-scale dispersion.
+#
+# reconcile_batch works on a NaN-padded matrix with one row per result, so a
+# whole cache of results is reconciled in a handful of NumPy calls rather than
+# one Python loop per result. reconcile_results wraps it for market sizing
+# result dicts: sizes come from market_normalization, restated in dollars of
+# each result's most recent source year so that sources from different years
+# compare like-for-like.
+
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from market_normalization import normalize_sources_batch, inflation_factor
+
+# Tukey fence multiplier applied to the IQR of log10 sizes
+IQR_FENCE = 1.5
+# Modified z-score (0.6745 * deviation / MAD) above which a source is an outlier
+MODIFIED_Z_THRESHOLD = 3.5
+# Sources within this factor of the median are never outliers, whatever the spread
+MIN_OUTLIER_RATIO = 3.0
+# Floor for the MAD of log10 sizes, so near-identical sources do not make a
+# modest difference look infinitely unusual
+MIN_LOG_MAD = 0.05
+# log10 standard deviation below which sources agree strongly / moderately
+STRONG_AGREEMENT_LOG_STD = 0.1
+MODERATE_AGREEMENT_LOG_STD = 0.3
+
+
+def _padded(value_groups: Sequence[Sequence[float]]) -> np.ndarray:
+    """Groups as rows of a float matrix, NaN where a group is shorter or a value is unusable"""
+    width = max((len(group) for group in value_groups), default=0)
+    matrix = np.full((len(value_groups), max(width, 1)), np.nan)
+    for row, group in enumerate(value_groups):
+        if len(group):
+            matrix[row, :len(group)] = np.asarray(group, dtype=float)
+    matrix[~(matrix > 0)] = np.nan  # log scale needs positive sizes; NaN stays NaN
+    return matrix
+
+
+def _row_quantiles(matrix: np.ndarray, quantiles: Sequence[float]) -> List[np.ndarray]:
+    """Linear-interpolated quantiles of each row, ignoring NaN, as (rows, 1) columns.
+
+    np.nanpercentile falls back to a Python loop per row; sorting once
+    (NaN sorts last) and indexing by each row's count keeps it vectorized.
+    """
+    ordered = np.sort(matrix, axis=1)
+    count = (~np.isnan(ordered)).sum(axis=1, keepdims=True)
+    last = np.maximum(count - 1, 0)
+    columns = []
+    for q in quantiles:
+        position = q * last
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        low_value = np.take_along_axis(ordered, lower, axis=1)
+        high_value = np.take_along_axis(ordered, upper, axis=1)
+        value = low_value + (high_value - low_value) * (position - lower)
+        columns.append(np.where(count > 0, value, np.nan))
+    return columns
+
+
+def reconcile_batch(value_groups: Sequence[Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Vectorized reconciliation of many groups of market sizes (one group per result).
+
+    Returns per-group arrays "consensus", "median", "low", "high", "log_std",
+    "spread_ratio", "cv" (coefficient of variation of the kept sizes), "count"
+    (usable sizes) and "used" (sizes kept), plus "outliers", a boolean matrix
+    aligned with the input groups. Groups without usable sizes get NaN.
+    """
+    values = _padded(value_groups)
+    logs = np.log10(values)
+    present = ~np.isnan(logs)
+    count = present.sum(axis=1)
+
+    with warnings.catch_warnings():
+        # All-NaN rows (results without sizes) are expected and come out as NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        q1, median, q3 = _row_quantiles(logs, (0.25, 0.5, 0.75))
+        deviation = np.abs(logs - median)
+        mad = np.maximum(_row_quantiles(deviation, (0.5,))[0], MIN_LOG_MAD)
+
+        iqr = q3 - q1
+        outside_fences = ((logs < q1 - IQR_FENCE * iqr) | (logs > q3 + IQR_FENCE * iqr)) & (count[:, None] >= 4)
+        high_z = (0.6745 * deviation / mad > MODIFIED_Z_THRESHOLD) & (count[:, None] >= 3)
+        far = deviation > np.log10(MIN_OUTLIER_RATIO)
+        outliers = (outside_fences | high_z) & far & present
+
+        kept_logs = np.where(outliers, np.nan, logs)
+        kept = np.where(np.isnan(kept_logs), np.nan, values)
+        mean = np.nanmean(kept, axis=1)
+        low = np.nanmin(kept, axis=1)
+        high = np.nanmax(kept, axis=1)
+        return {
+            "consensus": 10 ** np.nanmean(kept_logs, axis=1),
+            "median": _row_quantiles(kept, (0.5,))[0][:, 0],
+            "low": low,
+            "high": high,
+            "log_std": np.nanstd(kept_logs, axis=1),
+            "spread_ratio": high / low,
+            "cv": np.nanstd(kept, axis=1) / mean,
+            "count": count,
+            "used": count - outliers.sum(axis=1),
+            "outliers": outliers,
+        }
+
+
+def _agreement(used: int, log_std: float) -> str:
+    if used == 0:
+        return "no_data"
+    if used == 1:
+        return "single_source"
+    if log_std < STRONG_AGREEMENT_LOG_STD:
+        return "strong"
+    if log_std < MODERATE_AGREEMENT_LOG_STD:
+        return "moderate"
+    return "weak"
+
+
+def _summary(batch: Dict[str, np.ndarray], row: int) -> Dict[str, Any]:
+    """JSON-friendly reconciliation of one batch row"""
+    used = int(batch["used"][row])
+
+    def number(name, digits):
+        value = float(batch[name][row])
+        return round(value, digits) if np.isfinite(value) else None
+
+    return {
+        "consensus_usd": number("consensus", 0),
+        "median_usd": number("median", 0),
+        "range_usd": [number("low", 0), number("high", 0)],
+        "sources_used": used,
+        "dispersion": {
+            "log10_std": number("log_std", 4),
+            "spread_ratio": number("spread_ratio", 3),
+            "coefficient_of_variation": number("cv", 4),
+        },
+        "agreement": _agreement(used, float(batch["log_std"][row])),
+    }
+
+
+def reconcile_sizes(values: Sequence[float]) -> Dict[str, Any]:
+    """Consensus, dispersion and outlier indexes for one list of sizes in a common unit"""
+    batch = reconcile_batch([list(values)])
+    summary = _summary(batch, 0)
+    summary["outliers"] = [int(i) for i in np.flatnonzero(batch["outliers"][0])]
+    return summary
+
+
+def reconcile_results(results: Sequence[Dict[str, Any]], price_year: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+    """Reconcile the market_data sources of many market sizing results at once.
+
+    Each result gains market_data["reconciliation"] and every source an
+    "outlier" flag; the reconciliations are also returned (None for results
+    without market_data). Sizes are in dollars of ``price_year``, or by default
+    of the latest base year among each result's sources.
+    """
+    groups = []
+    for result in results:
+        market_data = result.get("market_data") if isinstance(result, dict) else None
+        sources = market_data.get("sources") if isinstance(market_data, dict) else None
+        groups.append(sources if isinstance(sources, list) else None)
+
+    # One normalization pass over every source of every result
+    flat = [source for sources in groups if sources for source in sources]
+    normalized = normalize_sources_batch(flat)
+    values = normalized["value_usd"]
+    years = normalized["base_year"]
+
+    # Restate each result's sizes in dollars of its target year: price_year,
+    # or the latest base year among its sources
+    lengths = np.array([len(sources or []) for sources in groups], dtype=int)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(int)
+    targets = np.full(len(groups), np.nan if price_year is None else float(price_year))
+    nonempty = lengths > 0
+    if price_year is None and nonempty.any():
+        targets[nonempty] = np.fmax.reduceat(years, starts[nonempty])
+    # Sources without a usable size are NaN already and stay NaN
+    values = values * inflation_factor(years, np.repeat(targets, lengths))
+    value_groups = [values[start:start + length] for start, length in zip(starts, lengths)]
+    target_years = [int(target) if np.isfinite(target) else None for target in targets]
+
+    batch = reconcile_batch(value_groups)
+    reconciliations: List[Optional[Dict[str, Any]]] = []
+    for row, sources in enumerate(groups):
+        if sources is None:
+            reconciliations.append(None)
+            continue
+        summary = _summary(batch, row)
+        summary["price_year"] = target_years[row]
+        summary["outliers"] = []
+        for index, source in enumerate(sources):
+            is_outlier = bool(batch["outliers"][row, index]) if index < batch["outliers"].shape[1] else False
+            if isinstance(source, dict):
+                source["outlier"] = is_outlier
+            if is_outlier:
+                value = float(value_groups[row][index])
+                summary["outliers"].append({
+                    "index": index,
+                    "publisher": source.get("publisher", "") if isinstance(source, dict) else "",
+                    "value_usd": round(value),
+                    "ratio_to_consensus": round(value / summary["consensus_usd"], 3) if summary["consensus_usd"] else None,
+                })
+        results[row]["market_data"]["reconciliation"] = summary
+        reconciliations.append(summary)
+    return reconciliations
+
+
+def reconcile_result(result: Dict[str, Any], price_year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """reconcile_results for a single result"""
+    return reconcile_results([result], price_year)[0]
@@ -0,0 +1,120 @@
+# market_sensitivity.py - Tornado sensitivities and threshold answers for a TAM/SAM/SOM model
+#
+# SOM is TAM times six multipliers (market_simulation), so it moves in
+# proportion to each one. The tornado varies each assumption by ±variation
+# with the others at their base values; every variant, plus the conservative
+# and optimistic scenarios (all assumptions down or up together), is a row of
+# one factor matrix evaluated with a single product, cheap enough to re-run
+# on every slider move without touching the research.
+#
+# Thresholds work backwards from a target SOM: the overall penetration of SAM
+# it needs, and the value each assumption would need on its own.
+
+import math
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from market_simulation import DEFAULT_MULTIPLIERS, SAM_MULTIPLIERS, MultiplierSpec, multiplier_bounds
+
+# Default swing applied to each assumption
+SENSITIVITY_VARIATION = 0.2
+# Default SOM targets for the threshold analysis ("a $100M business")
+THRESHOLD_TARGETS_USD = (100_000_000,)
+ASSUMPTIONS = ("tam",) + tuple(DEFAULT_MULTIPLIERS)
+
+
+def _base_values(tam_usd: float, multipliers: Optional[Dict[str, MultiplierSpec]]) -> np.ndarray:
+    """Assumption values in ASSUMPTIONS order; a multiplier range contributes its mode"""
+    if not tam_usd or not math.isfinite(tam_usd) or tam_usd <= 0:
+        raise ValueError("tam_usd must be a positive, finite market size")
+    unknown = set(multipliers or {}) - set(DEFAULT_MULTIPLIERS)
+    if unknown:
+        raise ValueError(f"Unknown multipliers: {', '.join(sorted(unknown))}")
+    values = [float(tam_usd)]
+    for name, default in DEFAULT_MULTIPLIERS.items():
+        spec = (multipliers or {}).get(name, default)
+        if not all(math.isfinite(v) for v in ([spec] if isinstance(spec, (int, float)) else spec)):
+            raise ValueError(f"Multiplier {name} must be finite: {spec!r}")
+        values.append(multiplier_bounds(spec)[1])
+    return np.array(values)
+
+
+def _funnel(factors: np.ndarray) -> tuple:
+    """TAM, SAM and SOM of each row of an (rows, ASSUMPTIONS) factor matrix"""
+    sam_end = 1 + len(SAM_MULTIPLIERS)
+    sam = factors[:, :sam_end].prod(axis=1)
+    return factors[:, 0], sam, sam * factors[:, sam_end:].prod(axis=1)
+
+
+def sensitivity_analysis(tam_usd: float, multipliers: Optional[Dict[str, MultiplierSpec]] = None,
+                         variation: float = SENSITIVITY_VARIATION,
+                         targets_usd: Sequence[float] = THRESHOLD_TARGETS_USD) -> Dict[str, Any]:
+    """Ranked tornado sensitivities, scenarios and thresholds for one market model.
+
+    ``multipliers`` override DEFAULT_MULTIPLIERS by name. Multipliers are
+    fractions, so a varied value is capped at 1.
+    """
+    if not 0 < variation < 1:
+        raise ValueError("variation must be between 0 and 1")
+    if any(not target or not math.isfinite(target) or target <= 0 for target in targets_usd):
+        raise ValueError("targets_usd must be positive, finite amounts")
+    base = _base_values(tam_usd, multipliers)
+    if not base.all():
+        raise ValueError("Multipliers must be above zero for a non-zero SOM")
+    count = len(ASSUMPTIONS)
+
+    # Rows: base, each assumption down, each assumption up, all down, all up
+    scale = np.ones((3 + 2 * count, count))
+    scale[1:1 + count] -= variation * np.eye(count)
+    scale[1 + count:1 + 2 * count] += variation * np.eye(count)
+    scale[-2] -= variation
+    scale[-1] += variation
+    factors = base * scale
+    factors[:, 1:] = np.minimum(factors[:, 1:], 1.0)
+    tam, sam, som = _funnel(factors)
+
+    base_som = som[0]
+    down, up = som[1:1 + count], som[1 + count:1 + 2 * count]
+    swing = np.abs(up - down)
+    tornado = []
+    for index in np.argsort(-swing, kind="stable"):
+        tornado.append({
+            "assumption": ASSUMPTIONS[index],
+            "base": round(float(base[index]), 6),
+            "low_value": round(float(factors[1 + index, index]), 6),
+            "high_value": round(float(factors[1 + count + index, index]), 6),
+            "som_low": round(float(down[index])),
+            "som_high": round(float(up[index])),
+            "swing": round(float(swing[index])),
+            "swing_pct": round(float(swing[index] / base_som * 100), 2),
+        })
+
+    def scenario(row):
+        return {"tam": round(float(tam[row])), "sam": round(float(sam[row])), "som": round(float(som[row]))}
+
+    # SOM is proportional to each assumption, so the value needed for a target
+    # is the base value scaled by target / SOM
+    targets = np.asarray(targets_usd, dtype=float)
+    needed = base[:, None] * (targets / base_som)[None, :]
+    thresholds = []
+    for column, target in enumerate(targets):
+        # The tam entry is a market size; every other entry is a fraction
+        required = {"tam": {"value": round(float(needed[0, column]))}}
+        for index, name in enumerate(ASSUMPTIONS[1:], start=1):
+            value = float(needed[index, column])
+            required[name] = {"value": round(value, 6), "achievable": value <= 1.0}
+        thresholds.append({
+            "target_usd": round(float(target)),
+            "current_penetration": round(float(som[0] / sam[0]), 6),
+            "required_penetration": round(float(target / sam[0]), 6),
+            "required": required,
+        })
+
+    return {
+        "variation": variation,
+        "base": scenario(0),
+        "scenarios": {"conservative": scenario(-2), "moderate": scenario(0), "optimistic": scenario(-1)},
+        "tornado": tornado,
+        "thresholds": thresholds,
+    }
@@ -0,0 +1,135 @@
+# market_simulation.py - Monte Carlo TAM/SAM/SOM bands from reconciled sources
+#
+# A point estimate of SOM multiplies a TAM by six uncertain fractions, so its
+# error compounds. Here TAM is drawn from a lognormal centred on the reconciled
+# consensus (market_reconciliation) with the sources' log-scale spread, and each
+# SAM/SOM multiplier from a triangular distribution around its assumed value.
+# Every draw is one row of a NumPy matrix, so 100k draws are a few array
+# operations and one percentile call, and a fixed seed makes the bands
+# reproducible for a cached result.
+#
+# The multipliers and their defaults mirror calculateSamMultipliers and
+# calculateSomMultipliers in server/src/services/marketSizingCalculator.js.
+
+import os
+import math
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from market_reconciliation import reconcile_result
+
+# SAM = TAM * geographic * segments * tech_adoption
+SAM_MULTIPLIERS = {"geographic": 0.4, "segments": 1.0, "tech_adoption": 0.7}
+# SOM = SAM * new_entrant * marketing_reach * conversion
+SOM_MULTIPLIERS = {"new_entrant": 0.03, "marketing_reach": 0.15, "conversion": 0.05}
+DEFAULT_MULTIPLIERS = {**SAM_MULTIPLIERS, **SOM_MULTIPLIERS}
+# A multiplier given as a single value varies by this fraction either side
+MULTIPLIER_SPREAD = 0.3
+# log10 spread of TAM when the sources cannot supply one: a single source, or
+# sources that agree more closely than any estimate deserves
+SINGLE_SOURCE_LOG_STD = 0.2
+MIN_TAM_LOG_STD = 0.1
+# Draws per simulation and the default seed
+SIMULATION_DRAWS = int(os.getenv("MARKET_SIMULATION_DRAWS", "100000"))
+SIMULATION_SEED = int(os.getenv("MARKET_SIMULATION_SEED", "42"))
+PERCENTILES = (10, 50, 90)
+
+MultiplierSpec = Union[float, Sequence[float]]
+
+
+def multiplier_bounds(spec: MultiplierSpec, spread: float = MULTIPLIER_SPREAD) -> tuple:
+    """(low, mode, high) of a multiplier given as a value, [low, high] or [low, mode, high]"""
+    if isinstance(spec, (int, float)):
+        low, mode, high = spec * (1 - spread), spec, spec * (1 + spread)
+    elif len(spec) == 2:
+        low, high = spec
+        mode = (low + high) / 2
+    elif len(spec) == 3:
+        low, mode, high = spec
+    else:
+        raise ValueError(f"Multiplier must be a value, [low, high] or [low, mode, high]: {spec!r}")
+    low, mode, high = (min(max(float(v), 0.0), 1.0) for v in (low, mode, high))
+    if not low <= mode <= high:
+        raise ValueError(f"Multiplier bounds out of order: {spec!r}")
+    return low, mode, high
+
+
+def _bands(samples: np.ndarray) -> List[Dict[str, float]]:
+    """P10/P50/P90 and mean of each row of samples"""
+    percentiles = np.percentile(samples, PERCENTILES, axis=1)
+    means = samples.mean(axis=1)
+    return [
+        {**{f"p{p}": round(float(percentiles[i, row])) for i, p in enumerate(PERCENTILES)},
+         "mean": round(float(means[row]))}
+        for row in range(samples.shape[0])
+    ]
+
+
+def simulate_market(tam_usd: float, tam_log_std: Optional[float] = None,
+                    multipliers: Optional[Dict[str, MultiplierSpec]] = None,
+                    draws: int = SIMULATION_DRAWS, seed: Optional[int] = SIMULATION_SEED) -> Dict[str, Any]:
+    """Monte Carlo TAM/SAM/SOM percentile bands.
+
+    TAM is lognormal with median ``tam_usd`` and log10 standard deviation
+    ``tam_log_std``; ``multipliers`` override DEFAULT_MULTIPLIERS by name.
+    """
+    if not tam_usd or tam_usd <= 0:
+        raise ValueError("tam_usd must be a positive market size")
+    unknown = set(multipliers or {}) - set(DEFAULT_MULTIPLIERS)
+    if unknown:
+        raise ValueError(f"Unknown multipliers: {', '.join(sorted(unknown))}")
+    if tam_log_std is None or not math.isfinite(tam_log_std):
+        tam_log_std = SINGLE_SOURCE_LOG_STD
+    tam_log_std = max(tam_log_std, MIN_TAM_LOG_STD)
+
+    names = list(DEFAULT_MULTIPLIERS)
+    bounds = {name: multiplier_bounds((multipliers or {}).get(name, DEFAULT_MULTIPLIERS[name])) for name in names}
+    low, mode, high = (np.array(column) for column in zip(*(bounds[name] for name in names)))
+
+    rng = np.random.default_rng(seed)
+    tam = rng.lognormal(math.log(tam_usd), tam_log_std * math.log(10), draws)
+    # One (multipliers, draws) matrix, a contiguous row per multiplier;
+    # degenerate ranges are constants, which numpy's triangular does not accept
+    varying = high > low
+    factors = np.repeat(mode[:, None], draws, axis=1)
+    if varying.any():
+        factors[varying] = rng.triangular(low[varying, None], mode[varying, None], high[varying, None],
+                                          (int(varying.sum()), draws))
+    sam_count = len(SAM_MULTIPLIERS)
+    sam = tam * factors[:sam_count].prod(axis=0)
+    som = sam * factors[sam_count:].prod(axis=0)
+
+    tam_band, sam_band, som_band = _bands(np.stack((tam, sam, som)))
+    return {
+        "draws": draws,
+        "seed": seed,
+        "tam": tam_band,
+        "sam": sam_band,
+        "som": som_band,
+        "assumptions": {
+            "tam": {"median_usd": round(tam_usd), "log10_std": round(tam_log_std, 4)},
+            "multipliers": {name: [round(v, 6) for v in bounds[name]] for name in names},
+        },
+    }
+
+
+def simulate_result(result: Dict[str, Any], multipliers: Optional[Dict[str, MultiplierSpec]] = None,
+                    draws: int = SIMULATION_DRAWS, seed: Optional[int] = SIMULATION_SEED) -> Optional[Dict[str, Any]]:
+    """Simulate a market sizing result from its reconciled sources.
+
+    Sets market_data["simulation"] and returns it; None when the result has
+    no usable market size.
+    """
+    market_data = result.get("market_data") if isinstance(result, dict) else None
+    if not isinstance(market_data, dict):
+        return None
+    reconciliation = market_data.get("reconciliation") or reconcile_result(result)
+    if not reconciliation or not reconciliation.get("consensus_usd"):
+        return None
+
+    log_std = reconciliation["dispersion"]["log10_std"] if reconciliation["sources_used"] > 1 else None
+    simulation = simulate_market(reconciliation["consensus_usd"], log_std, multipliers, draws, seed)
+    simulation["price_year"] = reconciliation.get("price_year")
+    market_data["simulation"] = simulation
+    return simulation
@@ -0,0 +1,688 @@
+# research_cache.py - Shared result cache for the research services
+#
+# Market sizing, competition and problem validation all cache finished research
+# the same way: one JSON document per key, valid for a namespace-specific TTL.
+# ResearchCache puts that behind one async-safe API with interchangeable
+# backends (in-memory LRU, one-file-per-entry filesystem, SQLite) and keeps
+# hit/miss counters per namespace. Backend IO runs in a worker thread so a slow
+# disk never stalls the event loop the browser agents share.
+#
+# Keys come from idea_similarity.make_cache_key. When an exact key misses, a
+# lookup that passes the idea text falls back to the MinHash/LSH index of
+# earlier ideas in the same scope, so a reworded submission reuses prior
+# research. Index records live in the backend under ``ideas_<namespace>``.
+# Entries under the earlier key formats cannot be carried over: those names
+# hash (or, for competition, omit) idea text the stored results do not record.
+# Upgrading therefore starts from an empty cache, and CacheManager sweeps the
+# old files once they are past every TTL.
+#
+# Expired entries are not dropped straight away: for a further max-stale window
+# a lookup with ``allow_stale`` still returns them, marked ``stale`` with their
+# age, and the caller schedules a background refresh through ``revalidate``.
+# Popular ideas keep cache-hit latency while their research is renewed.
+#
+# A small in-process hot tier of parsed results sits in front of the backend
+# with write-through, so repeat lookups of popular keys skip the disk read and
+# JSON parse entirely. Reads hand out copies because callers mutate results.
+# Each hot hit is checked against the backend's version of the entry (a stat
+# or a one-row select, no decode), so deletes and rewrites made by another
+# worker or by the maintenance scripts are seen on the next read.
+#
+# Several uvicorn workers can share one cache directory or SQLite file: file
+# entries are written to a temp file and renamed into place under an advisory
+# lock, so readers only ever see complete JSON, and a corrupt entry is treated
+# as a miss and removed rather than failing the request.
+#
+# File and SQLite entries are stored with cache_codec: a versioned header and
+# an optionally compressed JSON body.
+
+import os
+import re
+import json
+import pickle
+import time
+import sqlite3
+import asyncio
+import zlib
+import tempfile
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, Iterator
+from idea_similarity import IdeaIndex, DEFAULT_SIMILARITY_THRESHOLD
+import cache_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes stay atomic, only cross-process locking is skipped
+    fcntl = None
+
+DAY_SECONDS = 86400
+
+# Per-namespace time-to-live, overridable with RESEARCH_CACHE_TTL_<NAMESPACE> (seconds)
+DEFAULT_TTLS = {
+    "market_sizing": 7 * DAY_SECONDS,
+    "competition": 7 * DAY_SECONDS,
+    "problem_validation": 7 * DAY_SECONDS,
+    # Weak results are kept briefly so hard ideas do not rerun the agent on every submission
+    "lowconf_market_sizing": 6 * 3600,
+    "lowconf_competition": 6 * 3600,
+    "lowconf_problem_validation": 6 * 3600,
+    # Industry knowledge base (knowledge_base.py); refreshed by every run in the industry
+    "kb_market_sizing": 180 * DAY_SECONDS,
+    "kb_competition": 180 * DAY_SECONDS,
+}
+DEFAULT_TTL = 7 * DAY_SECONDS
+
+# How long past its TTL an entry may still be served while it is refreshed,
+# overridable with RESEARCH_CACHE_MAX_STALE_<NAMESPACE> (seconds)
+DEFAULT_MAX_STALE = 30 * DAY_SECONDS
+
+# Background refreshes are full agent runs; keep only a few going at once
+DEFAULT_REVALIDATE_CONCURRENCY = int(os.getenv("RESEARCH_CACHE_REVALIDATE_CONCURRENCY", "2"))
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), "research_modules", "cache")
+
+CACHE_BACKENDS = ("filesystem", "memory", "sqlite")
+
+# Writers lock one of a fixed set of stripe files instead of one lock file per key
+LOCK_STRIPES = 64
+# Temp files older than this belong to a writer that died mid-write
+ABANDONED_TEMP_SECONDS = 3600
+
+
+class MemoryBackend:
+    """Process-local LRU; entries are stored serialized so callers never share objects"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            self._entries.move_to_end((namespace, key))
+        payload, stored_at = entry
+        return json.loads(payload), stored_at
+
+    def set(self, namespace: str, key: str, value: Any, stored_at: float):
+        payload = json.dumps(value)
+        with self._lock:
+            self._entries[(namespace, key)] = (payload, stored_at)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def version(self, namespace: str, key: str) -> Optional[Tuple]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+        return None if entry is None else (entry[1], zlib.crc32(entry[0].encode()))
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            return [k for ns, k in self._entries if ns == namespace]
+
+    def entry_info(self, namespace: str) -> List[Tuple[str, int, float]]:
+        """(key, size in bytes, stored_at) for every entry in a namespace"""
+        with self._lock:
+            return [(k, len(payload), stored_at)
+                    for (ns, k), (payload, stored_at) in self._entries.items() if ns == namespace]
+
+
+class HotTier:
+    """Size-bounded LRU of results with copy-on-read.
+
+    Entries are kept as pickle snapshots: unpickling hands every reader a private
+    copy in about half the time of a JSON parse and far faster than deepcopy.
+    Each snapshot carries the backend version it was read or written at.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float, Any]]:
+        """(value, stored_at, backend version) or None"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            self._entries.move_to_end((namespace, key))
+        snapshot, stored_at, version = entry
+        return pickle.loads(snapshot), stored_at, version
+
+    def put(self, namespace: str, key: str, value: Any, stored_at: float, version: Any):
+        snapshot = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[(namespace, key)] = (snapshot, stored_at, version)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, namespace: str, key: str):
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileBackend:
+    """One ``<namespace>_<key>.json`` file per entry; the file mtime is the store time.
+
+    Safe to share between processes: writes are atomic renames under an advisory
+    lock, and unreadable files are discarded.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, compression: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self.compression = compression or cache_codec.default_compression()
+        self.lock_dir = os.path.join(cache_dir, ".locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self, name: str):
+        """Exclusive advisory lock shared by every process using this directory"""
+        if fcntl is None:
+            yield
+            return
+        stripe = zlib.crc32(name.encode()) % LOCK_STRIPES
+        with open(os.path.join(self.lock_dir, f"stripe-{stripe:02d}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, namespace: str, key: str) -> str:
+        safe_key = re.sub(r"[^\w.-]", "_", key)
+        return os.path.join(self.cache_dir, f"{namespace}_{safe_key}.json")
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                # Stat the open file so the time matches the content even if it is replaced meanwhile
+                stored_at = os.fstat(f.fileno()).st_mtime
+                return cache_codec.decode(f.read()), stored_at
+        except FileNotFoundError:
+            return None
+        except (ValueError, UnicodeDecodeError) as e:
+            # Written by an older non-atomic writer or damaged on disk; drop it and miss
+            print(f"Discarding corrupt cache entry {os.path.basename(path)}: {e}")
+            self.delete(namespace, key)
+            return None
+
+    def set(self, namespace: str, key: str, value: Any, stored_at: float):
+        path = self._path(namespace, key)
+        payload = cache_codec.encode(value, self.compression)
+        with self._locked(os.path.basename(path)):
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.utime(temp_path, (stored_at, stored_at))
+                os.replace(temp_path, path)
+            except BaseException:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(temp_path)
+                raise
+
+    def delete(self, namespace: str, key: str):
+        path = self._path(namespace, key)
+        with self._locked(os.path.basename(path)):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def version(self, namespace: str, key: str) -> Optional[Tuple[int, int, int]]:
+        """Identity of the file currently in place; every write renames in a new inode"""
+        try:
+            stat = os.stat(self._path(namespace, key))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def keys(self, namespace: str) -> List[str]:
+        prefix = f"{namespace}_"
+        return [
+            name[len(prefix):-len(".json")]
+            for name in sorted(os.listdir(self.cache_dir))
+            if name.startswith(prefix) and name.endswith(".json")
+        ]
+
+    def entry_info(self, namespace: str) -> List[Tuple[str, int, float]]:
+        info = []
+        for key in self.keys(namespace):
+            try:
+                stat = os.stat(self._path(namespace, key))
+            except FileNotFoundError:
+                continue
+            info.append((key, stat.st_size, stat.st_mtime))
+        return info
+
+    def sweep_orphans(self, namespaces: List[str], older_than: float) -> int:
+        """Delete JSON files no namespace owns (old naming schemes) once they are older than ``older_than`` seconds"""
+        prefixes = tuple(f"{namespace}_" for namespace in namespaces)
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".tmp"):
+                # Leftover from a writer that died before its rename
+                age_limit = ABANDONED_TEMP_SECONDS
+            elif name.endswith(".json") and not name.startswith(prefixes):
+                age_limit = older_than
+            else:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if time.time() - os.path.getmtime(path) >= age_limit:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class SQLiteBackend:
+    """Single SQLite file; suits deployments where many small files are awkward"""
+
+    def __init__(self, db_path: Optional[str] = None, compression: Optional[str] = None):
+        self.db_path = db_path or os.path.join(DEFAULT_CACHE_DIR, "research_cache.sqlite3")
+        self.compression = compression or cache_codec.default_compression()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        # WAL lets worker processes read while another writes; the timeout waits out their locks
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.commit()
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return cache_codec.decode(row[0]), row[1]
+        except ValueError as e:
+            print(f"Discarding corrupt cache entry {namespace}/{key}: {e}")
+            self.delete(namespace, key)
+            return None
+
+    def set(self, namespace: str, key: str, value: Any, stored_at: float):
+        payload = cache_codec.encode(value, self.compression)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, payload, stored_at),
+            )
+            self._conn.commit()
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+            self._conn.commit()
+
+    def version(self, namespace: str, key: str) -> Optional[Tuple[float, int]]:
+        """Store time and payload checksum; re-scoring rewrites values under the same store time"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stored_at, value FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None:
+            return None
+        payload = row[1].encode() if isinstance(row[1], str) else row[1]
+        return row[0], zlib.crc32(payload)
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM cache WHERE namespace = ? ORDER BY key", (namespace,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def entry_info(self, namespace: str) -> List[Tuple[str, int, float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, length(value), stored_at FROM cache WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        return [(row[0], row[1], row[2]) for row in rows]
+
+
+class Revalidator:
+    """Runs background refreshes of stale entries, one per key, with bounded concurrency"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_REVALIDATE_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending = set()
+        self._tasks = set()
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+
+    def schedule(self, name: str, refresh: Callable[[], Awaitable[Any]]) -> bool:
+        """Start refreshing ``name`` unless a refresh for it is already queued or running"""
+        if name in self._pending:
+            return False
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._pending.add(name)
+        self.scheduled += 1
+        task = asyncio.ensure_future(self._run(name, refresh))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, name: str, refresh: Callable[[], Awaitable[Any]]):
+        try:
+            async with self._semaphore:
+                print(f"Revalidating stale cache entry {name}")
+                await refresh()
+                self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Background refresh of {name} failed: {e}")
+        finally:
+            self._pending.discard(name)
+
+    async def wait(self):
+        """Wait for every scheduled refresh; used by batch jobs before their loop closes"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+def create_backend(name: Optional[str] = None):
+    """Build the backend named by ``name`` or RESEARCH_CACHE_BACKEND (default filesystem)"""
+    name = (name or os.getenv("RESEARCH_CACHE_BACKEND", "filesystem")).lower()
+    if name == "filesystem":
+        return FileBackend(os.getenv("RESEARCH_CACHE_DIR", DEFAULT_CACHE_DIR))
+    if name == "memory":
+        return MemoryBackend(int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "1024")))
+    if name == "sqlite":
+        return SQLiteBackend(os.getenv("RESEARCH_CACHE_DB"))
+    raise ValueError(f"RESEARCH_CACHE_BACKEND must be one of {CACHE_BACKENDS}, got '{name}'")
+
+
+class ResearchCache:
+    """Namespaced, TTL-checked cache in front of a pluggable backend"""
+
+    def __init__(self, backend=None, ttls: Optional[Dict[str, float]] = None,
+                 similarity_threshold: Optional[float] = None, hot_entries: Optional[int] = None):
+        self.backend = backend or create_backend()
+        if hot_entries is None:
+            hot_entries = int(os.getenv("RESEARCH_CACHE_HOT_ENTRIES", "256"))
+        # The memory backend is already in-process, so a hot tier would only double the copies
+        self.hot = HotTier(hot_entries) if hot_entries > 0 and not isinstance(self.backend, MemoryBackend) else None
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        if similarity_threshold is None:
+            similarity_threshold = float(os.getenv("RESEARCH_CACHE_SIMILARITY", DEFAULT_SIMILARITY_THRESHOLD))
+        self.similarity_threshold = similarity_threshold
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._indexes: Dict[str, IdeaIndex] = {}
+        self.revalidator = Revalidator()
+        # (namespace, key) -> [last access time, access count], for LRU/LFU eviction
+        self._access: Dict[Tuple[str, str], List[float]] = {}
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+
+    def ttl(self, namespace: str) -> float:
+        override = os.getenv(f"RESEARCH_CACHE_TTL_{namespace.upper()}")
+        if override:
+            return float(override)
+        return self.ttls.get(namespace, DEFAULT_TTL)
+
+    def max_stale(self, namespace: str) -> float:
+        return float(os.getenv(f"RESEARCH_CACHE_MAX_STALE_{namespace.upper()}", DEFAULT_MAX_STALE))
+
+    async def get(self, namespace: str, key: str, idea: Optional[str] = None,
+                  scope: str = "", allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """Return the cached value, or None when missing or older than the namespace TTL.
+
+        With ``idea`` set, a miss falls back to the closest earlier idea in ``scope``;
+        its ``cache_match["key"]`` is the key that entry is stored under.
+        With ``allow_stale``, expired entries inside the max-stale window are returned
+        with ``stale: True`` and ``cache_age_seconds``.
+        """
+        return await asyncio.to_thread(self.get_sync, namespace, key, idea, scope, allow_stale)
+
+    async def set(self, namespace: str, key: str, value: Dict[str, Any],
+                  idea: Optional[str] = None, scope: str = ""):
+        await asyncio.to_thread(self.set_sync, namespace, key, value, idea, scope)
+
+    async def delete(self, namespace: str, key: str):
+        await asyncio.to_thread(self.delete_sync, namespace, key)
+
+    def get_sync(self, namespace: str, key: str, idea: Optional[str] = None,
+                 scope: str = "", allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        value, status = self._read(namespace, key, allow_stale)
+        if value is not None:
+            self._count(namespace, "stale_hits" if status == "stale" else "hits")
+            return value
+
+        if idea:
+            index = self._index(namespace)
+            signature = index.hasher.signature(idea)
+            with self._index_lock:
+                matches = index.query(scope, signature, self.similarity_threshold)
+            for match_key, similarity in matches:
+                if match_key == key:
+                    continue
+                value, match_status = self._read(namespace, match_key, allow_stale)
+                if value is not None:
+                    self._count(namespace, "stale_hits" if match_status == "stale" else "similar_hits")
+                    # The key it was stored under, so a refresh rewrites this entry
+                    value["cache_match"] = {"type": "near_duplicate", "similarity": round(similarity, 3),
+                                            "key": match_key}
+                    return value
+
+        self._count(namespace, status)
+        return None
+
+    def set_sync(self, namespace: str, key: str, value: Dict[str, Any],
+                 idea: Optional[str] = None, scope: str = ""):
+        try:
+            now = time.time()
+            self.backend.set(namespace, key, value, now)
+            if self.hot is not None:
+                self.hot.put(namespace, key, value, now, self.backend.version(namespace, key))
+            self._count(namespace, "writes")
+            if idea:
+                index = self._index(namespace)
+                signature = index.hasher.signature(idea)
+                self.backend.set(f"ideas_{namespace}", key, {"scope": scope, "signature": signature}, now)
+                with self._index_lock:
+                    index.add(key, scope, signature)
+        except Exception as e:
+            print(f"Cache write failed for {namespace}/{key}: {e}")
+
+    def delete_sync(self, namespace: str, key: str):
+        with self._lock:
+            self._access.pop((namespace, key), None)
+        if self.hot is not None:
+            self.hot.discard(namespace, key)
+        self.backend.delete(namespace, key)
+        self.backend.delete(f"ideas_{namespace}", key)
+        with self._index_lock:
+            if namespace in self._indexes:
+                self._indexes[namespace].remove(key)
+
+    def _read(self, namespace: str, key: str,
+              allow_stale: bool = False) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Fetch one entry, returning (value, "hits" | "stale" | "misses" | "expired")"""
+        entry = None
+        try:
+            if self.hot is not None:
+                entry = self._read_hot(namespace, key)
+            if entry is None:
+                # Versioned before the read, so a write in between makes the next read re-check
+                version = self.backend.version(namespace, key) if self.hot is not None else None
+                entry = self.backend.get(namespace, key)
+                if entry is not None and self.hot is not None:
+                    self.hot.put(namespace, key, entry[0], entry[1], version)
+        except Exception as e:
+            # A broken cache must never fail a research request
+            print(f"Cache read failed for {namespace}/{key}: {e}")
+            entry = None
+
+        if entry is None:
+            return None, "misses"
+
+        self._touch(namespace, key)
+        value, stored_at = entry
+        age = time.time() - stored_at
+        ttl = self.ttl(namespace)
+        if age < ttl:
+            return value, "hits"
+        if allow_stale and age < ttl + self.max_stale(namespace) and isinstance(value, dict):
+            value["stale"] = True
+            value["cache_age_seconds"] = int(age)
+            return value, "stale"
+        return None, "expired"
+
+    def _read_hot(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        """Hot-tier entry, unless another process has since deleted or rewritten it"""
+        cached = self.hot.get(namespace, key)
+        if cached is None:
+            return None
+        value, stored_at, version = cached
+        if version is None or self.backend.version(namespace, key) != version:
+            self.hot.discard(namespace, key)
+            return None
+        return value, stored_at
+
+    def expiry_horizon(self, namespace: str) -> float:
+        """Age after which an entry can never be served again and may be deleted"""
+        if namespace.startswith("lowconf_"):
+            return self.ttl(namespace)
+        return self.ttl(namespace) + self.max_stale(namespace)
+
+    def _touch(self, namespace: str, key: str):
+        with self._lock:
+            access = self._access.setdefault((namespace, key), [0.0, 0])
+            access[0] = time.time()
+            access[1] += 1
+
+    def access_info(self, namespace: str, key: str) -> Tuple[float, int]:
+        """(last access time, access count) seen by this process; (0, 0) if never read"""
+        with self._lock:
+            access = self._access.get((namespace, key))
+        return (access[0], int(access[1])) if access else (0.0, 0)
+
+    def revalidate(self, namespace: str, key: str, refresh: Callable[[], Awaitable[Any]]) -> bool:
+        """Schedule a background refresh for a stale entry; must be called from the event loop"""
+        return self.revalidator.schedule(f"{namespace}/{key}", refresh)
+
+    def _index(self, namespace: str) -> IdeaIndex:
+        """Similarity index for a namespace, loaded from the backend on first use"""
+        with self._index_lock:
+            index = self._indexes.get(namespace)
+            if index is not None:
+                return index
+            index = IdeaIndex()
+            index_namespace = f"ideas_{namespace}"
+            for key in self.backend.keys(index_namespace):
+                # Index records outlive the TTL so stale entries stay reachable
+                entry = self.backend.get(index_namespace, key)
+                record = entry[0] if entry else None
+                if record and record.get("signature"):
+                    index.add(key, record.get("scope", ""), record["signature"])
+            self._indexes[namespace] = index
+            return index
+
+    def keys(self, namespace: str) -> List[str]:
+        return self.backend.keys(namespace)
+
+    def items(self, namespace: str) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        """(key, value, stored_at) for every entry in a namespace, expired ones included"""
+        for key in self.backend.keys(namespace):
+            try:
+                entry = self.backend.get(namespace, key)
+            except Exception as e:
+                print(f"Cache read failed for {namespace}/{key}: {e}")
+                continue
+            if entry is not None:
+                yield key, entry[0], entry[1]
+
+    def replace_sync(self, namespace: str, key: str, value: Dict[str, Any], stored_at: float):
+        """Rewrite an entry's value but keep its store time, so batch re-scoring leaves TTLs alone"""
+        self.backend.set(namespace, key, value, stored_at)
+        if self.hot is not None:
+            self.hot.discard(namespace, key)
+
+    def move_sync(self, source: str, target: str, key: str, value: Dict[str, Any], stored_at: float):
+        """Move an entry to another namespace (e.g. between confidence tiers), keeping its
+        store time and similarity record; a newer entry already in the target wins"""
+        existing = self.backend.get(target, key)
+        record = self.backend.get(f"ideas_{source}", key)
+        self.delete_sync(source, key)
+        if existing is not None and existing[1] >= stored_at:
+            return
+        self.replace_sync(target, key, value, stored_at)
+        if record is not None and record[0].get("signature"):
+            self.backend.set(f"ideas_{target}", key, record[0], record[1])
+            with self._index_lock:
+                if target in self._indexes:
+                    self._indexes[target].add(key, record[0].get("scope", ""), record[0]["signature"])
+
+    def _count(self, namespace: str, counter: str):
+        with self._lock:
+            counters = self._counters.setdefault(
+                namespace, {"hits": 0, "similar_hits": 0, "stale_hits": 0, "misses": 0, "expired": 0, "writes": 0}
+            )
+            counters[counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {}
+            for namespace, counters in self._counters.items():
+                served = counters["hits"] + counters["similar_hits"] + counters["stale_hits"]
+                lookups = served + counters["misses"] + counters["expired"]
+                namespaces[namespace] = {
+                    **counters,
+                    "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+                }
+        return {
+            "backend": self.backend.__class__.__name__,
+            "hot_entries": len(self.hot) if self.hot is not None else 0,
+            "namespaces": namespaces,
+            "revalidation": self.revalidator.stats(),
+        }
+
+
+_cache: Optional[ResearchCache] = None
+
+
+def get_research_cache() -> ResearchCache:
+    """Process-wide cache shared by every research service"""
+    global _cache
+    if _cache is None:
+        _cache = ResearchCache()
+    return _cache
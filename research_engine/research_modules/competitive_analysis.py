@@ -3,33 +3,66 @@ import json
 import os
 import time
 import re
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from browser_use import Agent, BrowserSession
-from browser_config_fix import get_enhanced_browser_config, get_enhanced_context_config, get_enhanced_agent_config
+from browser_config_fix import get_enhanced_browser_config, get_enhanced_context_config, get_enhanced_agent_config, warm_up_browser, merge_search_queries
+from llm_scheduler import begin_analysis
+from llm_provider import create_chat_model, get_llm_provider_name, get_agent_llm_options
+from agent_compaction import HistoryCompactor
+from research_cache import get_research_cache
+from idea_similarity import make_cache_key, make_scope
+from json_extract import extract_json
+from confidence_scoring import score_result, MARKET_CACHE_THRESHOLD
+from knowledge_base import get_knowledge_base, format_known_competitors, mark_known_competitors
+from section_parser import SectionSplitter, tokenize_lines, numbered_items, bullet_items, leading_number
 
 # Load environment variables
 load_dotenv()
 
+# Sections of the text-format result, split in a single scan
+RESULT_SECTIONS = SectionSplitter({
+    "competitors": "Competitors",
+    "market_gaps": "Market Gaps",
+    "barriers": r"Barriers(?: to Entry)?",
+    "concentration": "Market Concentration",
+    "trends": "Emerging Trends",
+    "sources": "Sources",
+    "limitations": "Research Limitations",
+    "confidence": "Confidence Score",
+})
+COMPETITOR_NAME = re.compile(r"\*\*([^*]+)\*\*")
+MARKDOWN_LINK = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+BRACKETS = re.compile(r"\[|\]|\([^)]*\)")
+FOUNDED_YEAR = re.compile(r"\d{4}")
+
 class CompetitiveAnalysisService:
     def __init__(self, openai_api_key=None, anthropic_api_key=None):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         
-        # Initialize LLM directly with OpenAI
-        if not self.openai_api_key:
+        # LLM comes from llm_provider so LLM_PROVIDER=fake can swap in the offline stand-in
+        if not self.openai_api_key and get_llm_provider_name() != "fake":
             raise ValueError("CompetitiveAnalysisService: OpenAI API key is required.")
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.1,
-            max_tokens=4000,
+        self.llm = create_chat_model(
             api_key=self.openai_api_key,
+            temperature=0.1,  # Lower temperature for more consistent research
+            max_tokens=4000,
             timeout=120  # Increased timeout for complex research tasks
         )
-        print("CompetitiveAnalysisService: Using OpenAI as primary LLM.")
+        # Shared across services; backend and TTLs come from RESEARCH_CACHE_* settings
+        self.cache = get_research_cache()
+        # Evidence from earlier runs in the same industry, used to pre-seed the agent
+        self.knowledge_base = get_knowledge_base()
+        print(f"CompetitiveAnalysisService: Using {self.llm.__class__.__name__} as primary LLM.")
     
-    async def analyze_competition(self, business_idea, industry, product_type, problem_statement=None):
-        """Analyze competition using browser-use with enhanced error handling and caching"""
+    async def analyze_competition(self, business_idea, industry, product_type, problem_statement=None, force_refresh=False,
+                                  refresh_key=None):
+        """Analyze competition using browser-use with enhanced error handling and caching.
+
+        ``refresh_key`` is set by a background refresh: the result replaces the
+        stale entry stored under that key rather than one for this idea's key.
+        """
         try:
             # Input validation
             if not all([business_idea, industry, product_type]):
@@ -44,17 +77,37 @@ class CompetitiveAnalysisService:
                 }
             
             # Check cache first
-            cache_key = f"{industry}_{product_type}_competition".lower().replace(' ', '_')
-            cached_result = self._check_cache(cache_key)
+            # Key on the idea and problem too; near-identical ideas in the same market can still share results
+            cache_key = refresh_key or make_cache_key(business_idea, industry, product_type, problem_statement)
+            cache_scope = make_scope(industry, product_type)
+            cache_idea = f"{business_idea} {problem_statement or ''}"
+            cached_result = None
+            if not force_refresh:
+                cached_result = await self.cache.get("competition", cache_key, idea=cache_idea,
+                                                     scope=cache_scope, allow_stale=True)
             if cached_result:
                 print(f"Using cached competition data for {industry}")
                 cached_result["research_method"] = "cached"
+                if cached_result.get("stale"):
+                    # Serve the expired result now and refresh the entry that was hit in the background
+                    hit_key = cached_result.get("cache_match", {}).get("key", cache_key)
+                    self.cache.revalidate("competition", hit_key, lambda: self.analyze_competition(
+                        business_idea, industry, product_type, problem_statement, force_refresh=True,
+                        refresh_key=hit_key))
                 return cached_result
             
+            # A recent weak result for this exact idea is reused briefly instead of rerunning the agent
+            if not force_refresh:
+                low_confidence_result = await self.cache.get("lowconf_competition", cache_key)
+                if low_confidence_result:
+                    print(f"Using cached low-confidence competition data for {industry}")
+                    low_confidence_result["research_method"] = "cached_low_confidence"
+                    return low_confidence_result
+            
             print(f"Starting competition analysis for {industry} using {self.llm.__class__.__name__}...")
             
-            # Create task prompt - more detailed and structured (now with problem statement)
-            search_task = self._create_search_task(business_idea, industry, product_type, problem_statement)
+            # Queue this run's LLM calls fairly against other in-flight analyses
+            begin_analysis(f"competition:{cache_key}")
             
             # Get enhanced agent configuration
             agent_config = get_enhanced_agent_config()
@@ -66,18 +119,42 @@ class CompetitiveAnalysisService:
             )
             
             try:
+                if agent_config['speculative_start']:
+                    # Warm up the browser on a fallback query while the LLM generates the real ones
+                    speculative_queries = self._get_fallback_queries(business_idea, industry, product_type)[:1]
+                    llm_queries, _ = await asyncio.gather(
+                        self._generate_search_queries(business_idea, industry, product_type, problem_statement),
+                        warm_up_browser(browser_session, speculative_queries[0])
+                    )
+                    search_queries = merge_search_queries(llm_queries, speculative_queries)
+                else:
+                    # Generate specific search queries using LLM
+                    search_queries = await self._generate_search_queries(business_idea, industry, product_type, problem_statement)
+                
+                # Create task prompt - more detailed and structured (now with problem statement)
+                # Seed the task with what earlier runs in this industry already found
+                known = await self.knowledge_base.lookup(industry, product_type, business_idea)
+                known_evidence = format_known_competitors(known["competitors"])
+                if known_evidence:
+                    print(f"Pre-seeding research with {len(known['competitors'])} known competitors for {industry}")
+                search_task = self._create_search_task(business_idea, industry, product_type, search_queries, known_evidence)
+                
                 # Create agent with configured browser session (as per new API)
                 agent = Agent(
                     task=search_task,
                     llm=self.llm,
                     browser_session=browser_session,
                     use_vision=agent_config['use_vision'],
+                    **get_agent_llm_options(self.llm),
                     save_conversation_path="logs/competition_research"
                 )
                 
                 # Run agent
                 print(f"Executing competitive research agent with max {agent_config['max_steps']} steps...")
-                history = await agent.run(max_steps=agent_config['max_steps'])
+                history = await agent.run(
+                    max_steps=agent_config['max_steps'],
+                    on_step_start=HistoryCompactor(agent_config['history_compaction'])
+                )
                 
                 # Get final result from history
                 final_result = history.final_result()
@@ -92,12 +169,19 @@ class CompetitiveAnalysisService:
             result = self._process_result(final_result, industry)
             
             # Add quality validation
-            result = self._validate_and_enhance_result(result, business_idea, industry)
+            result = self._validate_and_enhance_result(result, business_idea, industry, known["competitors"])
             
             # Cache the result for future use (only if quality is sufficient)
-            if result.get("confidence_score", 0) >= 5:
-                self._save_to_cache(cache_key, result)
+            if result.get("confidence_score", 0) >= MARKET_CACHE_THRESHOLD:
+                await self.cache.set("competition", cache_key, result, idea=cache_idea, scope=cache_scope)
+                await self.knowledge_base.record_competition(industry, product_type, business_idea, result)
                 print(f"Cached high-quality result for {cache_key}")
+            else:
+                await self.cache.set("lowconf_competition", cache_key, result)
+                if refresh_key:
+                    # The weak refresh must not leave the stale entry to be served and refreshed again
+                    await self.cache.delete("competition", cache_key)
+                print(f"Cached low-confidence result for {cache_key} (short TTL)")
             
             # Add research method and metadata
             result["research_method"] = "web_research"
@@ -126,34 +210,9 @@ class CompetitiveAnalysisService:
                 "research_limitations": [f"Analysis failed: {error_msg}"]
             }
     
-    def _check_cache(self, key):
-        """Check if data exists in cache"""
-        cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        cache_file = os.path.join(cache_dir, f"{key}.json")
-        if os.path.exists(cache_file):
-            # Check if cache is less than 7 days old
-            if time.time() - os.path.getmtime(cache_file) < 604800:  # 7 days in seconds
-                with open(cache_file, "r") as f:
-                    return json.load(f)
-        return None
-
-    def _save_to_cache(self, key, data):
-        """Save data to cache"""
-        cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        cache_file = os.path.join(cache_dir, f"{key}.json")
-        with open(cache_file, "w") as f:
-            json.dump(data, f)
-    
-    def _create_search_task(self, business_idea, industry, product_type, problem_statement=None):
+    def _create_search_task(self, business_idea, industry, product_type, search_queries, known_evidence=""):
         """Create the refined search task prompt with specific queries and format"""
         
-        # Generate specific search queries using LLM
-        search_queries = self._generate_search_queries(business_idea, industry, product_type, problem_statement)
-        
         # Format queries for the prompt
         formatted_queries = '\n            '.join([f'- "{query}"' for query in search_queries])
         
@@ -178,6 +237,7 @@ class CompetitiveAnalysisService:
         - Document any access restrictions encountered in your sources notes
         - **STEP LIMIT AWARENESS**: You have limited steps (30), so be efficient and move quickly between sources
 
+        {known_evidence}
         **Research & Data Collection Strategy:**
 
         **Phase 1: Initial Competitor Identification**
@@ -338,147 +398,62 @@ class CompetitiveAnalysisService:
             "research_limitations": []
         }
         
-        # Extract competitors using the actual format: **CompanyName**
-        competitors_section = re.search(r'\*\*Competitors:\*\*(.*?)(?:\*\*Market Gaps:\*\*|\*\*Barriers|\*\*Market Concentration|\*\*Emerging Trends|\*\*Sources|\*\*Research Limitations|\*\*Confidence Score|$)', text, re.DOTALL)
+        # One pass tokenizes the text and groups its lines under the **Section:** headers
+        sections = RESULT_SECTIONS.split(tokenize_lines(text))
         
-        if competitors_section:
-            competitors_text = competitors_section.group(1).strip()
-            
-            # Split by numbered competitors (1. **CompanyName**, 2. **CompanyName**, etc.)
-            competitor_blocks = re.split(r'\d+\.\s*\*\*([^*]+)\*\*', competitors_text)[1:]  # Skip first empty element
-            
-            # Process competitors in pairs (name, details)
-            for i in range(0, len(competitor_blocks), 2):
-                if i + 1 < len(competitor_blocks):
-                    name = competitor_blocks[i].strip()
-                    details_block = competitor_blocks[i + 1].strip()
-                    
-                    competitor = {
-                        "name": name,
-                        "website": "",
-                        "products": [],
-                        "target_audience": "",
-                        "pricing_model": "",
-                        "unique_selling_points": [],
-                        "market_position": "",
-                        "founded": None,
-                        "funding": ""
-                    }
-                    
-                    # Extract details using the actual format
-                    website_match = re.search(r'- \*\*Website:\*\*\s*(?:\[([^\]]+)\]\([^)]+\)|([^\n]+))', details_block)
-                    products_match = re.search(r'- \*\*Products:\*\*\s*([^\n]+)', details_block)
-                    audience_match = re.search(r'- \*\*Target Audience:\*\*\s*([^\n]+)', details_block)
-                    pricing_match = re.search(r'- \*\*Pricing Model:\*\*\s*([^\n]+)', details_block)
-                    usps_match = re.search(r'- \*\*Unique Selling Points:\*\*\s*([^\n]+)', details_block)
-                    position_match = re.search(r'- \*\*Market Position:\*\*\s*([^\n]+)', details_block)
-                    founded_match = re.search(r'- \*\*Founded Year:\*\*\s*(\d{4}|Not Found)', details_block)
-                    funding_match = re.search(r'- \*\*Funding:\*\*\s*([^\n]+)', details_block)
-                    
-                    if website_match:
-                        competitor["website"] = website_match.group(1) or website_match.group(2) or ""
-                    
-                    if products_match:
-                        products_text = products_match.group(1).strip()
-                        if "," in products_text:
-                            competitor["products"] = [p.strip() for p in products_text.split(",")]
-                        else:
-                            competitor["products"] = [products_text]
-                    
-                    if audience_match:
-                        competitor["target_audience"] = audience_match.group(1).strip()
-                    
-                    if pricing_match:
-                        competitor["pricing_model"] = pricing_match.group(1).strip()
-                    
-                    if usps_match:
-                        usps_text = usps_match.group(1).strip()
-                        if "," in usps_text:
-                            competitor["unique_selling_points"] = [usp.strip() for usp in usps_text.split(",")]
-                        else:
-                            competitor["unique_selling_points"] = [usps_text]
-                    
-                    if position_match:
-                        competitor["market_position"] = position_match.group(1).strip()
-                    
-                    if founded_match:
-                        founded_text = founded_match.group(1).strip()
-                        if founded_text.isdigit():
-                            competitor["founded"] = int(founded_text)
-                    
-                    if funding_match:
-                        funding_text = funding_match.group(1).strip()
-                        if funding_text.lower() != "not found":
-                            competitor["funding"] = funding_text
-                    
-                    result["competitors"].append(competitor)
+        # Competitors use the format: 1. **CompanyName** followed by "- **Field:** value" lines
+        competitor = None
+        for line in sections.get("competitors", []):
+            name_match = COMPETITOR_NAME.match(line.text) if line.number is not None else None
+            if name_match:
+                competitor = {
+                    "name": name_match.group(1).strip(),
+                    "website": "",
+                    "products": [],
+                    "target_audience": "",
+                    "pricing_model": "",
+                    "unique_selling_points": [],
+                    "market_position": "",
+                    "founded": None,
+                    "funding": ""
+                }
+                result["competitors"].append(competitor)
+            elif competitor is not None and line.label is not None:
+                self._apply_competitor_field(competitor, line.label.lower(), line.value)
         
-        # Extract market gaps
-        gaps_section = re.search(r'\*\*Market Gaps:\*\*(.*?)(?:\*\*Barriers|\*\*Market Concentration|\*\*Emerging Trends|\*\*Sources|\*\*Research Limitations|\*\*Confidence Score|$)', text, re.DOTALL)
-        if gaps_section:
-            gaps_text = gaps_section.group(1).strip()
-            # Extract numbered items
-            gaps = re.findall(r'\d+\.\s*([^\n]+)', gaps_text)
-            result["market_gaps"] = gaps
+        result["market_gaps"] = numbered_items(sections.get("market_gaps", []))
+        result["barriers_to_entry"] = numbered_items(sections.get("barriers", []))
+        result["emerging_trends"] = numbered_items(sections.get("trends", []))
         
-        # Extract barriers to entry
-        barriers_section = re.search(r'\*\*Barriers to Entry:\*\*(.*?)(?:\*\*Market Concentration|\*\*Emerging Trends|\*\*Sources|\*\*Research Limitations|\*\*Confidence Score|$)', text, re.DOTALL)
-        if barriers_section:
-            barriers_text = barriers_section.group(1).strip()
-            barriers = re.findall(r'\d+\.\s*([^\n]+)', barriers_text)
-            result["barriers_to_entry"] = barriers
+        # Market concentration is a one-line assessment
+        if sections.get("concentration"):
+            result["market_concentration"] = sections["concentration"][0].text
         
-        # Extract market concentration
-        concentration_section = re.search(r'\*\*Market Concentration:\*\*\s*([^\n]+)', text)
-        if concentration_section:
-            result["market_concentration"] = concentration_section.group(1).strip()
+        # Sources use the format: [Number]. [Name](link) - Description
+        for line in sections.get("sources", []):
+            if line.number is None:
+                continue
+            link = MARKDOWN_LINK.match(line.text)
+            if link:
+                name, url = link.group(1), link.group(2)
+            else:
+                name = line.text.split(" - ", 1)[0]
+                url = name if name.startswith(("http://", "https://")) else ""
+            name = BRACKETS.sub("", name).strip()
+            if name:
+                result["sources"].append({
+                    "url": url,
+                    "name": name,
+                    "date": None,
+                    "access_status": "accessible"
+                })
         
-        # Extract emerging trends
-        trends_section = re.search(r'\*\*Emerging Trends:\*\*(.*?)(?:\*\*Sources|\*\*Research Limitations|\*\*Confidence Score|$)', text, re.DOTALL)
-        if trends_section:
-            trends_text = trends_section.group(1).strip()
-            trends = re.findall(r'\d+\.\s*([^\n]+)', trends_text)
-            result["emerging_trends"] = trends
-        
-        # Extract sources
-        sources_section = re.search(r'\*\*Sources:\*\*(.*?)(?:\*\*Research Limitations|\*\*Confidence Score|$)', text, re.DOTALL)
-        if sources_section:
-            sources_text = sources_section.group(1).strip()
-            # Extract sources with format: [Number]. [URL](link) - Description
-            source_matches = re.findall(r'\d+\.\s*(?:\[([^\]]+)\]\([^)]+\)|([^\-\n]+))(?:\s*-\s*([^\n]+))?', sources_text)
-            
-            for match in source_matches:
-                name = match[0] or match[1] or ""
-                description = match[2] or ""
-                
-                # Extract URL if present
-                url_match = re.search(r'\(([^)]+)\)', name) if name else None
-                url = url_match.group(1) if url_match else ""
-                
-                # Clean name
-                name = re.sub(r'\[|\]|\([^)]*\)', '', name).strip()
-                
-                if name:
-                    source = {
-                        "url": url,
-                        "name": name,
-                        "date": None,
-                        "access_status": "accessible"
-                    }
-                    result["sources"].append(source)
-        
-        # Extract research limitations
-        limitations_section = re.search(r'\*\*Research Limitations:\*\*(.*?)(?:\*\*Confidence Score|$)', text, re.DOTALL)
-        if limitations_section:
-            limitations_text = limitations_section.group(1).strip()
-            # Extract bullet points
-            limitations = re.findall(r'[-\*]\s*([^\n]+)', limitations_text)
-            result["research_limitations"] = limitations
+        result["research_limitations"] = bullet_items(sections.get("limitations", []))
         
         # Extract confidence score
-        confidence_match = re.search(r'\*\*Confidence Score:\*\*\s*(\d+)', text)
-        if confidence_match:
-            result["confidence_score"] = int(confidence_match.group(1))
+        confidence = leading_number(sections["confidence"][0].text) if sections.get("confidence") else None
+        if confidence is not None:
+            result["confidence_score"] = int(confidence)
         else:
             # Calculate based on data quality
             competitor_score = min(5, len(result["competitors"]))
@@ -488,56 +463,34 @@ class CompetitiveAnalysisService:
         
         return result
     
+    def _apply_competitor_field(self, competitor, label, value):
+        """Store one "- **Field:** value" line of a competitor block"""
+        if label == "website":
+            link = MARKDOWN_LINK.match(value)
+            competitor["website"] = link.group(1) if link else value
+        elif label == "products":
+            competitor["products"] = [p.strip() for p in value.split(",")] if "," in value else [value]
+        elif label == "target audience":
+            competitor["target_audience"] = value
+        elif label == "pricing model":
+            competitor["pricing_model"] = value
+        elif label == "unique selling points":
+            competitor["unique_selling_points"] = [usp.strip() for usp in value.split(",")] if "," in value else [value]
+        elif label == "market position":
+            competitor["market_position"] = value
+        elif label == "founded year":
+            year = FOUNDED_YEAR.match(value)
+            if year:
+                competitor["founded"] = int(year.group(0))
+        elif label == "funding":
+            if value.lower() != "not found":
+                competitor["funding"] = value
+    
     def _extract_json(self, text):
-        """Extract JSON from the response text"""
-        import re
-        
-        # First try JSON code blocks
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Next try to find raw JSON objects
-        json_match = re.search(r'(\{[\s\S]*\})', text)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Try with more flexible JSON finding
-        json_search = re.search(r'{[\s\S]*?"competitors"[\s\S]*?}', text)
-        if json_search:
-            # Extract just the JSON portion
-            potential_json = json_search.group(0)
-            
-            # Attempt to balance braces to find complete JSON
-            brace_count = 0
-            end_pos = 0
-            
-            for i, char in enumerate(potential_json):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i + 1
-                        break
-            
-            if end_pos > 0:
-                cleaned_json = potential_json[:end_pos].strip()
-                try:
-                    return json.loads(cleaned_json)
-                except json.JSONDecodeError:
-                    pass
-        
-        # If all else fails, return an empty dict
-        return {}
+        """Extract the competitive analysis JSON from the response text"""
+        return extract_json(text, expected_keys=("competitors", "market_gaps", "sources")) or {}
 
-    def _validate_and_enhance_result(self, result, business_idea, industry):
+    def _validate_and_enhance_result(self, result, business_idea, industry, known_competitors=None):
         """Validate and enhance the competitive analysis result with quality checks"""
         if not isinstance(result, dict):
             return result
@@ -551,9 +504,9 @@ class CompetitiveAnalysisService:
                 else:
                     result[field] = []
         
-        # Validate competitors data quality
+        # Validate competitors data quality; pre-seeded competitors count once and are tagged
         validated_competitors = []
-        for competitor in result.get("competitors", []):
+        for competitor in mark_known_competitors(result.get("competitors", []), known_competitors or []):
             if isinstance(competitor, dict) and competitor.get("name"):
                 # Ensure all competitor fields exist
                 competitor_template = {
@@ -573,6 +526,8 @@ class CompetitiveAnalysisService:
                     competitor_template["products"] = [competitor_template["products"]]
                 if isinstance(competitor_template["unique_selling_points"], str):
                     competitor_template["unique_selling_points"] = [competitor_template["unique_selling_points"]]
+                if competitor.get("from_knowledge_base"):
+                    competitor_template["from_knowledge_base"] = True
                 
                 validated_competitors.append(competitor_template)
         
@@ -592,45 +547,21 @@ class CompetitiveAnalysisService:
         
         result["sources"] = validated_sources
         
-        # Recalculate confidence score based on data quality
-        quality_score = 0
-        
-        # Competitors quality (0-5 points)
-        if len(result["competitors"]) >= 3:
-            quality_score += 3
-        elif len(result["competitors"]) >= 1:
-            quality_score += len(result["competitors"])
-            
-        # Market analysis quality (0-3 points)
-        if len(result.get("market_gaps", [])) >= 2:
-            quality_score += 1
-        if len(result.get("barriers_to_entry", [])) >= 2:
-            quality_score += 1
-        if result.get("market_concentration") and result["market_concentration"] != "unknown":
-            quality_score += 1
-            
-        # Sources quality (0-2 points)
-        valid_sources = [s for s in result.get("sources", []) if isinstance(s, dict) and s.get("url")]
-        if len(valid_sources) >= 3:
-            quality_score += 2
-        elif len(valid_sources) >= 1:
-            quality_score += 1
-        
-        # Update confidence score (keep existing if higher)
-        existing_score = result.get("confidence_score", 0)
-        result["confidence_score"] = max(existing_score, quality_score)
-        
         # Add quality metadata
         result["data_quality"] = {
             "total_competitors": len(result["competitors"]),
-            "valid_sources": len(valid_sources),
-            "analysis_completeness": quality_score / 10.0,  # Convert to 0-1 scale
+            "valid_sources": len(validated_sources),
+            "reported_confidence_score": result.get("confidence_score", 0),
             "missing_fields": [field for field in required_fields if not result.get(field)]
         }
         
+        # Quality-weighted confidence score (authority, recency, access)
+        confidence = score_result("competition", result)
+        result["data_quality"]["analysis_completeness"] = confidence["completeness"]
+        
         return result
 
-    def _generate_search_queries(self, business_idea, industry, product_type, problem_statement=None):
+    async def _generate_search_queries(self, business_idea, industry, product_type, problem_statement=None):
         """Generate specific search queries using LLM to extract key concepts from business idea and problem statement"""
         try:
             # Include problem statement if available
@@ -673,7 +604,7 @@ class CompetitiveAnalysisService:
             market demand validation tools
             """
             
-            response = self.llm.invoke(query_prompt)
+            response = await self.llm.ainvoke(query_prompt)
             
             # Extract queries from response
             queries = []
@@ -4,36 +4,65 @@ import re
 import asyncio
 import time
 import os
-import hashlib
 from typing import Dict, List, Any, Optional
 from browser_use import Agent, BrowserSession
 from browser_use.browser.context import BrowserContextConfig
-from langchain_openai import ChatOpenAI
 from pathlib import Path
 from dotenv import load_dotenv
-from browser_config_fix import get_enhanced_browser_config, get_enhanced_context_config, get_enhanced_agent_config
+from browser_config_fix import get_enhanced_browser_config, get_enhanced_context_config, get_enhanced_agent_config, warm_up_browser, merge_search_queries
+from llm_scheduler import begin_analysis
+from llm_provider import create_chat_model, get_llm_provider_name, get_agent_llm_options
+from agent_compaction import HistoryCompactor
+from research_cache import get_research_cache
+from idea_similarity import make_cache_key, make_scope
+from json_extract import extract_json
+from market_normalization import parse_market_size, split_unit, normalize_market_size, normalize_sources
+from market_reconciliation import reconcile_result
+from market_simulation import simulate_result
+from market_bootstrap import bootstrap_result
+from confidence_scoring import score_result, current_year, year_of, MARKET_CACHE_THRESHOLD
+from knowledge_base import get_knowledge_base, format_known_sources, mark_known_sources
 
 # Load environment variables
 load_dotenv()
 
+# A source heading in the text format: "1. Publisher - Title (Date)" or
+# "SOURCE 1: Publisher - Title (Date)", anchored to the start of a line so
+# figures such as "5.2 billion" inside the details never start a new source
+SOURCE_HEADING = re.compile(r'^[ \t]*(?:\d+[.)]|SOURCE\s+\d+:)[ \t]*(\S[^\n]*)$', re.MULTILINE | re.IGNORECASE)
+# A "- item", "* item" or "1. item" line
+LIST_ITEM = re.compile(r'^[ \t]*(?:[-*•]|\d+[.)])[ \t]+(\S[^\n]*)$', re.MULTILINE)
+# "Publisher - Report Title (Date)"; anchored at the end so the lazy parts
+# take the whole line rather than its first character
+SOURCE_TITLE = re.compile(r'([^-(]+?)(?:\s*-\s*([^(]+?))?\s*(?:\(([^)]+)\))?\s*$')
+# "CONFIDENCE SCORE: 7", also with markdown bold around the label
+CONFIDENCE_SCORE = re.compile(r'CONFIDENCE SCORE\**:\**\s*(\d+)', re.IGNORECASE)
+
 class MarketSizingService:
     def __init__(self, openai_api_key=None, anthropic_api_key=None):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         
-        # Initialize LLM directly with OpenAI like other enhanced modules
-        if not self.openai_api_key:
+        # LLM comes from llm_provider so LLM_PROVIDER=fake can swap in the offline stand-in
+        if not self.openai_api_key and get_llm_provider_name() != "fake":
             raise ValueError("MarketSizingService: OpenAI API key is required.")
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
+        self.llm = create_chat_model(
+            api_key=self.openai_api_key,
             temperature=0.1,  # Lower temperature for more consistent research
             max_tokens=4000,
-            api_key=self.openai_api_key,
             timeout=120  # Increased timeout for complex research tasks
         )
-        print("MarketSizingService: Using OpenAI as primary LLM.")
+        # Shared across services; backend and TTLs come from RESEARCH_CACHE_* settings
+        self.cache = get_research_cache()
+        # Evidence from earlier runs in the same industry, used to pre-seed the agent
+        self.knowledge_base = get_knowledge_base()
+        print(f"MarketSizingService: Using {self.llm.__class__.__name__} as primary LLM.")
     
-    async def research_market_size(self, business_idea, industry, product_type):
-        """Research market size using enhanced browser automation with 5-phase methodology"""
+    async def research_market_size(self, business_idea, industry, product_type, force_refresh=False, refresh_key=None):
+        """Research market size using enhanced browser automation with 5-phase methodology.
+
+        ``refresh_key`` is set by a background refresh: the result replaces the
+        stale entry stored under that key rather than one for this idea's key.
+        """
         try:
             # Input validation
             if not all([business_idea, industry, product_type]):
@@ -47,20 +76,35 @@ class MarketSizingService:
                 }
             
             # Check cache first
-            cache_key = self._generate_cache_key(business_idea, industry, product_type)
-            cached_result = self._check_cache(cache_key)
-            if cached_result:
+            cache_key = refresh_key or make_cache_key(business_idea, industry, product_type)
+            cache_scope = make_scope(industry, product_type)
+            cached_result = None
+            if not force_refresh:
+                cached_result = await self.cache.get("market_sizing", cache_key, idea=business_idea,
+                                                     scope=cache_scope, allow_stale=True)
+            # Only use cache if quality meets threshold
+            if cached_result and cached_result.get("market_data", {}).get("confidence_score", 0) >= MARKET_CACHE_THRESHOLD:
                 print(f"Using cached market data for {industry}")
                 cached_result["research_method"] = "cached"
+                if cached_result.get("stale"):
+                    # Serve the expired result now and refresh the entry that was hit in the background
+                    hit_key = cached_result.get("cache_match", {}).get("key", cache_key)
+                    self.cache.revalidate("market_sizing", hit_key, lambda: self.research_market_size(
+                        business_idea, industry, product_type, force_refresh=True, refresh_key=hit_key))
                 return cached_result
             
-            print(f"Starting enhanced market sizing research for {industry} using {self.llm.__class__.__name__}...")
+            # A recent weak result for this exact idea is reused briefly instead of rerunning the agent
+            if not force_refresh:
+                low_confidence_result = await self.cache.get("lowconf_market_sizing", cache_key)
+                if low_confidence_result:
+                    print(f"Using cached low-confidence market data for {industry}")
+                    low_confidence_result["research_method"] = "cached_low_confidence"
+                    return low_confidence_result
             
-            # Generate LLM-powered search queries
-            search_queries = await self._generate_search_queries(business_idea, industry, product_type)
+            print(f"Starting enhanced market sizing research for {industry} using {self.llm.__class__.__name__}...")
             
-            # Create enhanced search task with 5-phase methodology
-            search_task = self._create_search_task(business_idea, industry, product_type, search_queries)
+            # Queue this run's LLM calls fairly against other in-flight analyses
+            begin_analysis(f"market_sizing:{cache_key}")
             
             # Get enhanced agent configuration
             agent_config = get_enhanced_agent_config()
@@ -72,18 +116,42 @@ class MarketSizingService:
             )
             
             try:
+                if agent_config['speculative_start']:
+                    # Warm up the browser on a fallback query while the LLM generates the real ones
+                    speculative_queries = self._get_fallback_queries(business_idea, industry, product_type)[:1]
+                    llm_queries, _ = await asyncio.gather(
+                        self._generate_search_queries(business_idea, industry, product_type),
+                        warm_up_browser(browser_session, speculative_queries[0])
+                    )
+                    search_queries = merge_search_queries(llm_queries, speculative_queries)
+                else:
+                    # Generate LLM-powered search queries
+                    search_queries = await self._generate_search_queries(business_idea, industry, product_type)
+                
+                # Create enhanced search task with 5-phase methodology
+                # Seed the task with what earlier runs in this industry already found
+                known = await self.knowledge_base.lookup(industry, product_type, business_idea)
+                known_evidence = format_known_sources(known["sources"])
+                if known_evidence:
+                    print(f"Pre-seeding research with {len(known['sources'])} known sources for {industry}")
+                search_task = self._create_search_task(business_idea, industry, product_type, search_queries, known_evidence)
+                
                 # Create agent with configured browser session (as per new API)
                 agent = Agent(
                     task=search_task,
                     llm=self.llm,
                     browser_session=browser_session,
                     use_vision=agent_config['use_vision'],
+                    **get_agent_llm_options(self.llm),
                     save_conversation_path="logs/market_sizing_research"
                 )
                 
                 # Run agent
                 print(f"Executing enhanced market sizing research agent with max {agent_config['max_steps']} steps...")
-                history = await agent.run(max_steps=agent_config['max_steps'])
+                history = await agent.run(
+                    max_steps=agent_config['max_steps'],
+                    on_step_start=HistoryCompactor(agent_config['history_compaction'])
+                )
                 
                 # Get final result from history
                 final_result = history.final_result()
@@ -98,12 +166,25 @@ class MarketSizingService:
             result = self._process_result(final_result, industry)
             
             # Validate and enhance result
-            result = self._validate_and_enhance_result(result, business_idea, industry)
+            result = self._validate_and_enhance_result(result, business_idea, industry, known["sources"])
+            
+            # Monte Carlo TAM/SAM/SOM bands around the consensus
+            simulate_result(result)
+            
+            # Bootstrap intervals for TAM and growth rate across the sources
+            bootstrap_result(result)
             
             # Cache the result for future use (only if quality is sufficient)
-            if result.get("confidence_score", 0) >= 5:
-                self._save_to_cache(cache_key, result)
+            if result.get("market_data", {}).get("confidence_score", 0) >= MARKET_CACHE_THRESHOLD:
+                await self.cache.set("market_sizing", cache_key, result, idea=business_idea, scope=cache_scope)
+                await self.knowledge_base.record_market_sizing(industry, product_type, business_idea, result)
                 print(f"Cached high-quality result for {cache_key}")
+            else:
+                await self.cache.set("lowconf_market_sizing", cache_key, result)
+                if refresh_key:
+                    # The weak refresh must not leave the stale entry to be served and refreshed again
+                    await self.cache.delete("market_sizing", cache_key)
+                print(f"Cached low-confidence result for {cache_key} (short TTL)")
             
             # Add research method and metadata
             result["research_method"] = "web_research"
@@ -130,35 +211,6 @@ class MarketSizingService:
                 "research_limitations": [f"Analysis failed: {error_msg}"]
             }
     
-    def _generate_cache_key(self, business_idea, industry, product_type):
-        """Generate unique cache key using MD5 hash"""
-        key_string = f"{business_idea}_{industry}_{product_type}".lower()
-        return hashlib.md5(key_string.encode()).hexdigest()
-    
-    def _check_cache(self, key):
-        """Check if data exists in cache with quality threshold"""
-        cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        cache_file = os.path.join(cache_dir, f"market_sizing_{key}.json")
-        if os.path.exists(cache_file):
-            # Check if cache is less than 7 days old
-            if time.time() - os.path.getmtime(cache_file) < 604800:  # 7 days in seconds
-                with open(cache_file, "r") as f:
-                    cached_data = json.load(f)
-                    # Only use cache if quality meets threshold
-                    if cached_data.get("market_data", {}).get("confidence_score", 0) >= 5:
-                        return cached_data
-        return None
-
-    def _save_to_cache(self, key, data):
-        """Save data to cache"""
-        cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        cache_file = os.path.join(cache_dir, f"market_sizing_{key}.json")
-        with open(cache_file, "w") as f:
-            json.dump(data, f)
     
     async def _generate_search_queries(self, business_idea, industry, product_type):
         """Generate specific search queries using LLM to extract key market concepts"""
@@ -196,7 +248,7 @@ class MarketSizingService:
             business idea testing market revenue
             """
             
-            response = self.llm.invoke(query_prompt)
+            response = await self.llm.ainvoke(query_prompt)
             
             # Extract queries from response
             queries = []
@@ -232,7 +284,7 @@ class MarketSizingService:
             f"{industry} industry analysis revenue"
         ]
     
-    def _create_search_task(self, business_idea, industry, product_type, search_queries):
+    def _create_search_task(self, business_idea, industry, product_type, search_queries, known_evidence=""):
         """Create enhanced search task with 5-phase research methodology"""
         
         # Format queries for the prompt
@@ -256,6 +308,7 @@ class MarketSizingService:
         - **AVOID AUTHENTICATION**: Do not attempt to log into paid research platforms
         - **STEP LIMIT AWARENESS**: You have limited steps (40), so be efficient and move quickly between sources
 
+        {known_evidence}
         **Research & Data Collection Strategy:**
 
         **Phase 1: Initial Market Data Discovery**
@@ -462,7 +515,7 @@ class MarketSizingService:
             sources_text = sources_section.group(1).strip()
             
             # Parse source blocks
-            source_blocks = re.split(r'\d+\.\s*([^\n]+)', sources_text)[1:]  # Skip first empty element
+            source_blocks = SOURCE_HEADING.split(sources_text)[1:]  # Skip text before the first heading
             
             # Process sources in pairs (title, details)
             for i in range(0, len(source_blocks), 2):
@@ -485,11 +538,11 @@ class MarketSizingService:
         if limitations_section:
             limitations_text = limitations_section.group(1).strip()
             # Extract bullet points or numbered items
-            limitations = re.findall(r'[-\*\d+\.]\s*([^\n]+)', limitations_text)
+            limitations = [item.strip() for item in LIST_ITEM.findall(limitations_text)]
             result["research_limitations"] = limitations
         
         # Extract confidence score
-        confidence_match = re.search(r'CONFIDENCE SCORE:\s*(\d+)', text, re.IGNORECASE)
+        confidence_match = CONFIDENCE_SCORE.search(text)
         if confidence_match:
             result["market_data"]["confidence_score"] = int(confidence_match.group(1))
         else:
@@ -506,7 +559,7 @@ class MarketSizingService:
     def _parse_source_block(self, source_title, source_details):
         """Parse individual source block into structured data"""
         # Extract publisher and report title
-        first_line_match = re.match(r'([^-]+?)(?:\s*-\s*([^(]+))?\s*(?:\(([^)]+)\))?', source_title.strip())
+        first_line_match = SOURCE_TITLE.match(source_title.strip(" *\t"))
         if not first_line_match:
             return None
         
@@ -514,14 +567,16 @@ class MarketSizingService:
         report_title = first_line_match.group(2).strip() if first_line_match.group(2) else ""
         publication_date = first_line_match.group(3).strip() if first_line_match.group(3) else None
         
-        # Extract market size
-        market_size_match = re.search(r'Current Market Size:\s*\$?\s*(\d+(?:[\.,]\d+)?)\s*(billion|million|trillion)(?:\s*\(([^)]+)\))?', source_details, re.IGNORECASE)
+        # Extract market size ("$5.2 billion (2023)", "USD 4.5B", "€3,2 Mrd", ranges...)
+        market_size_line = re.search(r'Current Market Size:\s*([^\n]+)', source_details, re.IGNORECASE)
+        market_size = parse_market_size(market_size_line.group(1)) if market_size_line else None
         
         # Extract growth rate
         growth_rate_match = re.search(r'Growth Rate:\s*(\d+(?:\.\d+)?)\s*%', source_details, re.IGNORECASE)
         
         # Extract projected size
-        projected_size_match = re.search(r'Projected Size:\s*\$?\s*(\d+(?:[\.,]\d+)?)\s*(billion|million|trillion)(?:.*?(?:by|in|year)?\s*(\d{4}))?', source_details, re.IGNORECASE)
+        projected_size_line = re.search(r'Projected Size:\s*([^\n]+)', source_details, re.IGNORECASE)
+        projected_size = parse_market_size(projected_size_line.group(1)) if projected_size_line else None
         
         # Extract geographic scope
         geo_match = re.search(r'Geographic Scope:\s*([^\n]+)', source_details, re.IGNORECASE)
@@ -532,29 +587,34 @@ class MarketSizingService:
         # Extract URL
         url_match = re.search(r'URL:\s*([^\n]+)', source_details, re.IGNORECASE)
         
-        if market_size_match:
+        if market_size:
+            size, unit = split_unit(market_size["value"], market_size["scale"])
             source_data = {
                 "publisher": publisher,
                 "report_title": report_title,
                 "publication_date": publication_date,
-                "market_size": float(market_size_match.group(1).replace(',', '')),
-                "market_size_unit": market_size_match.group(2).lower(),
-                "currency": "USD",
-                "base_year": 2024,  # Default base year
+                "market_size": size,
+                "market_size_unit": unit,
+                "currency": market_size["currency"],
+                "base_year": market_size["year"] or year_of(publication_date),
                 "geographic_scope": geo_match.group(1).strip() if geo_match else "Global",
                 "source_quality": quality_match.group(1).strip().lower() if quality_match else "medium",
                 "url": url_match.group(1).strip() if url_match else ""
             }
             
+            # Keep both ends of a quoted range
+            if market_size["low"] != market_size["high"]:
+                source_data["market_size_low"] = split_unit(market_size["low"], market_size["scale"])[0]
+                source_data["market_size_high"] = split_unit(market_size["high"], market_size["scale"])[0]
+            
             # Add growth rate if available
             if growth_rate_match:
                 source_data["growth_rate"] = float(growth_rate_match.group(1))
             
             # Add projected size if available
-            if projected_size_match:
-                source_data["projected_size"] = float(projected_size_match.group(1).replace(',', ''))
-                source_data["projected_size_unit"] = projected_size_match.group(2).lower()
-                source_data["projected_year"] = int(projected_size_match.group(3)) if projected_size_match.group(3) else None
+            if projected_size:
+                source_data["projected_size"], source_data["projected_size_unit"] = split_unit(projected_size["value"], projected_size["scale"])
+                source_data["projected_year"] = projected_size["year"]
             
             return source_data
         
@@ -564,20 +624,17 @@ class MarketSizingService:
         """Parse market breakdown section"""
         breakdown = {}
         
-        # Extract TAM/SAM/SOM
-        tam_match = re.search(r'TAM:\s*\$?\s*(\d+(?:[\.,]\d+)?)\s*(billion|million)', breakdown_text, re.IGNORECASE)
-        sam_match = re.search(r'SAM:\s*\$?\s*(\d+(?:[\.,]\d+)?)\s*(billion|million)', breakdown_text, re.IGNORECASE)
-        som_match = re.search(r'SOM:\s*\$?\s*(\d+(?:[\.,]\d+)?)\s*(billion|million)', breakdown_text, re.IGNORECASE)
-        
-        if tam_match:
-            breakdown["tam"] = float(tam_match.group(1).replace(',', ''))
-            breakdown["tam_unit"] = tam_match.group(2).lower()
-        if sam_match:
-            breakdown["sam"] = float(sam_match.group(1).replace(',', ''))
-            breakdown["sam_unit"] = sam_match.group(2).lower()
-        if som_match:
-            breakdown["som"] = float(som_match.group(1).replace(',', ''))
-            breakdown["som_unit"] = som_match.group(2).lower()
+        # Extract TAM/SAM/SOM, in any currency or unit; "<key>_usd" is the USD value
+        for key in ("tam", "sam", "som"):
+            line = re.search(rf'{key}:\s*([^\n]+)', breakdown_text, re.IGNORECASE)
+            figure = parse_market_size(line.group(1)) if line else None
+            if figure:
+                breakdown[key], breakdown[f"{key}_unit"] = split_unit(figure["value"], figure["scale"])
+                if figure["currency"] != "USD":
+                    breakdown[f"{key}_currency"] = figure["currency"]
+                normalized = normalize_market_size(line.group(1))
+                if normalized:
+                    breakdown[f"{key}_usd"] = normalized["value_usd"]
         
         # Extract geographic regions
         geo_section = re.search(r'Geographic (?:Distribution|Regions?):(.*?)(?=Growth Drivers:|Market Challenges:|$)', breakdown_text, re.DOTALL | re.IGNORECASE)
@@ -607,61 +664,11 @@ class MarketSizingService:
         return breakdown
     
     def _extract_json(self, text):
-        """Extract JSON from the response text - enhanced for Browser-Use agent format"""
-        import re
-        
-        # The Browser-Use agent often returns JSON directly in the "done" action text
-        # First, try to find a complete JSON object
-        json_match = re.search(r'(\{[^{}]*?"market_data"[^{}]*?\{.*?\}.*?\})', text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Try to find JSON code blocks
-        json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Try to find raw JSON objects with market_data
-        json_match = re.search(r'(\{.*?"market_data".*?\})', text, re.DOTALL)
-        if json_match:
-            # Find the complete JSON by balancing braces
-            json_text = json_match.group(1)
-            brace_count = 0
-            end_pos = 0
-            
-            for i, char in enumerate(json_text):
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i + 1
-                        break
-            
-            if end_pos > 0:
-                try:
-                    return json.loads(json_text[:end_pos])
-                except json.JSONDecodeError:
-                    pass
-        
-        # Try to find any JSON-like structure
-        json_match = re.search(r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})', text)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # If all else fails, return empty dict
-        return {}
+        """Extract the market sizing JSON from the Browser-Use agent's response text"""
+        # Falls back to the largest JSON object when none carries market_data
+        return extract_json(text, expected_keys=("market_data",)) or {}
     
-    def _validate_and_enhance_result(self, result, business_idea, industry):
+    def _validate_and_enhance_result(self, result, business_idea, industry, known_sources=None):
         """Validate and enhance market sizing result with quality checks"""
         if not isinstance(result, dict):
             return result
@@ -683,9 +690,10 @@ class MarketSizingService:
                 else:
                     market_data[field] = 0
         
-        # Validate and enhance sources
+        # Validate and enhance sources; pre-seeded reports count once and are tagged
         validated_sources = []
-        for source in market_data.get("sources", []):
+        kept_sources = []
+        for source in mark_known_sources(market_data.get("sources", []), known_sources or []):
             if isinstance(source, dict) and source.get("publisher"):
                 # Ensure all source fields exist
                 source_template = {
@@ -695,53 +703,42 @@ class MarketSizingService:
                     "market_size": source.get("market_size"),
                     "market_size_unit": source.get("market_size_unit", "billion"),
                     "currency": source.get("currency", "USD"),
-                    "base_year": source.get("base_year", 2024),
+                    "base_year": source.get("base_year") or year_of(source.get("publication_date")),
                     "growth_rate": source.get("growth_rate"),
                     "geographic_scope": source.get("geographic_scope", "Global"),
                     "source_quality": source.get("source_quality", "medium"),
                     "url": source.get("url", "")
                 }
+                if source.get("from_knowledge_base"):
+                    source_template["from_knowledge_base"] = True
                 
                 validated_sources.append(source_template)
+                kept_sources.append(source)
         
-        market_data["sources"] = validated_sources
+        # Canonical USD value, base year and range for every source in one pass
+        for source, normalized_size in zip(validated_sources, normalize_sources(kept_sources)):
+            source["normalized_size"] = normalized_size
         
-        # Recalculate confidence score based on data quality
-        quality_score = 0
-        
-        # Sources quality (0-6 points)
-        if len(validated_sources) >= 3:
-            quality_score += 4
-        elif len(validated_sources) >= 1:
-            quality_score += len(validated_sources)
-        
-        # High quality sources bonus (0-2 points)
-        high_quality_sources = [s for s in validated_sources if s.get("source_quality") == "high"]
-        if len(high_quality_sources) >= 2:
-            quality_score += 2
-        elif len(high_quality_sources) >= 1:
-            quality_score += 1
-        
-        # Market breakdown completeness (0-2 points)
-        breakdown = market_data.get("market_breakdown", {})
-        if breakdown.get("tam") or breakdown.get("sam"):
-            quality_score += 1
-        if breakdown.get("growth_drivers") or breakdown.get("geographic_regions"):
-            quality_score += 1
+        market_data["sources"] = validated_sources
         
-        # Update confidence score (keep existing if higher)
-        existing_score = market_data.get("confidence_score", 0)
-        market_data["confidence_score"] = max(existing_score, quality_score)
+        # Reconcile the sources into a consensus size, flagging outliers
+        reconcile_result(result)
         
         # Add data quality metadata
+        breakdown = market_data.get("market_breakdown", {})
+        high_quality_sources = [s for s in validated_sources if s.get("source_quality") == "high"]
         market_data["data_quality"] = {
             "total_sources": len(validated_sources),
             "high_quality_sources": len(high_quality_sources),
             "has_tam_sam": bool(breakdown.get("tam") or breakdown.get("sam")),
-            "analysis_completeness": quality_score / 10.0,  # Convert to 0-1 scale
+            "reported_confidence_score": market_data.get("confidence_score", 0),
             "data_recency": self._assess_data_recency(validated_sources)
         }
         
+        # Quality-weighted confidence score (authority, recency, consensus)
+        confidence = score_result("market_sizing", result)
+        market_data["data_quality"]["analysis_completeness"] = confidence["completeness"]
+        
         # Ensure research_limitations exists
         if "research_limitations" not in result:
             result["research_limitations"] = []
@@ -750,7 +747,7 @@ class MarketSizingService:
     
     def _assess_data_recency(self, sources):
         """Assess how recent the market data is"""
-        current_year = 2024
+        this_year = current_year()
         recent_count = 0
         total_count = 0
         
@@ -763,7 +760,7 @@ class MarketSizingService:
                     if year_match:
                         year = int(year_match.group(1))
                         total_count += 1
-                        if current_year - year <= 2:  # Within last 2 years
+                        if this_year - year <= 2:  # Within last 2 years
                             recent_count += 1
                 except:
                     pass
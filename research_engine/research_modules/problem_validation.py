@@ -3,34 +3,61 @@ import json
 import os
 import time
 import re
-import hashlib
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from browser_use import Agent, BrowserSession
-from browser_config_fix import get_enhanced_browser_config, get_enhanced_context_config, get_enhanced_agent_config
+from browser_config_fix import get_enhanced_browser_config, get_enhanced_context_config, get_enhanced_agent_config, warm_up_browser, merge_search_queries
+from llm_scheduler import begin_analysis
+from llm_provider import create_chat_model, get_llm_provider_name, get_agent_llm_options
+from agent_compaction import HistoryCompactor
+from research_cache import get_research_cache
+from idea_similarity import make_cache_key, make_scope
+from json_extract import extract_json
+from confidence_scoring import score_result, PROBLEM_VALIDATION_CACHE_THRESHOLD
+from section_parser import SectionSplitter, tokenize_lines, section_text, first_fields, bullet_items, leading_number, number_or_zero
 
 # Load environment variables
 load_dotenv()
 
+# Sections of the text-format result, split in a single scan
+RESULT_SECTIONS = SectionSplitter({
+    "summary": "PROBLEM VALIDATION SUMMARY",
+    "evidence": "EVIDENCE",
+    "alternatives": "ALTERNATIVE SOLUTIONS",
+    "feedback": "PROBLEM STATEMENT FEEDBACK",
+    "limitations": "RESEARCH LIMITATIONS",
+})
+EXISTS_VALUE = re.compile(r"(Yes|No|True|False)", re.IGNORECASE)
+EVIDENCE_DATE_CREDIBILITY = re.compile(r"\(([^()]*?)\s+-\s+([^()]*)\)\s*$")
+NUMBERED_SOLUTION = re.compile(r"(\[Solution \d+\]):[ \t]*")
+BOLD_NAME = re.compile(r"\*\*([^*]+)\*\*")
+QUOTED = re.compile(r'"([^"]+)"')
+DETAIL_LABELS = ('approach', 'limitation', 'pricing')
+
 class ProblemValidationService:
     def __init__(self, openai_api_key=None, anthropic_api_key=None):
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         
-        # Initialize LLM directly with OpenAI like competitive analysis
-        if not self.openai_api_key:
+        # LLM comes from llm_provider so LLM_PROVIDER=fake can swap in the offline stand-in
+        if not self.openai_api_key and get_llm_provider_name() != "fake":
             raise ValueError("ProblemValidationService: OpenAI API key is required.")
-        self.llm = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0.1,
-            max_tokens=4000,
+        self.llm = create_chat_model(
             api_key=self.openai_api_key,
+            temperature=0.1,  # Lower temperature for more consistent research
+            max_tokens=4000,
             timeout=120  # Increased timeout for complex research tasks
         )
-        print("ProblemValidationService: Using OpenAI as primary LLM.")
+        # Shared across services; backend and TTLs come from RESEARCH_CACHE_* settings
+        self.cache = get_research_cache()
+        print(f"ProblemValidationService: Using {self.llm.__class__.__name__} as primary LLM.")
     
-    async def validate_problem(self, business_idea, problem_statement, industry):
-        """Validate problem with enhanced browser automation, caching, and LLM-powered search queries"""
+    async def validate_problem(self, business_idea, problem_statement, industry, force_refresh=False, refresh_key=None):
+        """Validate problem with enhanced browser automation, caching, and LLM-powered search queries.
+
+        ``refresh_key`` is set by a background refresh: the result replaces the
+        stale entry stored under that key rather than one for this idea's key.
+        """
         
         # Input validation
         if not all([business_idea, problem_statement, industry]):
@@ -53,23 +80,38 @@ class ProblemValidationService:
             }
         
         # Create cache key for this validation
-        cache_key = hashlib.md5(f"{business_idea}_{problem_statement}_{industry}".encode()).hexdigest()
+        cache_key = refresh_key or make_cache_key(business_idea, problem_statement, industry)
+        cache_scope = make_scope(industry)
+        cache_idea = f"{business_idea} {problem_statement}"
         
         # Check cache first
-        cached_result = self._check_cache(cache_key)
+        cached_result = None
+        if not force_refresh:
+            cached_result = await self.cache.get("problem_validation", cache_key, idea=cache_idea,
+                                                 scope=cache_scope, allow_stale=True)
         if cached_result:
             print(f"Using cached problem validation result for {cache_key[:8]}...")
             cached_result["research_method"] = "cached"
+            if cached_result.get("stale"):
+                # Serve the expired result now and refresh the entry that was hit in the background
+                hit_key = cached_result.get("cache_match", {}).get("key", cache_key)
+                self.cache.revalidate("problem_validation", hit_key, lambda: self.validate_problem(
+                    business_idea, problem_statement, industry, force_refresh=True, refresh_key=hit_key))
             return cached_result
         
+        # A recent weak result for this exact idea is reused briefly instead of rerunning the agent
+        if not force_refresh:
+            low_confidence_result = await self.cache.get("lowconf_problem_validation", cache_key)
+            if low_confidence_result:
+                print(f"Using cached low-confidence problem validation result for {cache_key[:8]}...")
+                low_confidence_result["research_method"] = "cached_low_confidence"
+                return low_confidence_result
+        
         try:
             print(f"Starting problem validation for '{problem_statement}' in {industry}...")
             
-            # Generate specific search queries using LLM
-            search_queries = await self._generate_search_queries(business_idea, problem_statement, industry)
-            
-            # Create search task with generated queries
-            search_task = self._create_search_task(business_idea, problem_statement, industry, search_queries)
+            # Queue this run's LLM calls fairly against other in-flight analyses
+            begin_analysis(f"problem_validation:{cache_key}")
             
             # Get enhanced agent configuration
             agent_config = get_enhanced_agent_config()
@@ -81,18 +123,37 @@ class ProblemValidationService:
             )
             
             try:
+                if agent_config['speculative_start']:
+                    # Warm up the browser on a fallback query while the LLM generates the real ones
+                    speculative_queries = self._get_fallback_queries(business_idea, problem_statement, industry)[:1]
+                    llm_queries, _ = await asyncio.gather(
+                        self._generate_search_queries(business_idea, problem_statement, industry),
+                        warm_up_browser(browser_session, speculative_queries[0])
+                    )
+                    search_queries = merge_search_queries(llm_queries, speculative_queries)
+                else:
+                    # Generate specific search queries using LLM
+                    search_queries = await self._generate_search_queries(business_idea, problem_statement, industry)
+                
+                # Create search task with generated queries
+                search_task = self._create_search_task(business_idea, problem_statement, industry, search_queries)
+                
                 # Create agent with configured browser session (as per new API)
                 agent = Agent(
                     task=search_task,
                     llm=self.llm,
                     browser_session=browser_session,
                     use_vision=agent_config['use_vision'],
+                    **get_agent_llm_options(self.llm),
                     save_conversation_path="logs/problem_validation_research"
                 )
                 
                 # Run agent
                 print(f"Executing problem validation research agent with max {agent_config['max_steps']} steps...")
-                history = await agent.run(max_steps=agent_config['max_steps'])
+                history = await agent.run(
+                    max_steps=agent_config['max_steps'],
+                    on_step_start=HistoryCompactor(agent_config['history_compaction'])
+                )
                 
                 # Get final result from history
                 final_result = history.final_result()
@@ -110,9 +171,15 @@ class ProblemValidationService:
             result = self._validate_and_enhance_result(result, business_idea, problem_statement, industry)
             
             # Cache the result for future use (only if quality is sufficient)
-            if result.get("confidence_score", 0) >= 4:
-                self._save_to_cache(cache_key, result)
+            if result.get("confidence_score", 0) >= PROBLEM_VALIDATION_CACHE_THRESHOLD:
+                await self.cache.set("problem_validation", cache_key, result, idea=cache_idea, scope=cache_scope)
                 print(f"Cached high-quality result for {cache_key[:8]}...")
+            else:
+                await self.cache.set("lowconf_problem_validation", cache_key, result)
+                if refresh_key:
+                    # The weak refresh must not leave the stale entry to be served and refreshed again
+                    await self.cache.delete("problem_validation", cache_key)
+                print(f"Cached low-confidence result for {cache_key[:8]}... (short TTL)")
             
             # Add research metadata
             result["research_method"] = "web_research"
@@ -310,221 +377,109 @@ class ProblemValidationService:
                 "status": "success"
             }
             
-            # Extract problem validation summary
-            exists_match = re.search(r'Exists:\s*(Yes|No|True|False)', text, re.IGNORECASE)
-            severity_match = re.search(r'Severity:\s*(\d+(?:\.\d+)?)', text)
-            frequency_match = re.search(r'Frequency:\s*(\d+(?:\.\d+)?)', text)
-            wtp_match = re.search(r'Willingness to Pay:\s*[^\n]*?\$?([^\n]+)', text)
-            market_size_match = re.search(r'Market Size:\s*([^\n]+)', text)
-            confidence_match = re.search(r'Confidence Level:\s*(\d+(?:\.\d+)?)', text)
+            # Summary fields are "Label: value" lines; one pass collects them all
+            lines = list(tokenize_lines(text))
+            fields = first_fields(lines)
+            sections = RESULT_SECTIONS.split(lines)
             
             # Parse exists field
+            exists_match = EXISTS_VALUE.match(fields.get("exists", ""))
             if exists_match:
                 exists_value = exists_match.group(1).lower()
                 result["problem_validation"]["exists"] = exists_value in ["yes", "true"]
             
             # Parse numeric fields
-            if severity_match:
-                result["problem_validation"]["severity"] = float(severity_match.group(1))
-            if frequency_match:
-                result["problem_validation"]["frequency"] = float(frequency_match.group(1))
-            if confidence_match:
-                result["problem_validation"]["confidence_level"] = float(confidence_match.group(1))
-                result["confidence_score"] = float(confidence_match.group(1))
+            severity = leading_number(fields.get("severity"))
+            if severity is not None:
+                result["problem_validation"]["severity"] = severity
+            frequency = leading_number(fields.get("frequency"))
+            if frequency is not None:
+                result["problem_validation"]["frequency"] = frequency
+            confidence = leading_number(fields.get("confidence level"))
+            if confidence is not None:
+                result["problem_validation"]["confidence_level"] = confidence
+                result["confidence_score"] = confidence
             
             # Parse willingness to pay
-            if wtp_match:
-                wtp_value = wtp_match.group(1).strip()
-                result["problem_validation"]["willingness_to_pay"] = wtp_value
+            if fields.get("willingness to pay"):
+                result["problem_validation"]["willingness_to_pay"] = fields["willingness to pay"].lstrip("$").strip()
             
             # Parse market size estimate
-            if market_size_match:
-                result["problem_validation"]["market_size_estimate"] = market_size_match.group(1).strip()
-            
-            # Extract evidence with improved pattern matching
-            evidence_section = re.search(r'EVIDENCE:(.*?)(?:ALTERNATIVE SOLUTIONS:|PROBLEM STATEMENT|$)', text, re.DOTALL | re.IGNORECASE)
-            if evidence_section:
-                evidence_text = evidence_section.group(1)
-                # Pattern: [Source]: [Type] ([Date] - [Credibility])
-                evidence_pattern = r'([^:\[\n]+):\s*([^(]+)(?:\(([^-]+)\s*-\s*([^)]+)\))?'
-                evidence_matches = re.findall(evidence_pattern, evidence_text)
-                
-                for match in evidence_matches:
-                    source, type_info, date_info, credibility = match
-                    source = source.strip()
-                    
-                    # Skip section headers
-                    if any(header in source.upper() for header in ["EVIDENCE", "ALTERNATIVE", "PROBLEM"]):
-                        continue
-                    
-                    # Extract quotes/insights for this source
-                    source_section = re.search(rf'{re.escape(source)}:.*?(?=\n[^\s-]|\Z)', evidence_text, re.DOTALL)
-                    quotes = []
-                    key_insight = ""
-                    
-                    if source_section:
-                        source_content = source_section.group(0)
-                        quotes = re.findall(r'- ([^\n]+)', source_content)
-                        # Take first quote as excerpt, second as insight if available
-                        excerpt = quotes[0] if quotes else ""
-                        key_insight = quotes[1] if len(quotes) > 1 else quotes[0] if quotes else ""
-                    
-                    result["evidence"].append({
-                        "source": source,
-                        "url": "",  # Not extracted from text format
-                        "type": type_info.strip() if type_info else "unknown",
-                        "date": date_info.strip() if date_info else None,
-                        "credibility": credibility.strip() if credibility else "unknown",
-                        "excerpt": excerpt,
-                        "key_insight": key_insight
-                    })
+            if fields.get("market size"):
+                result["problem_validation"]["market_size_estimate"] = fields["market size"]
+            
+            # Evidence: "[Source]: [Type] ([Date] - [Credibility])" lines, each followed by
+            # "- quote" and "- insight" bullets
+            current_evidence = None
+            quotes = []
+            for line in sections.get("evidence", []):
+                if line.bullet:
+                    if current_evidence is not None:
+                        quotes.append(line.text)
+                    continue
+                if line.label is None:
+                    continue
+                if current_evidence is not None:
+                    self._finish_evidence(current_evidence, quotes)
+                    result["evidence"].append(current_evidence)
+                current_evidence = self._start_evidence(line.label, line.value)
+                quotes = []
+            if current_evidence is not None:
+                self._finish_evidence(current_evidence, quotes)
+                result["evidence"].append(current_evidence)
             
             # Extract alternative solutions with improved parsing
-            alt_section = re.search(r'ALTERNATIVE SOLUTIONS:(.*?)(?:PROBLEM STATEMENT|$)', text, re.DOTALL | re.IGNORECASE)
-            if alt_section:
-                alt_text = alt_section.group(1).strip()
+            alt_lines = sections.get("alternatives", [])
+            if alt_lines:
+                alt_text = section_text(text, alt_lines)
                 
                 # Format 1: Solution Name: format (actual current output)
-                # Look for lines that end with colon and aren't detail fields
-                solution_name_pattern = r'^([^:\n-]+):\s*$'
-                solution_lines = alt_text.split('\n')
-                
+                # Lines ending with a colon that aren't detail fields start a solution
                 current_solution = None
-                for line in solution_lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Check if this is a solution name (ends with colon, not a detail field)
-                    name_match = re.match(solution_name_pattern, line)
-                    if name_match and not line.lower().startswith(('approach', 'limitation', 'pricing')):
-                        # This is a new solution name
-                        if current_solution:  # Save previous solution
-                            result["alternative_solutions"].append(current_solution)
-                        
+                for line in alt_lines:
+                    if (not line.bullet and line.number is None and line.label and not line.value
+                            and "-" not in line.label and not line.label.lower().startswith(DETAIL_LABELS)):
                         current_solution = {
-                            "name": name_match.group(1).strip(),
+                            "name": line.label,
                             "approach": "",
                             "limitations": [],
                             "pricing": ""
                         }
-                    
-                    elif current_solution and line.startswith('- '):
-                        # This is a detail line for the current solution
-                        detail_line = line[2:].strip()  # Remove '- '
-                        
-                        if detail_line.lower().startswith('approach:'):
-                            current_solution["approach"] = detail_line[9:].strip()
-                        elif detail_line.lower().startswith('limitations:'):
-                            lim_text = detail_line[12:].strip()
-                            if lim_text and lim_text.lower() not in ['none', 'n/a', 'not found', 'not specified']:
-                                current_solution["limitations"] = [lim_text]
-                        elif detail_line.lower().startswith('pricing:'):
-                            pricing_text = detail_line[8:].strip()
-                            if pricing_text and pricing_text.lower() not in ['none', 'n/a', 'not found', 'not specified']:
-                                current_solution["pricing"] = pricing_text
-                
-                # Don't forget to add the last solution
-                if current_solution:
-                    result["alternative_solutions"].append(current_solution)
+                        result["alternative_solutions"].append(current_solution)
+                    elif current_solution and line.bullet and line.label:
+                        self._apply_solution_detail(current_solution, line.label.lower(), line.value)
                 
                 # Format 2: [Solution X]: Solution Name format (fallback)
                 if not result["alternative_solutions"]:
-                    solution_pattern = r'\[Solution \d+\]:\s*([^\n]+)'
-                    solution_matches = re.findall(solution_pattern, alt_text)
-                    
-                    if solution_matches:
-                        # Process [Solution X]: format
-                        solution_blocks = re.split(r'\[Solution \d+\]:', alt_text)[1:]  # Skip first empty element
-                        
-                        for i, block in enumerate(solution_blocks):
-                            if i < len(solution_matches):
-                                name = solution_matches[i].strip()
-                                details = block.strip()
-                                
-                                # Extract details from the block
-                                approach_match = re.search(r'[-\s]*Approach:\s*([^\n]+)', details, re.IGNORECASE)
-                                limitations_match = re.search(r'[-\s]*Limitations:\s*([^\n]+)', details, re.IGNORECASE)
-                                pricing_match = re.search(r'[-\s]*Pricing:\s*([^\n]+)', details, re.IGNORECASE)
-                                
-                                # Parse limitations
-                                limitations = []
-                                if limitations_match:
-                                    lim_text = limitations_match.group(1).strip()
-                                    if lim_text and lim_text.lower() not in ['none', 'n/a', 'not found']:
-                                        # Handle list format or comma-separated
-                                        if '[' in lim_text and ']' in lim_text:
-                                            limitations = re.findall(r'"([^"]+)"', lim_text)
-                                        elif ',' in lim_text:
-                                            limitations = [lim.strip() for lim in lim_text.split(',')]
-                                        else:
-                                            limitations = [lim_text]
-                                
-                                result["alternative_solutions"].append({
-                                    "name": name,
-                                    "approach": approach_match.group(1).strip() if approach_match else "",
-                                    "limitations": limitations,
-                                    "pricing": pricing_match.group(1).strip() if pricing_match else ""
-                                })
+                    blocks = NUMBERED_SOLUTION.split(alt_text)[1:]
+                    for i in range(0, len(blocks) - 1, 2):
+                        name, details = blocks[i + 1].partition("\n")[::2]
+                        result["alternative_solutions"].append(self._solution_from_block(name, details))
                 
                 # Format 3: **Solution Name** followed by details (fallback)
                 if not result["alternative_solutions"] and '**' in alt_text:
-                    solution_blocks = re.split(r'\*\*([^*]+)\*\*', alt_text)
-                    if len(solution_blocks) > 1:
-                        # Process **Solution Name** format
-                        for i in range(1, len(solution_blocks), 2):
-                            if i + 1 < len(solution_blocks):
-                                name = solution_blocks[i].strip()
-                                details = solution_blocks[i + 1].strip()
-                                
-                                # Skip if name is just formatting elements
-                                if name.lower() in ['approach', 'limitations', 'pricing'] or name.startswith('-'):
-                                    continue
-                                
-                                approach_match = re.search(r'(?:- )?Approach:\s*([^\n]+)', details, re.IGNORECASE)
-                                limitations_match = re.search(r'(?:- )?Limitations:\s*([^\n]+)', details, re.IGNORECASE)
-                                pricing_match = re.search(r'(?:- )?Pricing:\s*([^\n]+)', details, re.IGNORECASE)
-                                
-                                # Parse limitations
-                                limitations = []
-                                if limitations_match:
-                                    lim_text = limitations_match.group(1).strip()
-                                    if lim_text and lim_text.lower() not in ['none', 'n/a', 'not found']:
-                                        # Handle list format or comma-separated
-                                        if '[' in lim_text and ']' in lim_text:
-                                            limitations = re.findall(r'"([^"]+)"', lim_text)
-                                        elif ',' in lim_text:
-                                            limitations = [lim.strip() for lim in lim_text.split(',')]
-                                        else:
-                                            limitations = [lim_text]
-                                
-                                result["alternative_solutions"].append({
-                                    "name": name,
-                                    "approach": approach_match.group(1).strip() if approach_match else "",
-                                    "limitations": limitations,
-                                    "pricing": pricing_match.group(1).strip() if pricing_match else ""
-                                })
+                    solution_blocks = BOLD_NAME.split(alt_text)
+                    # Process **Solution Name** format
+                    for i in range(1, len(solution_blocks) - 1, 2):
+                        name = solution_blocks[i].strip()
+                        # Skip if name is just formatting elements
+                        if name.lower() in ['approach', 'limitations', 'pricing'] or name.startswith('-'):
+                            continue
+                        result["alternative_solutions"].append(self._solution_from_block(name, solution_blocks[i + 1]))
                 
                 # Format 4: Numbered list or simple list format (final fallback)
                 if not result["alternative_solutions"]:
-                    # Look for patterns like "1. Solution Name" or "- Solution Name"
-                    solution_matches = re.findall(r'(?:^\d+\.|\-)\s*([^:\n]+)(?::([^\n]+))?', alt_text, re.MULTILINE)
-                    
                     current_solution = None
-                    for match in solution_matches:
-                        name_part = match[0].strip()
-                        description_part = match[1].strip() if match[1] else ""
+                    for line in alt_lines:
+                        if not line.bullet and line.number is None:
+                            continue
+                        name_part = line.label if line.label is not None else line.text
+                        description_part = line.value
                         
                         # Check if this is a solution name or a detail field
-                        if name_part.lower().startswith(('approach', 'limitation', 'pricing')):
-                            # This is a detail field for the current solution
-                            if current_solution and name_part.lower().startswith('approach'):
-                                current_solution["approach"] = description_part
-                            elif current_solution and name_part.lower().startswith('limitation'):
-                                if description_part:
-                                    current_solution["limitations"] = [description_part]
-                            elif current_solution and name_part.lower().startswith('pricing'):
-                                current_solution["pricing"] = description_part
+                        if name_part.lower().startswith(DETAIL_LABELS):
+                            if current_solution:
+                                self._apply_solution_detail(current_solution, name_part.lower(), description_part)
                         else:
                             # This is a new solution name
                             current_solution = {
@@ -538,22 +493,17 @@ class ProblemValidationService:
                     # Clean up any empty or invalid solutions
                     result["alternative_solutions"] = [
                         sol for sol in result["alternative_solutions"] 
-                        if sol.get("name") and not sol["name"].lower().startswith(('-', 'approach', 'limitation', 'pricing'))
+                        if sol.get("name") and not sol["name"].lower().startswith(('-',) + DETAIL_LABELS)
                     ]
             
             # Extract problem statement feedback
-            feedback_section = re.search(r'PROBLEM STATEMENT FEEDBACK:(.*?)(?:RESEARCH LIMITATIONS|$)', text, re.DOTALL | re.IGNORECASE)
-            if feedback_section:
-                feedback_text = feedback_section.group(1).strip()
-                if feedback_text:
-                    result["problem_statement_feedback"] = feedback_text
+            feedback_text = section_text(text, sections.get("feedback", []))
+            if feedback_text:
+                result["problem_statement_feedback"] = feedback_text
             
             # Extract research limitations
-            limitations_section = re.search(r'RESEARCH LIMITATIONS:(.*?)$', text, re.DOTALL | re.IGNORECASE)
-            if limitations_section:
-                limitations_text = limitations_section.group(1).strip()
-                limitations = re.findall(r'- ([^\n]+)', limitations_text)
-                result["research_limitations"] = limitations
+            if "limitations" in sections:
+                result["research_limitations"] = bullet_items(sections["limitations"])
             
             # Calculate a basic confidence score if not already set
             if result["confidence_score"] == 0:
@@ -587,62 +537,69 @@ class ProblemValidationService:
                 "research_limitations": ["Failed to parse research results"]
             }
     
+    def _start_evidence(self, source, details):
+        """Evidence entry for a "[Source]: [Type] ([Date] - [Credibility])" line"""
+        type_info, date_info, credibility = details, None, "unknown"
+        dated = EVIDENCE_DATE_CREDIBILITY.search(details)
+        if dated:
+            type_info = details[:dated.start()]
+            date_info = dated.group(1).strip()
+            credibility = dated.group(2).strip()
+        return {
+            "source": source.strip("[]* "),
+            "url": "",  # Not extracted from text format
+            "type": type_info.strip() or "unknown",
+            "date": date_info,
+            "credibility": credibility,
+            "excerpt": "",
+            "key_insight": ""
+        }
+    
+    def _finish_evidence(self, evidence, quotes):
+        """First bullet is the excerpt, the second (or the first again) the insight"""
+        if quotes:
+            evidence["excerpt"] = quotes[0]
+            evidence["key_insight"] = quotes[1] if len(quotes) > 1 else quotes[0]
+    
+    def _apply_solution_detail(self, solution, label, value):
+        """Store an Approach / Limitations / Pricing detail of an alternative solution"""
+        ignored = ['none', 'n/a', 'not found', 'not specified']
+        if label.startswith('approach'):
+            solution["approach"] = value
+        elif label.startswith('limitation'):
+            if value and value.lower() not in ignored:
+                solution["limitations"] = [value]
+        elif label.startswith('pricing'):
+            if value and value.lower() not in ignored:
+                solution["pricing"] = value
+    
+    def _solution_from_block(self, name, details):
+        """Alternative solution from a name and its block of "- Field: value" lines"""
+        fields = first_fields(tokenize_lines(details))
+        
+        # Parse limitations
+        limitations = []
+        lim_text = fields.get("limitations", "")
+        if lim_text and lim_text.lower() not in ['none', 'n/a', 'not found']:
+            # Handle list format or comma-separated
+            if '[' in lim_text and ']' in lim_text:
+                limitations = QUOTED.findall(lim_text)
+            elif ',' in lim_text:
+                limitations = [lim.strip() for lim in lim_text.split(',')]
+            else:
+                limitations = [lim_text]
+        
+        return {
+            "name": name.strip(),
+            "approach": fields.get("approach", ""),
+            "limitations": limitations,
+            "pricing": fields.get("pricing", "")
+        }
+    
     def _extract_json(self, text):
-        """Extract JSON from the response text with enhanced patterns and validation"""
+        """Extract the problem validation JSON from the response text, or None to trigger text parsing"""
         try:
-            # First try JSON code blocks (most reliable)
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
-            if json_match:
-                try:
-                    parsed_json = json.loads(json_match.group(1))
-                    if self._validate_json_structure(parsed_json):
-                        return parsed_json
-                except json.JSONDecodeError:
-                    pass
-            
-            # Next try to find raw JSON objects (with handling of triple backticks)
-            json_match = re.search(r'(\{[\s\S]*?\})', text)
-            if json_match:
-                # Remove any backticks that might be part of the JSON
-                json_str = json_match.group(1).replace('```', '')
-                try:
-                    parsed_json = json.loads(json_str)
-                    if self._validate_json_structure(parsed_json):
-                        return parsed_json
-                except json.JSONDecodeError:
-                    pass
-            
-            # Try with more flexible JSON finding (looking for problem_validation key)
-            json_search = re.search(r'{[\s\S]*?"problem_validation"[\s\S]*?}', text)
-            if json_search:
-                # Extract just the JSON portion
-                potential_json = json_search.group(0)
-                
-                # Attempt to balance braces to find complete JSON
-                brace_count = 0
-                end_pos = 0
-                
-                for i, char in enumerate(potential_json):
-                    if char == '{':
-                        brace_count += 1
-                    elif char == '}':
-                        brace_count -= 1
-                        if brace_count == 0:
-                            end_pos = i + 1
-                            break
-                
-                if end_pos > 0:
-                    cleaned_json = potential_json[:end_pos].strip()
-                    try:
-                        parsed_json = json.loads(cleaned_json)
-                        if self._validate_json_structure(parsed_json):
-                            return parsed_json
-                    except json.JSONDecodeError:
-                        pass
-            
-            # If all JSON attempts fail, return None to trigger text parsing
-            return None
-            
+            return extract_json(text, expected_keys=("problem_validation",), validate=self._validate_json_structure)
         except Exception as e:
             print(f"JSON extraction error: {str(e)}")
             return None
@@ -670,28 +627,6 @@ class ProblemValidationService:
         
         return True
 
-    def _check_cache(self, key):
-        """Check if data exists in cache"""
-        cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        cache_file = os.path.join(cache_dir, f"problem_validation_{key}.json")
-        if os.path.exists(cache_file):
-            # Check if cache is less than 7 days old
-            if time.time() - os.path.getmtime(cache_file) < 604800:  # 7 days in seconds
-                with open(cache_file, "r") as f:
-                    return json.load(f)
-        return None
-
-    def _save_to_cache(self, key, data):
-        """Save data to cache"""
-        cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        cache_file = os.path.join(cache_dir, f"problem_validation_{key}.json")
-        with open(cache_file, "w") as f:
-            json.dump(data, f)
-
     async def _generate_search_queries(self, business_idea, problem_statement, industry):
         """Generate specific search queries using LLM to find evidence for the problem"""
         try:
@@ -726,7 +661,7 @@ class ProblemValidationService:
             ["pet owners struggle finding reliable dog walkers statistics", "dog walking service complaints reviews", "how much do people pay dog walkers hourly rate", "unreliable pet sitter problems forum", "pet care market research dog walking", "dog owner survey pet care needs"]
             """
             
-            response = llm.invoke(prompt)
+            response = await llm.ainvoke(prompt)
             
             # Extract the list from the response
             import ast
@@ -831,53 +766,21 @@ class ProblemValidationService:
         if "research_limitations" not in result:
             result["research_limitations"] = []
         
-        # Calculate confidence score based on evidence quality
-        quality_score = 0
-        
-        # Evidence quality scoring (0-5 points)
-        high_credibility_sources = [e for e in result["evidence"] if e.get("credibility") == "high"]
-        medium_credibility_sources = [e for e in result["evidence"] if e.get("credibility") == "medium"]
-        
-        if len(high_credibility_sources) >= 2:
-            quality_score += 3
-        elif len(high_credibility_sources) >= 1:
-            quality_score += 2
-        elif len(medium_credibility_sources) >= 2:
-            quality_score += 1
-        
-        # Evidence quantity (0-2 points)
-        if len(result["evidence"]) >= 4:
-            quality_score += 2
-        elif len(result["evidence"]) >= 2:
-            quality_score += 1
-        
-        # Alternative solutions analysis (0-2 points)
-        if len(result["alternative_solutions"]) >= 2:
-            quality_score += 2
-        elif len(result["alternative_solutions"]) >= 1:
-            quality_score += 1
-        
-        # Problem validation completeness (0-1 point)
-        pv = result.get("problem_validation", {})
-        if (pv.get("exists") is not None and 
-            pv.get("severity", 0) > 0 and 
-            pv.get("frequency", 0) > 0):
-            quality_score += 1
-        
-        # Update confidence score (keep existing if higher)
-        existing_score = result.get("confidence_score", 0)
-        problem_confidence = result.get("problem_validation", {}).get("confidence_level", 0)
-        result["confidence_score"] = max(existing_score, quality_score, problem_confidence)
-        
         # Add quality metadata
+        high_credibility_sources = [e for e in result["evidence"] if e.get("credibility") == "high"]
         result["data_quality"] = {
             "total_evidence_sources": len(result["evidence"]),
             "high_credibility_sources": len(high_credibility_sources),
             "alternative_solutions_found": len(result["alternative_solutions"]),
-            "analysis_completeness": quality_score / 10.0,  # Convert to 0-1 scale
+            "reported_confidence_score": max(number_or_zero(result.get("confidence_score")),
+                                             number_or_zero(result.get("problem_validation", {}).get("confidence_level"))),
             "evidence_types": list(set([e.get("type", "unknown") for e in result["evidence"]]))
         }
         
+        # Quality-weighted confidence score (authority, recency)
+        confidence = score_result("problem_validation", result)
+        result["data_quality"]["analysis_completeness"] = confidence["completeness"]
+        
         # Add status field
         result["status"] = "success"
         
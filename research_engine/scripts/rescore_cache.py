@@ -0,0 +1,213 @@
+# rescore_cache.py - Re-run reconciliation and confidence scoring over every cached result
+#
+# Results cached before these stages existed, or under older thresholds and
+# weights, carry outdated consensus estimates, outlier flags and confidence
+# scores. This walks the cache in batches; market sizing batches are
+# reconciled, then every batch is re-scored by confidence_scoring, each in one
+# vectorized pass. Entries are written back with their original store time so
+# TTLs are unchanged, and no research is re-run. An entry whose new score
+# crosses its service's cache threshold moves to the tier the service would
+# have stored it in (demoted to lowconf_*, or promoted out of it).
+#
+# Saved result files (research_engine/output/*.json by default) are re-scored
+# too, since they are what the reports and comparisons are built from:
+#
+#   python scripts/rescore_cache.py --dry-run
+#   python scripts/rescore_cache.py --batch-size 2000
+#   python scripts/rescore_cache.py --namespaces competition,lowconf_competition --output-dir ""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+# --- Path Setup ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+research_engine_dir = os.path.dirname(script_dir)
+if research_engine_dir not in sys.path:
+    sys.path.append(research_engine_dir)
+# --- End Path Setup ---
+
+from research_cache import get_research_cache
+from market_reconciliation import reconcile_results
+from confidence_scoring import score_results, CACHE_THRESHOLDS
+
+# Cache namespace -> service whose results it holds
+NAMESPACES = {
+    "market_sizing": "market_sizing",
+    "lowconf_market_sizing": "market_sizing",
+    "competition": "competition",
+    "lowconf_competition": "competition",
+    "problem_validation": "problem_validation",
+    "lowconf_problem_validation": "problem_validation",
+}
+LOW_CONFIDENCE_PREFIX = "lowconf_"
+# Result file name prefix (or key of a test run's "results") -> service
+OUTPUT_SERVICES = {
+    "market_sizing": "market_sizing",
+    "market_data": "market_sizing",
+    "competitive_analysis": "competition",
+    "competition": "competition",
+    "problem_validation": "problem_validation",
+    "problem": "problem_validation",
+}
+DEFAULT_OUTPUT_DIR = os.path.join(research_engine_dir, "output")
+
+
+def _score_holder(service, value):
+    """The dict carrying confidence_score for a cached result"""
+    holder = value.get("market_data") if service == "market_sizing" and isinstance(value, dict) else value
+    return holder if isinstance(holder, dict) else {}
+
+
+def _tier(namespace, score):
+    """Namespace an entry of ``namespace`` with this score belongs in"""
+    service = NAMESPACES[namespace]
+    if score is None:
+        return namespace
+    return service if score >= CACHE_THRESHOLDS[service] else LOW_CONFIDENCE_PREFIX + service
+
+
+def _rescore(service, values, summary):
+    """Reconcile (market sizing) and re-score values in place; per-value flags for whether each changed"""
+    changed = [False] * len(values)
+    if service == "market_sizing":
+        for row, reconciliation in enumerate(reconcile_results(values)):
+            if reconciliation is None:
+                continue
+            changed[row] = True
+            summary["reconciled"] += 1
+            if reconciliation["outliers"]:
+                summary["with_outliers"] += 1
+            agreement = f"agreement_{reconciliation['agreement']}"
+            summary[agreement] = summary.get(agreement, 0) + 1
+
+    previous = [_score_holder(service, value).get("confidence_score") for value in values]
+    for row, breakdown in enumerate(score_results(service, values)):
+        if breakdown is None:
+            continue
+        changed[row] = True
+        summary["rescored"] += 1
+        if previous[row] is not None and breakdown["score"] > previous[row]:
+            summary["score_up"] += 1
+        elif previous[row] is not None and breakdown["score"] < previous[row]:
+            summary["score_down"] += 1
+    return changed
+
+
+def rescore_namespace(cache, namespace, batch_size=1000, dry_run=False):
+    """Reconcile (market sizing) and re-score every entry of a namespace, moving entries
+    whose score crosses the tier threshold; returns counts for the summary line"""
+    if namespace not in NAMESPACES:
+        raise ValueError(f"Unknown namespace: {namespace}")
+    service = NAMESPACES[namespace]
+    summary = {"entries": 0, "reconciled": 0, "with_outliers": 0, "rescored": 0, "score_up": 0, "score_down": 0,
+               "promoted": 0, "demoted": 0}
+
+    def flush(batch):
+        values = [value for _, value, _ in batch]
+        changed = _rescore(service, values, summary)
+        for (key, value, stored_at), was_changed in zip(batch, changed):
+            if not was_changed:
+                continue
+            target = _tier(namespace, _score_holder(service, value).get("confidence_score"))
+            if target != namespace:
+                summary["demoted" if target.startswith(LOW_CONFIDENCE_PREFIX) else "promoted"] += 1
+            if dry_run:
+                continue
+            if target != namespace:
+                cache.move_sync(namespace, target, key, value, stored_at)
+            else:
+                cache.replace_sync(namespace, key, value, stored_at)
+
+    batch = []
+    for entry in cache.items(namespace):
+        summary["entries"] += 1
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
+
+
+def _output_results(data, path):
+    """(service, result) pairs in one saved file: a single result named after its
+    service, or a test run whose "results" map service names to results"""
+    if not isinstance(data, dict):
+        return []
+    if isinstance(data.get("results"), dict):
+        return [(OUTPUT_SERVICES[name], result) for name, result in data["results"].items()
+                if name in OUTPUT_SERVICES and isinstance(result, dict)]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for prefix, service in OUTPUT_SERVICES.items():
+        if stem.startswith(prefix):
+            return [(service, data)]
+    return []
+
+
+def rescore_output(output_dir=DEFAULT_OUTPUT_DIR, dry_run=False):
+    """Reconcile and re-score every result saved as JSON in output_dir; returns counts for the summary line"""
+    summary = {"files": 0, "entries": 0, "reconciled": 0, "with_outliers": 0, "rescored": 0,
+               "score_up": 0, "score_down": 0, "files_rewritten": 0}
+    files = {}
+    groups = {service: [] for service in CACHE_THRESHOLDS}
+    for path in sorted(glob.glob(os.path.join(output_dir, "*.json"))):
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        pairs = _output_results(data, path)
+        if not pairs:
+            continue
+        summary["files"] += 1
+        files[path] = data
+        for service, result in pairs:
+            groups[service].append((path, result))
+
+    changed_files = set()
+    for service, entries in groups.items():
+        summary["entries"] += len(entries)
+        changed = _rescore(service, [result for _, result in entries], summary)
+        changed_files.update(path for (path, _), was_changed in zip(entries, changed) if was_changed)
+
+    summary["files_rewritten"] = len(changed_files)
+    if not dry_run:
+        for path in sorted(changed_files):
+            with open(path, "w") as f:
+                json.dump(files[path], f, indent=2)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile market sizes and re-score confidence across every cached result")
+    parser.add_argument("--namespaces", default=",".join(NAMESPACES),
+                        help="Comma-separated cache namespaces (default: every research namespace)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Results processed per vectorized pass (default 1000)")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help="Directory of saved result JSON files to re-score as well (empty to skip)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    cache = get_research_cache()
+    for namespace in (n.strip() for n in args.namespaces.split(",") if n.strip()):
+        started = time.time()
+        summary = rescore_namespace(cache, namespace, args.batch_size, args.dry_run)
+        action = "Would rewrite" if args.dry_run else "Rewrote"
+        print(f"{namespace}: {action} {summary['rescored']}/{summary['entries']} entries "
+              f"in {time.time() - started:.2f}s: {summary}")
+
+    if args.output_dir:
+        started = time.time()
+        summary = rescore_output(args.output_dir, args.dry_run)
+        action = "Would rewrite" if args.dry_run else "Rewrote"
+        print(f"{args.output_dir}: {action} {summary['files_rewritten']}/{summary['files']} files "
+              f"in {time.time() - started:.2f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
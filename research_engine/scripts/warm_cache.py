@@ -0,0 +1,170 @@
+# warm_cache.py - Pre-fill the research cache for common industry/product combinations
+#
+# Run off-peak (e.g. from cron) so daytime requests for popular verticals are
+# served from cache instead of waiting on a browser agent:
+#
+#   python scripts/warm_cache.py scripts/warm_cache_combinations.json --concurrency 2
+#
+# The combinations file is a JSON list. Each entry needs an industry and product
+# type and may carry a representative business idea and problem statement; the
+# Node classifier's field names (primaryIndustry, productType, description) are
+# accepted as-is. Entries already in the cache are reported and skipped by the
+# services themselves.
+#
+# What a warm-up actually serves:
+#   - The industry knowledge base (knowledge_base.py). Every request in a warmed
+#     industry reads it, whatever its idea, and starts its agent pre-seeded with
+#     the sources and competitors found here. This is the main payoff.
+#   - Cached results, but only for ideas close to the listed one. Results are
+#     keyed by idea, and a near-duplicate hit needs an estimated similarity of
+#     RESEARCH_CACHE_SIMILARITY (0.7) or more. The placeholder idea used for an
+#     entry without a description scores near zero against real submissions,
+#     so such an entry warms the knowledge base only.
+# A cached result is also fed to the knowledge base when the industry has no
+# evidence yet, so caches filled before the knowledge base existed still seed it.
+import asyncio
+import argparse
+import json
+import os
+import sys
+import time
+
+# --- Path Setup ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+research_engine_dir = os.path.dirname(script_dir)
+if research_engine_dir not in sys.path:
+    sys.path.append(research_engine_dir)
+# --- End Path Setup ---
+
+from research_modules.market_sizing import MarketSizingService
+from research_modules.competitive_analysis import CompetitiveAnalysisService
+from research_cache import get_research_cache
+from knowledge_base import get_knowledge_base
+
+SERVICES = ("competition", "market_sizing")
+
+
+def load_combinations(path):
+    """Read combinations, normalizing the classifier's camelCase field names"""
+    with open(path, "r") as f:
+        raw = json.load(f)
+
+    combinations = []
+    seen = set()
+    for entry in raw:
+        industry = entry.get("industry") or entry.get("primaryIndustry")
+        product_type = entry.get("product_type") or entry.get("productType")
+        if not industry or not product_type:
+            print(f"Skipping entry without industry/product type: {entry}")
+            continue
+        # A placeholder idea still runs the agent for the knowledge base, but
+        # its cached result will not match real ideas (see the header)
+        business_idea = (entry.get("business_idea") or entry.get("description")
+                         or f"A {product_type} business in the {industry} industry")
+        key = (business_idea, industry, product_type)
+        if key in seen:
+            continue
+        seen.add(key)
+        combinations.append({
+            "business_idea": business_idea,
+            "industry": industry,
+            "product_type": product_type,
+            "problem_statement": entry.get("problem_statement") or entry.get("problemStatement"),
+            "placeholder_idea": not (entry.get("business_idea") or entry.get("description")),
+        })
+    return combinations
+
+
+async def _seed_knowledge_base(knowledge_base, service_name, combo, result):
+    """Feed a cached result to the knowledge base if its industry has no evidence of that kind yet;
+    returns how many items the industry now offers a request for this combination"""
+    field = "sources" if service_name == "market_sizing" else "competitors"
+    known = await knowledge_base.lookup(combo["industry"], combo["product_type"], combo["business_idea"])
+    if not known[field] and result.get("research_method") == "cached":
+        record = (knowledge_base.record_market_sizing if service_name == "market_sizing"
+                  else knowledge_base.record_competition)
+        await record(combo["industry"], combo["product_type"], combo["business_idea"], result)
+        known = await knowledge_base.lookup(combo["industry"], combo["product_type"], combo["business_idea"])
+    return len(known[field])
+
+
+async def warm_cache(combinations, services=SERVICES, concurrency=2, force_refresh=False,
+                     market_sizing=None, competition=None, knowledge_base=None):
+    """Run the selected services for every combination, at most ``concurrency`` agents at a time.
+
+    Service and knowledge base instances default to the real ones. The summary
+    counts results by research method, plus ``knowledge_base_empty``: runs
+    after which the industry still had no evidence to pre-seed requests with.
+    """
+    if "market_sizing" in services and market_sizing is None:
+        market_sizing = MarketSizingService()
+    if "competition" in services and competition is None:
+        competition = CompetitiveAnalysisService()
+    knowledge_base = knowledge_base or get_knowledge_base()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(service_name, combo):
+        async with semaphore:
+            started = time.time()
+            if service_name == "market_sizing":
+                result = await market_sizing.research_market_size(
+                    combo["business_idea"], combo["industry"], combo["product_type"],
+                    force_refresh=force_refresh
+                )
+            else:
+                result = await competition.analyze_competition(
+                    combo["business_idea"], combo["industry"], combo["product_type"],
+                    combo["problem_statement"], force_refresh=force_refresh
+                )
+            method = result.get("research_method", "unknown")
+            known = await _seed_knowledge_base(knowledge_base, service_name, combo, result)
+            print(f"  {service_name:<13} {combo['industry']} / {combo['product_type']}: "
+                  f"{method} in {time.time() - started:.1f}s, {known} known items for the industry")
+            return {"service": service_name, "industry": combo["industry"],
+                    "product_type": combo["product_type"], "research_method": method, "known_items": known}
+
+    jobs = [run(name, combo) for combo in combinations for name in services]
+    results = await asyncio.gather(*jobs, return_exceptions=True)
+    # Stale hits were served and queued for refresh; finish those before exiting
+    await get_research_cache().revalidator.wait()
+
+    summary = {}
+    for result in results:
+        method = "exception" if isinstance(result, Exception) else result["research_method"]
+        summary[method] = summary.get(method, 0) + 1
+        if not isinstance(result, Exception) and not result["known_items"]:
+            summary["knowledge_base_empty"] = summary.get("knowledge_base_empty", 0) + 1
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fill the research cache for common industry/product combinations")
+    parser.add_argument("combinations", help="JSON file listing industry/product combinations")
+    parser.add_argument("--concurrency", type=int, default=2, help="Agent runs at once (default 2)")
+    parser.add_argument("--services", default=",".join(SERVICES),
+                        help="Comma-separated services to warm (default: competition,market_sizing)")
+    parser.add_argument("--force-refresh", action="store_true", help="Re-run research even when cached")
+    parser.add_argument("--dry-run", action="store_true", help="List the combinations without running anything")
+    args = parser.parse_args()
+
+    services = tuple(s.strip() for s in args.services.split(",") if s.strip())
+    unknown = [s for s in services if s not in SERVICES]
+    if unknown:
+        parser.error(f"Unknown services {unknown}; choose from {SERVICES}")
+
+    combinations = load_combinations(args.combinations)
+    print(f"\n🔥 Warming cache for {len(combinations)} combinations x {len(services)} services "
+          f"(concurrency {args.concurrency})")
+    for combo in combinations:
+        note = " (placeholder idea: warms the knowledge base only)" if combo["placeholder_idea"] else ""
+        print(f"    • {combo['industry']} / {combo['product_type']}: {combo['business_idea'][:70]}{note}")
+    if args.dry_run:
+        return
+
+    started = time.time()
+    summary = asyncio.run(warm_cache(combinations, services, args.concurrency, args.force_refresh))
+    print(f"\n✅ Warm-up finished in {time.time() - started:.1f}s: {summary}")
+
+
+if __name__ == "__main__":
+    main()
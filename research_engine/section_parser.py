@@ -0,0 +1,131 @@
+# section_parser.py - One-pass tokenizing for the agents' structured text results
+#
+# When an agent falls back to the text format, its answer is a series of
+# headed sections ("EVIDENCE:", "**Competitors:**", ...) made of "Label: value"
+# lines, bullets and numbered items. The parsers used to run a separate DOTALL
+# search over the whole text for every section and field, plus one search per
+# evidence source, so parse time grew faster than the output. Here the text is
+# walked line by line exactly once: each line is tokenized into its list marker
+# and label/value, and header lines start a new section. The per-section
+# extractors in the services work on those tokens.
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# One line: optional "- " / "* " / "• " bullet or "1." / "1)" number, then the body
+_LINE = re.compile(r"^[ \t]*(?:([-*•+])[ \t]+|(\d+)[.)](?!\d)[ \t]*)?(.*)$", re.MULTILINE)
+
+# Longest label accepted in a "Label: value" line
+MAX_LABEL_LENGTH = 64
+
+# A leading number such as "7" or "7.5" in "7/10"
+_NUMBER = re.compile(r"\s*(\d+(?:\.\d+)?)")
+
+
+class Line(NamedTuple):
+    """One non-blank line of a result"""
+    text: str                 # stripped line without its list marker
+    bullet: bool              # started with -, *, • or +
+    number: Optional[int]     # the n of "n." / "n)" list items
+    label: Optional[str]      # label of a "Label: value" line, markdown bold removed
+    value: str                # text after the label's colon, or "" without a label
+    start: int                # offsets in the source text: line start, end of its text
+    end: int
+
+
+def tokenize_lines(text: str) -> Iterator[Line]:
+    """Non-blank lines of text with list markers and "Label: value" pairs split out"""
+    for match in _LINE.finditer(text or ""):
+        marker, number, raw = match.groups()
+        body = raw.strip()
+        if not body:
+            continue
+        end = match.start(3) + len(raw.rstrip())
+        label = None
+        value = ""
+        # "Label: value", "**Label:** value" or "**Label**: value"
+        head, colon, rest = body.partition(":")
+        if colon and len(head) <= MAX_LABEL_LENGTH:
+            head = head.strip("* \t")
+            if head and "*" not in head:
+                label = head
+                value = rest.strip()
+                if value.startswith("**"):
+                    value = value[2:].lstrip()
+        yield Line(body, marker is not None, int(number) if number else None, label, value,
+                   match.start(), end)
+
+
+class SectionSplitter:
+    """Groups a result's lines into its headed sections.
+
+    ``headers`` maps a section name to a regex fragment for its label, e.g.
+    {"evidence": "EVIDENCE", "barriers": r"Barriers(?: to Entry)?"}. A header is
+    an unbulleted "Label:" line whose label matches, case-insensitively, with
+    optional markdown bold and leading "#" marks. Text after the header's colon
+    becomes the section's first line.
+    """
+
+    def __init__(self, headers: Dict[str, str]):
+        alternatives = "|".join(f"(?P<{name}>{label})" for name, label in headers.items())
+        self.header = re.compile(rf"[#>\s]*(?:{alternatives})", re.IGNORECASE)
+
+    def split(self, lines: Iterable[Line]) -> Dict[str, List[Line]]:
+        """Section name -> its lines, from tokenize_lines output.
+
+        Lines before the first header belong to no section. The first
+        occurrence of a repeated header wins.
+        """
+        sections: Dict[str, List[Line]] = {}
+        current: Optional[List[Line]] = None
+        for line in lines:
+            if line.label is not None and not line.bullet and line.number is None:
+                header = self.header.fullmatch(line.label)
+                if header:
+                    current = [] if header.lastgroup in sections else sections.setdefault(header.lastgroup, [])
+                    if line.value:
+                        current.append(Line(line.value, False, None, None, "", line.end - len(line.value), line.end))
+                    continue
+            if current is not None:
+                current.append(line)
+        return sections
+
+
+def section_text(text: str, lines: List[Line]) -> str:
+    """The source text a section's lines span, stripped"""
+    if not lines:
+        return ""
+    return text[lines[0].start:lines[-1].end].strip()
+
+
+def first_fields(lines: Iterable[Line]) -> Dict[str, str]:
+    """Lower-case label -> value of the first line carrying each label"""
+    fields: Dict[str, str] = {}
+    for line in lines:
+        if line.label is not None:
+            fields.setdefault(line.label.lower(), line.value)
+    return fields
+
+
+def numbered_items(lines: Iterable[Line]) -> List[str]:
+    """Text of the "1. item" lines"""
+    return [line.text for line in lines if line.number is not None]
+
+
+def bullet_items(lines: Iterable[Line]) -> List[str]:
+    """Text of the "- item" lines"""
+    return [line.text for line in lines if line.bullet]
+
+
+def leading_number(value: Optional[str]) -> Optional[float]:
+    """The number a value starts with, e.g. 7.0 for "7/10", or None"""
+    match = _NUMBER.match(value or "")
+    return float(match.group(1)) if match else None
+
+
+def number_or_zero(value: Any) -> float:
+    """A numeric field as a float: numbers as-is, strings such as "8/10" by their
+    leading number, anything else (None, "high") as 0"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return (leading_number(value) or 0.0) if isinstance(value, str) else 0.0
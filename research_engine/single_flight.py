@@ -0,0 +1,112 @@
+# single_flight.py - Coalesces identical in-flight research requests
+#
+# The cache is only written once an agent run finishes, so a retry from the
+# frontend or two users submitting the same idea would otherwise start two
+# identical 30-step browser runs. SingleFlight runs the first request for a key
+# and lets later identical requests await the same task. With a lock directory
+# configured, an advisory lock file extends this across uvicorn workers: the
+# second worker waits for the first to finish and then reads its cached result.
+# The holder deletes the lock file before unlocking, so one file per idea does
+# not pile up; a waiter that then wins the lock on the deleted file notices and
+# retries on the path's current file, so two workers never both lead.
+
+import os
+import copy
+import time
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process coalescing is unavailable
+    fcntl = None
+
+LOCK_POLL_SECONDS = 0.5
+
+
+class SingleFlight:
+    """Run at most one coroutine per key at a time; duplicates share its result"""
+
+    def __init__(self, lock_dir: Optional[str] = None, lock_timeout: float = 900.0):
+        self.lock_dir = lock_dir if fcntl else None
+        self.lock_timeout = lock_timeout
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return fn()'s result, sharing one execution among concurrent callers of ``key``"""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                # A separate task so one caller disconnecting does not cancel the others
+                task = asyncio.ensure_future(self._run(key, fn))
+                self._tasks[key] = task
+                self.leaders += 1
+                leader = True
+            else:
+                self.followers += 1
+                leader = False
+
+        result = await asyncio.shield(task)
+        # Followers get their own copy so response handling never aliases
+        return result if leader else copy.deepcopy(result)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        lock_file = None
+        try:
+            if self.lock_dir:
+                lock_file = await self._acquire_file_lock(key)
+            return await fn()
+        finally:
+            if lock_file is not None:
+                self._release_file_lock(key, lock_file)
+            with self._lock:
+                self._tasks.pop(key, None)
+
+    async def _acquire_file_lock(self, key: str):
+        """Wait for another worker holding this key, without blocking the event loop"""
+        path = self._lock_path(key)
+        lock_file = open(path, "w")
+        deadline = time.time() + self.lock_timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if time.time() >= deadline:
+                    # Give up waiting and run anyway rather than hang the request
+                    print(f"Single-flight lock for {key} timed out; running without it")
+                    lock_file.close()
+                    return None
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                continue
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(lock_file.fileno()).st_ino:
+                return lock_file
+            # The previous holder deleted this file on release; lock the one now at the path
+            lock_file.close()
+            lock_file = open(path, "w")
+
+    def _release_file_lock(self, key: str, lock_file):
+        """Delete the lock file while still holding it, then unlock"""
+        try:
+            os.remove(self._lock_path(key))
+        except FileNotFoundError:
+            pass
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self.lock_dir, f"{key}.lock")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = len(self._tasks)
+        return {"in_flight": in_flight, "leaders": self.leaders, "followers": self.followers}
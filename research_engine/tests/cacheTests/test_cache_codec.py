@@ -0,0 +1,46 @@
+# test_cache_codec.py - Checks the versioned cache entry encoding
+import sys
+import os
+import json
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import cache_codec
+
+SAMPLE = {
+    "problem_validation": {"exists": True, "severity": 7},
+    "evidence": [{"source": "forum", "excerpt": "Founders keep asking how to validate demand " * 20}] * 10,
+}
+
+def test_round_trip_for_each_compression():
+    """Every available compression decodes back to the original value"""
+    compressions = ["none", "gzip"] + (["zstd"] if cache_codec.zstandard else [])
+    for compression in compressions:
+        encoded = cache_codec.encode(SAMPLE, compression)
+        assert encoded.startswith(cache_codec.MAGIC)
+        assert cache_codec.decode(encoded) == SAMPLE
+
+def test_compression_shrinks_large_entries():
+    """Large evidence-heavy entries get much smaller; tiny ones are left uncompressed"""
+    plain = json.dumps(SAMPLE).encode()
+    assert len(cache_codec.encode(SAMPLE, "gzip")) < len(plain) / 4
+    assert cache_codec.encode({"a": 1}, "gzip")[3] == cache_codec.COMPRESSION_IDS["none"]
+
+def test_corrupt_entries_raise_value_error():
+    """Damaged bodies surface as ValueError so the cache can treat them as misses"""
+    encoded = cache_codec.encode(SAMPLE, "gzip")
+    # Headerless plain JSON only exists under retired key formats and is rejected too
+    for damaged in (encoded[:40], cache_codec.MAGIC + bytes([99, 0]) + b"{}", b'{"ok": tr',
+                    json.dumps(SAMPLE).encode(), json.dumps(SAMPLE)):
+        try:
+            cache_codec.decode(damaged)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_round_trip_for_each_compression()
+    test_compression_shrinks_large_entries()
+    test_corrupt_entries_raise_value_error()
+    print("All cache codec tests passed")
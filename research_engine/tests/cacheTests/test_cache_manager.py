@@ -0,0 +1,50 @@
+# test_cache_manager.py - Checks expiry sweeps and budget eviction
+import sys
+import os
+import time
+import tempfile
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import cache_manager
+from research_cache import ResearchCache, FileBackend, MemoryBackend
+from cache_manager import CacheManager
+
+def test_sweep_removes_unservable_entries():
+    """Entries past TTL plus the stale window, and files from old key formats, are deleted"""
+    cache_manager.LEGACY_CACHE_DIRS = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ResearchCache(FileBackend(tmp_dir), ttls={"competition": 60})
+        cache.set_sync("competition", "fresh", {"x": 1})
+        cache.backend.set("competition", "ancient", {"x": 1}, time.time() - 10 ** 8)
+        legacy = os.path.join(tmp_dir, "technology_saas_competition.json")
+        with open(legacy, "w") as f:
+            f.write("{}")
+        os.utime(legacy, (1, 1))
+
+        result = CacheManager(cache, max_bytes=10 ** 9, max_entries=100).sweep()
+        assert result["expired"] == 1 and result["orphans"] == 1
+        assert cache.keys("competition") == ["fresh"]
+        assert not os.path.exists(legacy)
+
+def test_lru_and_lfu_eviction_respect_budget():
+    """Over budget, LRU drops the least recently read and LFU the least often read"""
+    for policy, survivor in (("lru", "b"), ("lfu", "a")):
+        cache = ResearchCache(MemoryBackend())
+        for key in ("a", "b", "c"):
+            cache.set_sync("market_sizing", key, {"key": key})
+        for _ in range(3):
+            cache.get_sync("market_sizing", "a")
+        time.sleep(0.01)
+        cache.get_sync("market_sizing", "b")
+
+        manager = CacheManager(cache, max_bytes=10 ** 9, max_entries=1, policy=policy)
+        assert manager.sweep()["evicted"] == 2
+        assert cache.keys("market_sizing") == [survivor]
+        assert manager.occupancy()["entries"] == 1
+
+if __name__ == "__main__":
+    test_sweep_removes_unservable_entries()
+    test_lru_and_lfu_eviction_respect_budget()
+    print("All cache manager tests passed")
@@ -0,0 +1,109 @@
+# test_knowledge_base.py - Checks the per-industry knowledge base used to pre-seed research
+import sys
+import os
+import asyncio
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from research_cache import ResearchCache, MemoryBackend
+from knowledge_base import (IndustryKnowledgeBase, format_known_sources, format_known_competitors, extract_keywords,
+                            mark_known_sources, mark_known_competitors)
+
+def _market_result(*publishers):
+    return {"market_data": {"sources": [
+        {"publisher": p, "report_title": f"{p} Telehealth Report", "market_size": 12.5,
+         "market_size_unit": "billion", "base_year": 2024, "growth_rate": 18.2} for p in publishers
+    ]}}
+
+def test_records_merge_by_identity():
+    """The same source seen twice is one entry; new sources are added alongside it"""
+    kb = IndustryKnowledgeBase(ResearchCache(MemoryBackend()))
+
+    async def main():
+        await kb.record_market_sizing("Healthcare", "SaaS", "Telehealth scheduling for clinics", _market_result("Grand View Research"))
+        await kb.record_market_sizing("Healthcare", "SaaS", "Remote patient monitoring", _market_result("Grand View Research", "IBISWorld"))
+        return await kb.lookup("Healthcare", "SaaS", "Telehealth platform")
+
+    known = asyncio.run(main())
+    assert [s["publisher"] for s in known["sources"]] == ["Grand View Research", "IBISWorld"]
+    assert known["competitors"] == []
+
+def test_lookup_prefers_matching_product_and_keywords():
+    """Evidence found for the same product type and similar ideas ranks first; industries stay separate"""
+    kb = IndustryKnowledgeBase(ResearchCache(MemoryBackend()))
+
+    async def main():
+        await kb.record_competition("Healthcare", "Hardware", "Wearable glucose monitor",
+                                    {"competitors": [{"name": "Dexcom"}]})
+        await kb.record_competition("Healthcare", "Hardware", "Continuous glucose sensor patch",
+                                    {"competitors": [{"name": "Dexcom"}]})
+        await kb.record_competition("Healthcare", "SaaS", "Clinic appointment scheduling software",
+                                    {"competitors": [{"name": "Zocdoc"}]})
+        healthcare = await kb.lookup("Healthcare", "SaaS", "Appointment scheduling for dental clinics")
+        finance = await kb.lookup("Finance", "SaaS", "Appointment scheduling for dental clinics")
+        return healthcare, finance
+
+    healthcare, finance = asyncio.run(main())
+    assert healthcare["competitors"][0]["name"] == "Zocdoc"
+    assert {c["name"] for c in healthcare["competitors"]} == {"Zocdoc", "Dexcom"}
+    assert finance["competitors"] == []
+
+def test_prompt_blocks():
+    """Known evidence renders into the task prompt, and nothing renders when there is none"""
+    block = format_known_sources(_market_result("Statista")["market_data"]["sources"])
+    assert "Statista" in block and "Known Evidence" in block
+    assert format_known_competitors([{"name": "Zocdoc", "website": "zocdoc.com"}]).count("Zocdoc") == 1
+    assert format_known_sources([]) == "" and format_known_competitors([]) == ""
+
+def test_known_sources_are_tagged_and_counted_once():
+    """Pre-seeded sources returned unchanged are tagged, repeats of a report collapse, and recording skips them"""
+    known = _market_result("Grand View Research", "IBISWorld")["market_data"]["sources"]
+    returned = [dict(known[0]), dict(known[0], market_size=14.0), dict(known[1]),
+                {"publisher": "Statista", "report_title": "Telehealth Outlook", "market_size": 11.0}]
+    marked = mark_known_sources(returned, known)
+    assert [(s["publisher"], s["market_size"], bool(s.get("from_knowledge_base"))) for s in marked] == [
+        ("Grand View Research", 14.0, False), ("IBISWorld", 12.5, True), ("Statista", 11.0, False)]
+
+    kb = IndustryKnowledgeBase(ResearchCache(MemoryBackend()))
+
+    async def main():
+        await kb.record_market_sizing("Healthcare", "SaaS", "Telehealth", {"market_data": {"sources": known}})
+        await kb.record_market_sizing("Healthcare", "SaaS", "Telehealth", {"market_data": {"sources": marked}})
+        return await kb.cache.get("kb_market_sizing", kb._key("Healthcare"))
+
+    counts = {entry["data"]["publisher"]: entry["seen_count"] for entry in asyncio.run(main())["sources"]}
+    assert counts == {"Grand View Research": 2, "IBISWorld": 1, "Statista": 1}
+
+def test_known_competitors_are_tagged_and_not_recounted():
+    """Pre-seeded competitors returned unchanged are tagged, repeats collapse, and recording skips them"""
+    known = [{"name": "Zocdoc", "website": "zocdoc.com", "pricing_model": "Subscription", "market_position": "Leader"},
+             {"name": "Doxy.me", "website": "doxy.me", "pricing_model": "Freemium", "market_position": "Challenger"}]
+    returned = [dict(known[0]), dict(known[0], name="ZocDoc ", market_position="Market leader"), dict(known[1]),
+                {"name": "Teladoc", "website": "teladoc.com"}]
+    marked = mark_known_competitors(returned, known)
+    assert [(c["name"], bool(c.get("from_knowledge_base"))) for c in marked] == [
+        ("ZocDoc ", False), ("Doxy.me", True), ("Teladoc", False)]
+
+    kb = IndustryKnowledgeBase(ResearchCache(MemoryBackend()))
+
+    async def main():
+        await kb.record_competition("Healthcare", "SaaS", "Telehealth", {"competitors": known})
+        await kb.record_competition("Healthcare", "SaaS", "Telehealth", {"competitors": marked})
+        return await kb.cache.get("kb_competition", kb._key("Healthcare"))
+
+    counts = {entry["id"]: entry["seen_count"] for entry in asyncio.run(main())["competitors"]}
+    assert counts == {"zocdoc": 2, "doxy me": 1, "teladoc": 1}
+
+def test_extract_keywords_skips_stopwords():
+    assert extract_keywords("An app for the scheduling of dental clinics") == ["scheduling", "dental", "clinics"]
+
+
+if __name__ == "__main__":
+    test_records_merge_by_identity()
+    test_lookup_prefers_matching_product_and_keywords()
+    test_prompt_blocks()
+    test_known_sources_are_tagged_and_counted_once()
+    test_known_competitors_are_tagged_and_not_recounted()
+    test_extract_keywords_skips_stopwords()
+    print("All knowledge base tests passed")
@@ -0,0 +1,108 @@
+# test_low_confidence_cache.py - Checks the services serve weak results briefly and force_refresh bypasses the cache
+import sys
+import os
+import time
+import asyncio
+
+import pytest
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("RESEARCH_CACHE_BACKEND", "memory")
+
+from research_cache import ResearchCache, MemoryBackend
+from idea_similarity import make_cache_key
+from knowledge_base import IndustryKnowledgeBase
+from confidence_scoring import MARKET_CACHE_THRESHOLD, PROBLEM_VALIDATION_CACHE_THRESHOLD
+from research_modules import market_sizing, competitive_analysis, problem_validation
+
+IDEA = "A mobile app that reminds patients to take their medications"
+PROBLEM = "Patients forget doses and doctors cannot see adherence"
+HOUR = 3600
+
+# service module, class, namespace, cache key, call, result at a given score
+SERVICES = {
+    "market_sizing": (
+        market_sizing, market_sizing.MarketSizingService, "market_sizing",
+        make_cache_key(IDEA, "Healthcare", "Mobile App"),
+        lambda service, **kw: service.research_market_size(IDEA, "Healthcare", "Mobile App", **kw),
+        lambda score: {"market_data": {"confidence_score": score, "sources": []}},
+        MARKET_CACHE_THRESHOLD,
+    ),
+    "competition": (
+        competitive_analysis, competitive_analysis.CompetitiveAnalysisService, "competition",
+        make_cache_key(IDEA, "Healthcare", "Mobile App", None),
+        lambda service, **kw: service.analyze_competition(IDEA, "Healthcare", "Mobile App", **kw),
+        lambda score: {"competitors": [], "confidence_score": score},
+        MARKET_CACHE_THRESHOLD,
+    ),
+    "problem_validation": (
+        problem_validation, problem_validation.ProblemValidationService, "problem_validation",
+        make_cache_key(IDEA, PROBLEM, "Healthcare"),
+        lambda service, **kw: service.validate_problem(IDEA, PROBLEM, "Healthcare", **kw),
+        lambda score: {"evidence": [], "confidence_score": score},
+        PROBLEM_VALIDATION_CACHE_THRESHOLD,
+    ),
+}
+
+class _AgentStarted(Exception):
+    pass
+
+def _service(name, monkeypatch):
+    """The real service on a private memory cache; starting fresh research is recorded and stopped"""
+    module, service_class, namespace, key, call, result, threshold = SERVICES[name]
+    started = []
+
+    def begin_analysis(analysis_id):
+        started.append(analysis_id)
+        raise _AgentStarted(analysis_id)
+
+    monkeypatch.setattr(module, "begin_analysis", begin_analysis)
+    service = service_class()
+    service.cache = ResearchCache(MemoryBackend())
+    service.knowledge_base = IndustryKnowledgeBase(service.cache)
+
+    def run(**kwargs):
+        try:
+            return asyncio.run(call(service, **kwargs))
+        except _AgentStarted:
+            return None
+
+    return service, namespace, key, result, threshold, started, run
+
+@pytest.mark.parametrize("name", list(SERVICES))
+def test_weak_result_is_served_for_six_hours(name, monkeypatch):
+    """A below-threshold result is reused from lowconf_* within its 6 hour TTL, then researched again"""
+    service, namespace, key, result, threshold, started, run = _service(name, monkeypatch)
+    service.cache.backend.set("lowconf_" + namespace, key, result(threshold - 1), time.time() - 5 * HOUR)
+
+    served = run()
+    assert served["research_method"] == "cached_low_confidence"
+    assert started == []
+
+    service.cache.backend.set("lowconf_" + namespace, key, result(threshold - 1), time.time() - 7 * HOUR)
+    run()
+    assert len(started) == 1
+
+@pytest.mark.parametrize("name", list(SERVICES))
+def test_force_refresh_skips_both_tiers(name, monkeypatch):
+    """force_refresh starts fresh research even with a good and a weak result cached for the idea"""
+    service, namespace, key, result, threshold, started, run = _service(name, monkeypatch)
+    service.cache.set_sync(namespace, key, result(threshold + 2))
+    service.cache.set_sync("lowconf_" + namespace, key, result(threshold - 1))
+
+    assert run()["research_method"] == "cached"
+    assert started == []
+    run(force_refresh=True)
+    assert len(started) == 1
+
+if __name__ == "__main__":
+    for name in SERVICES:
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test_weak_result_is_served_for_six_hours(name, monkeypatch)
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test_force_refresh_skips_both_tiers(name, monkeypatch)
+    print("All low-confidence cache tests passed")
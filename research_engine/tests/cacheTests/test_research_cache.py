@@ -0,0 +1,225 @@
+# test_research_cache.py - Checks the shared research cache and its backends
+import sys
+import os
+import time
+import asyncio
+import tempfile
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from research_cache import ResearchCache, MemoryBackend, FileBackend, SQLiteBackend
+from idea_similarity import make_cache_key, make_scope
+
+def _backends(tmp_dir):
+    return [
+        MemoryBackend(max_entries=8),
+        FileBackend(os.path.join(tmp_dir, "files")),
+        SQLiteBackend(os.path.join(tmp_dir, "cache.sqlite3")),
+    ]
+
+def test_round_trip_and_counters():
+    """Every backend returns what was stored and counts hits and misses"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in _backends(tmp_dir):
+            cache = ResearchCache(backend)
+            assert asyncio.run(cache.get("market_sizing", "abc")) is None
+            asyncio.run(cache.set("market_sizing", "abc", {"market_data": {"confidence_score": 7}}))
+            assert asyncio.run(cache.get("market_sizing", "abc")) == {"market_data": {"confidence_score": 7}}
+            assert cache.keys("market_sizing") == ["abc"]
+
+            stats = cache.stats()["namespaces"]["market_sizing"]
+            assert stats["hits"] == 1 and stats["misses"] == 1 and stats["writes"] == 1
+
+def test_namespace_ttl_expires_entries():
+    """Entries older than their namespace TTL are reported as expired"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in _backends(tmp_dir):
+            cache = ResearchCache(backend, ttls={"competition": 60})
+            backend.set("competition", "old", {"x": 1}, time.time() - 120)
+            backend.set("problem_validation", "old", {"x": 1}, time.time() - 120)
+            assert cache.get_sync("competition", "old") is None
+            assert cache.get_sync("problem_validation", "old") == {"x": 1}
+            assert cache.stats()["namespaces"]["competition"]["expired"] == 1
+
+def test_reads_return_copies():
+    """Mutating a cached result does not change what the next reader sees"""
+    cache = ResearchCache(MemoryBackend())
+    cache.set_sync("competition", "k", {"research_method": "web_research"})
+    first = cache.get_sync("competition", "k")
+    first["research_method"] = "cached"
+    assert cache.get_sync("competition", "k")["research_method"] == "web_research"
+
+def test_memory_backend_evicts_least_recently_used():
+    """The in-memory backend keeps at most max_entries, dropping the coldest"""
+    backend = MemoryBackend(max_entries=2)
+    backend.set("ns", "a", 1, time.time())
+    backend.set("ns", "b", 2, time.time())
+    backend.get("ns", "a")
+    backend.set("ns", "c", 3, time.time())
+    assert sorted(backend.keys("ns")) == ["a", "c"]
+
+def test_cache_keys_ignore_formatting():
+    """Case, punctuation and spacing do not change a key; the inputs do"""
+    assert make_cache_key("An AI tool!", "Technology", "SaaS") == make_cache_key("an  ai tool", "technology", "saas")
+    assert make_cache_key("An AI tool", "Technology", "SaaS") != make_cache_key("An AI tool", "Healthcare", "SaaS")
+    assert len(make_cache_key("x" * 5000)) == 32
+
+def test_near_duplicate_ideas_share_results():
+    """A reworded idea in the same scope reuses research; other scopes and ideas do not"""
+    cache = ResearchCache(MemoryBackend())
+    scope = make_scope("Technology", "SaaS")
+    idea = "An AI-powered tool that validates business ideas by analyzing market size, competition and demand"
+    cache.set_sync("competition", make_cache_key(idea), {"competitors": ["A"]}, idea=idea, scope=scope)
+
+    reworded = "AI powered tool which validates business ideas by analysing market size, competition, and demand"
+    match = cache.get_sync("competition", make_cache_key(reworded), idea=reworded, scope=scope)
+    assert match["competitors"] == ["A"]
+    assert match["cache_match"]["type"] == "near_duplicate"
+    # The key of the entry that was hit, which a background refresh must rewrite
+    assert match["cache_match"]["key"] == make_cache_key(idea)
+
+    other_scope = make_scope("Healthcare", "SaaS")
+    assert cache.get_sync("competition", make_cache_key(reworded), idea=reworded, scope=other_scope) is None
+
+    unrelated = "A subscription box delivering organic dog treats to pet owners every month"
+    assert cache.get_sync("competition", make_cache_key(unrelated), idea=unrelated, scope=scope) is None
+    assert cache.stats()["namespaces"]["competition"]["similar_hits"] == 1
+
+def test_similarity_index_reloads_from_backend():
+    """A new cache instance rebuilds the idea index from stored records"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        idea = "Marketplace connecting freelance translators with small e-commerce stores"
+        ResearchCache(FileBackend(tmp_dir)).set_sync("market_sizing", make_cache_key(idea), {"ok": True}, idea=idea, scope="s")
+        reworded = "A marketplace connecting freelance translators with small ecommerce stores"
+        fresh = ResearchCache(FileBackend(tmp_dir))
+        assert fresh.get_sync("market_sizing", make_cache_key(reworded), idea=reworded, scope="s")["ok"] is True
+
+def test_stale_entries_served_and_revalidated():
+    """Expired entries inside the stale window are served marked, and refreshed once"""
+    backend = MemoryBackend()
+    cache = ResearchCache(backend, ttls={"market_sizing": 60})
+    backend.set("market_sizing", "k", {"market_data": {}}, time.time() - 120)
+
+    assert cache.get_sync("market_sizing", "k") is None
+    stale = cache.get_sync("market_sizing", "k", allow_stale=True)
+    assert stale["stale"] is True and stale["cache_age_seconds"] >= 120
+
+    refreshes = []
+
+    async def refresh():
+        await asyncio.sleep(0.01)
+        refreshes.append(1)
+        cache.set_sync("market_sizing", "k", {"market_data": {"fresh": True}})
+
+    async def main():
+        assert cache.revalidate("market_sizing", "k", refresh)
+        assert not cache.revalidate("market_sizing", "k", refresh)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert refreshes == [1]
+    assert cache.get_sync("market_sizing", "k") == {"market_data": {"fresh": True}}
+    assert cache.stats()["revalidation"]["completed"] == 1
+
+def test_stale_near_duplicate_names_the_stale_entry():
+    """A stale near-duplicate hit reports the key it came from, so refreshes of it are deduplicated"""
+    backend = MemoryBackend()
+    cache = ResearchCache(backend, ttls={"competition": 60})
+    idea = "An AI-powered tool that validates business ideas by analyzing market size, competition and demand"
+    cache.set_sync("competition", make_cache_key(idea), {"competitors": ["A"]}, idea=idea, scope="s")
+    backend.set("competition", make_cache_key(idea), {"competitors": ["A"]}, time.time() - 120)
+
+    keys = []
+    for reworded in ("AI powered tool which validates business ideas by analysing market size, competition, and demand",
+                     "An AI powered tool that validates business ideas by analyzing market size, competition, demand"):
+        match = cache.get_sync("competition", make_cache_key(reworded), idea=reworded, scope="s", allow_stale=True)
+        assert match["stale"] is True
+        keys.append(match["cache_match"]["key"])
+    assert keys == [make_cache_key(idea)] * 2
+
+    async def refresh():
+        await asyncio.sleep(0.01)
+
+    async def main():
+        assert cache.revalidate("competition", keys[0], refresh)
+        assert not cache.revalidate("competition", keys[1], refresh)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+
+def test_hot_tier_serves_copies_without_disk_reads():
+    """Hot keys are served from memory, write-through keeps disk current, and reads are copies"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FileBackend(tmp_dir)
+        cache = ResearchCache(backend, hot_entries=4)
+        cache.set_sync("competition", "k", {"competitors": [{"name": "A"}]})
+        assert backend.get("competition", "k")[0] == {"competitors": [{"name": "A"}]}
+
+        reads = []
+        backend_get = backend.get
+        backend.get = lambda namespace, key: reads.append(key) or backend_get(namespace, key)
+        first = cache.get_sync("competition", "k")
+        first["research_method"] = "cached"
+        first["competitors"][0]["name"] = "changed"
+        assert cache.get_sync("competition", "k") == {"competitors": [{"name": "A"}]}
+        assert reads == []
+
+def test_hot_tier_sees_writes_from_other_processes():
+    """A delete, overwrite or same-time re-score through one cache is seen by another's hot tier"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for make_backend in (lambda: FileBackend(os.path.join(tmp_dir, "files")),
+                             lambda: SQLiteBackend(os.path.join(tmp_dir, "cache.sqlite3"))):
+            writer, reader = ResearchCache(make_backend(), hot_entries=4), ResearchCache(make_backend(), hot_entries=4)
+            writer.set_sync("competition", "k", {"version": 1})
+            assert reader.get_sync("competition", "k") == {"version": 1}
+
+            writer.set_sync("competition", "k", {"version": 2})
+            assert reader.get_sync("competition", "k") == {"version": 2}
+
+            stored_at = writer.backend.get("competition", "k")[1]
+            writer.replace_sync("competition", "k", {"version": 3}, stored_at)
+            assert reader.get_sync("competition", "k") == {"version": 3}
+
+            writer.delete_sync("competition", "k")
+            assert reader.get_sync("competition", "k") is None
+            assert len(reader.hot) == 0
+
+def test_corrupt_entries_are_misses():
+    """A truncated file or row reads as a miss and is removed instead of raising"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in _backends(tmp_dir)[1:]:
+            cache = ResearchCache(backend, hot_entries=0)
+            cache.set_sync("problem_validation", "k", {"ok": True})
+            if isinstance(backend, FileBackend):
+                with open(os.path.join(backend.cache_dir, "problem_validation_k.json"), "w") as f:
+                    f.write('{"ok": tr')
+            else:
+                backend._conn.execute("UPDATE cache SET value = '{\"ok\": tr'")
+            assert cache.get_sync("problem_validation", "k") is None
+            assert backend.keys("problem_validation") == []
+
+def test_file_writes_leave_no_temp_files():
+    """Writes go through a temp file that is renamed into place"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FileBackend(tmp_dir)
+        backend.set("competition", "k", {"x": 1}, time.time() - 30)
+        assert [n for n in os.listdir(tmp_dir) if n.endswith(".tmp")] == []
+        value, stored_at = backend.get("competition", "k")
+        assert value == {"x": 1} and abs(stored_at - (time.time() - 30)) < 2
+
+if __name__ == "__main__":
+    test_round_trip_and_counters()
+    test_namespace_ttl_expires_entries()
+    test_reads_return_copies()
+    test_memory_backend_evicts_least_recently_used()
+    test_cache_keys_ignore_formatting()
+    test_near_duplicate_ideas_share_results()
+    test_similarity_index_reloads_from_backend()
+    test_stale_entries_served_and_revalidated()
+    test_stale_near_duplicate_names_the_stale_entry()
+    test_hot_tier_serves_copies_without_disk_reads()
+    test_hot_tier_sees_writes_from_other_processes()
+    test_corrupt_entries_are_misses()
+    test_file_writes_leave_no_temp_files()
+    print("All research cache tests passed")
@@ -0,0 +1,85 @@
+# test_single_flight.py - Checks coalescing of identical in-flight requests
+import sys
+import os
+import asyncio
+import tempfile
+
+import pytest
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import single_flight
+from single_flight import SingleFlight
+
+def test_identical_requests_share_one_run():
+    """Concurrent calls for one key run the work once and each get a result"""
+    calls = []
+
+    async def research():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"research_method": "web_research"}
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*[flight.do("same-idea", research) for _ in range(5)])
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r == {"research_method": "web_research"} for r in results)
+    assert results[1] is not results[2]
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "followers": 4}
+
+def test_cancelled_leader_does_not_cancel_followers():
+    """A client disconnecting does not abort the run other callers wait on"""
+    async def research():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        flight = SingleFlight()
+        leader = asyncio.ensure_future(flight.do("k", research))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", research))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+def test_lock_files_are_removed_and_still_exclusive(monkeypatch):
+    """Workers sharing a lock directory run one at a time and leave no lock files behind"""
+    monkeypatch.setattr(single_flight, "LOCK_POLL_SECONDS", 0.01)
+    running = []
+    overlaps = []
+
+    async def research():
+        running.append(1)
+        overlaps.append(len(running))
+        await asyncio.sleep(0.05)
+        running.pop()
+        return "done"
+
+    with tempfile.TemporaryDirectory() as lock_dir:
+        async def worker(start):
+            # One SingleFlight per simulated worker, so only the file lock coordinates them
+            await asyncio.sleep(start)
+            return await SingleFlight(lock_dir).do("same-idea", research)
+
+        async def main():
+            # The second worker waits on the first's file; the third arrives after that
+            # file is deleted, while the second is running
+            return await asyncio.gather(*[worker(start) for start in (0, 0.01, 0.08, 0.09)])
+
+        assert asyncio.run(main()) == ["done"] * 4
+        assert overlaps == [1, 1, 1, 1]
+        assert os.listdir(lock_dir) == []
+
+if __name__ == "__main__":
+    test_identical_requests_share_one_run()
+    test_cancelled_leader_does_not_cancel_followers()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_lock_files_are_removed_and_still_exclusive(monkeypatch)
+    print("All single-flight tests passed")
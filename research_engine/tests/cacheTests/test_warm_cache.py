@@ -0,0 +1,98 @@
+# test_warm_cache.py - Checks which lookups the off-peak cache warm-up actually serves
+import sys
+import os
+import json
+import asyncio
+import tempfile
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from research_cache import ResearchCache, MemoryBackend
+from idea_similarity import make_cache_key, make_scope
+from knowledge_base import IndustryKnowledgeBase
+from scripts.warm_cache import load_combinations, warm_cache
+
+REAL_IDEA = "A mobile app that reminds patients to take their medications and shares adherence reports with doctors"
+
+class _MarketSizing:
+    """Caches and records like MarketSizingService, without running an agent"""
+
+    def __init__(self, cache, knowledge_base):
+        self.cache = cache
+        self.knowledge_base = knowledge_base
+        self.runs = 0
+
+    async def research_market_size(self, business_idea, industry, product_type, force_refresh=False):
+        key, scope = make_cache_key(business_idea, industry, product_type), make_scope(industry, product_type)
+        cached = await self.cache.get("market_sizing", key, idea=business_idea, scope=scope)
+        if cached:
+            cached["research_method"] = "cached"
+            return cached
+        self.runs += 1
+        result = {"market_data": {"confidence_score": 7, "sources": [
+            {"publisher": "Grand View Research", "report_title": "Medication Adherence Market", "market_size": 3.1}]}}
+        await self.cache.set("market_sizing", key, result, idea=business_idea, scope=scope)
+        await self.knowledge_base.record_market_sizing(industry, product_type, business_idea, result)
+        result["research_method"] = "web_research"
+        return result
+
+def _combinations(entries):
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(entries, f)
+    try:
+        return load_combinations(f.name)
+    finally:
+        os.remove(f.name)
+
+def test_placeholder_ideas_warm_only_the_knowledge_base():
+    """A placeholder idea's cached result misses real ideas; its knowledge base evidence reaches them"""
+    cache = ResearchCache(MemoryBackend())
+    kb = IndustryKnowledgeBase(cache)
+    service = _MarketSizing(cache, kb)
+    combinations = _combinations([{"primaryIndustry": "Healthcare", "productType": "Mobile App"}])
+    assert combinations[0]["placeholder_idea"] is True
+
+    summary = asyncio.run(warm_cache(combinations, ("market_sizing",), market_sizing=service, knowledge_base=kb))
+    assert summary == {"web_research": 1}
+
+    assert cache.get_sync("market_sizing", make_cache_key(REAL_IDEA, "Healthcare", "Mobile App"),
+                          idea=REAL_IDEA, scope=make_scope("Healthcare", "Mobile App")) is None
+    known = asyncio.run(kb.lookup("Healthcare", "Mobile App", REAL_IDEA))
+    assert [s["publisher"] for s in known["sources"]] == ["Grand View Research"]
+
+def test_described_ideas_serve_near_duplicates():
+    """A listed description is cached under its own key, reachable by a reworded submission"""
+    cache = ResearchCache(MemoryBackend())
+    kb = IndustryKnowledgeBase(cache)
+    combinations = _combinations([{"industry": "Healthcare", "product_type": "Mobile App", "description": REAL_IDEA}])
+    assert combinations[0]["placeholder_idea"] is False
+    asyncio.run(warm_cache(combinations, ("market_sizing",), market_sizing=_MarketSizing(cache, kb), knowledge_base=kb))
+
+    reworded = "A mobile app that reminds patients to take their medications and shares adherence reports with their doctors"
+    match = cache.get_sync("market_sizing", make_cache_key(reworded, "Healthcare", "Mobile App"),
+                           idea=reworded, scope=make_scope("Healthcare", "Mobile App"))
+    assert match["cache_match"]["type"] == "near_duplicate"
+
+def test_cached_results_seed_an_empty_knowledge_base_once():
+    """A result cached before the knowledge base existed seeds it, and repeat warm-ups do not recount it"""
+    cache = ResearchCache(MemoryBackend())
+    kb = IndustryKnowledgeBase(cache)
+    combinations = _combinations([{"industry": "Healthcare", "product_type": "Mobile App", "description": REAL_IDEA}])
+    asyncio.run(_MarketSizing(cache, IndustryKnowledgeBase(ResearchCache(MemoryBackend()))).research_market_size(
+        REAL_IDEA, "Healthcare", "Mobile App"))
+
+    service = _MarketSizing(cache, kb)
+    for _ in range(2):
+        summary = asyncio.run(warm_cache(combinations, ("market_sizing",), market_sizing=service, knowledge_base=kb))
+        assert summary == {"cached": 1}
+    assert service.runs == 0
+    document = cache.get_sync("kb_market_sizing", make_cache_key("Healthcare"))
+    assert [entry["seen_count"] for entry in document["sources"]] == [1]
+
+
+if __name__ == "__main__":
+    test_placeholder_ideas_warm_only_the_knowledge_base()
+    test_described_ideas_serve_near_duplicates()
+    test_cached_results_seed_an_empty_knowledge_base_once()
+    print("All cache warm-up tests passed")
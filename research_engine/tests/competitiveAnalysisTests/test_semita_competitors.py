@@ -147,13 +147,13 @@ async def test_comparison_with_without_problem_statement():
     
     try:
         print("🔍 Testing search query generation without problem statement...")
-        queries_without = service._generate_search_queries(business_idea, industry, product_type)
+        queries_without = await service._generate_search_queries(business_idea, industry, product_type)
         print("Generated queries (without problem statement):")
         for i, query in enumerate(queries_without, 1):
             print(f"  {i}. {query}")
         
         print("\n🔍 Testing search query generation WITH problem statement...")
-        queries_with = service._generate_search_queries(business_idea, industry, product_type, problem_statement)
+        queries_with = await service._generate_search_queries(business_idea, industry, product_type, problem_statement)
         print("Generated queries (with problem statement):")
         for i, query in enumerate(queries_with, 1):
             print(f"  {i}. {query}")
@@ -0,0 +1,83 @@
+# test_agent_compaction.py - Checks long agent runs keep a bounded message history
+import sys
+import os
+import asyncio
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+
+from browser_use import Agent
+from langchain_core.messages import AIMessage, HumanMessage
+
+import agent_compaction
+from agent_compaction import HistoryCompactor, SUMMARY_PREFIX, internals_supported
+from fake_llm import ScriptedChatModel
+from llm_provider import get_agent_llm_options
+
+STEPS = 30
+
+def _agent():
+    llm = ScriptedChatModel.from_script(latency_mean=0, latency_distribution="constant")
+    return Agent(task="Conduct market sizing research for the business idea: AI tool for validating startup ideas",
+                 llm=llm, **get_agent_llm_options(llm))
+
+def _run_steps(agent, compactor):
+    """Replay what each step leaves in the history: the model output, its tool reply and the extracted page"""
+    message_manager = agent._message_manager
+    tokens = []
+    for step in range(1, STEPS + 1):
+        agent.state.n_steps = step
+        asyncio.run(compactor(agent))
+        tokens.append(message_manager.state.history.current_tokens)
+        message_manager._add_message_with_tokens(AIMessage(content="", tool_calls=[{
+            "name": "AgentOutput", "id": str(step), "type": "tool_call",
+            "args": {"current_state": {"memory": f"Visited report {step}"}, "action": []},
+        }]))
+        message_manager.add_tool_message(content="")
+        message_manager._add_message_with_tokens(HumanMessage(
+            content=f"Action result: Report {step} sizes the market at ${step}B. " + "Market detail. " * 150))
+    return tokens
+
+def test_history_tokens_stay_bounded():
+    """Without compaction the history grows every step; with it the late steps stay flat"""
+    uncompacted = _run_steps(_agent(), HistoryCompactor({"enabled": False}))
+    compactor = HistoryCompactor()
+    compacted = _run_steps(_agent(), compactor)
+
+    assert uncompacted[-1] > 2 * uncompacted[9]
+    assert max(compacted[9:]) < uncompacted[12]
+    assert max(compacted[-6:]) <= max(compacted[9:15]) * 1.1
+    assert compactor.compactions > 0 and compactor.tokens_saved > 0
+
+def test_summary_keeps_facts_and_init_messages():
+    """Compacted steps leave their facts in one summary after the untouched init messages"""
+    agent = _agent()
+    init = [m.message for m in agent._message_manager.state.history.messages]
+    _run_steps(agent, HistoryCompactor())
+
+    history = agent._message_manager.state.history
+    messages = [m.message for m in history.messages]
+    assert messages[:len(init)] == init
+    summaries = [m for m in messages if str(m.content).startswith(SUMMARY_PREFIX)]
+    assert len(summaries) == 1
+    assert "Visited report" in summaries[0].content and "sizes the market" in summaries[0].content
+    assert history.current_tokens == sum(m.metadata.tokens for m in history.messages)
+
+def test_unsupported_browser_use_disables_compaction():
+    """An unknown Browser-Use release leaves the history untouched instead of corrupting it"""
+    assert internals_supported()
+    supported = agent_compaction.SUPPORTED_BROWSER_USE
+    agent_compaction.SUPPORTED_BROWSER_USE = ("99.",)
+    try:
+        compactor = HistoryCompactor()
+    finally:
+        agent_compaction.SUPPORTED_BROWSER_USE = supported
+    assert compactor.policy["enabled"] is False
+
+if __name__ == "__main__":
+    test_history_tokens_stay_bounded()
+    test_summary_keeps_facts_and_init_messages()
+    test_unsupported_browser_use_disables_compaction()
+    print("All agent compaction tests passed!")
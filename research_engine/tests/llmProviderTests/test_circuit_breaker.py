@@ -0,0 +1,220 @@
+# test_circuit_breaker.py - Checks the per-provider circuit breaker state machine
+import sys
+import os
+import time
+import asyncio
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from browser_use import Agent
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI
+
+from fake_llm import ScriptedChatModel
+from llm_provider import (CircuitBreaker, CircuitBreakerCallbackHandler, CircuitOpenError, ProviderFallbackChatModel,
+                          ResilientLLM, create_chat_model, get_agent_llm_options, get_circuit_breaker)
+
+def test_opens_on_failure_rate():
+    """Breaker opens once the rolling failure rate crosses the threshold"""
+    breaker = CircuitBreaker("test", min_calls=4, failure_rate_threshold=0.5, open_timeout=60)
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+def test_opens_on_slow_calls():
+    """Breaker opens when most calls in the window are slow"""
+    breaker = CircuitBreaker("test", min_calls=3, slow_call_seconds=1.0, slow_call_rate_threshold=0.6)
+    for _ in range(3):
+        breaker.record_success(5.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_half_open_probe_recovers():
+    """After the timeout a single probe is allowed and a success closes the circuit"""
+    breaker = CircuitBreaker("test", min_calls=1, open_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one probe at a time
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_probe_failure_reopens():
+    """A failed probe puts the breaker straight back to OPEN"""
+    breaker = CircuitBreaker("test", min_calls=1, open_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+def _half_open(breaker):
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+def test_cancelled_probe_releases_slot():
+    """A half-open probe cancelled mid-call frees its slot instead of blocking every later probe"""
+    llm = ResilientLLM(max_retries=1, breaker_config={"min_calls": 1, "open_timeout": 0.05})
+    _half_open(llm.primary_breaker)
+
+    async def hang(model):
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(llm.with_fallback(hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+            assert False
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert llm.primary_breaker.state == CircuitBreaker.HALF_OPEN
+    assert llm.primary_breaker.allow_request()
+
+def test_service_models_go_through_breaker():
+    """Models from create_chat_model share the provider breaker; an open circuit refuses calls"""
+    model = create_chat_model(provider="fake")
+    handlers = [h for h in model.callbacks if isinstance(h, CircuitBreakerCallbackHandler)]
+    assert handlers and handlers[0].breaker is get_circuit_breaker("fake")
+    assert not any(isinstance(h, CircuitBreakerCallbackHandler) for h in create_chat_model(provider="fake", use_breaker=False).callbacks or [])
+
+    breaker = CircuitBreaker("test", min_calls=1, open_timeout=0.05)
+    model = ScriptedChatModel.from_script(latency_mean=0, latency_distribution="constant",
+                                          callbacks=[CircuitBreakerCallbackHandler(breaker)])
+    model.invoke([HumanMessage(content="hello")])
+    assert breaker.stats()["calls_in_window"] == 1
+    breaker.record_failure()
+    try:
+        model.invoke([HumanMessage(content="hello")])
+        assert False
+    except CircuitOpenError:
+        pass
+    time.sleep(0.06)
+    asyncio.run(model.ainvoke([HumanMessage(content="hello")]))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_cancelled_model_probe_releases_slot():
+    """A cancelled async model call holding the half-open slot gives it back"""
+    breaker = CircuitBreaker("test", min_calls=1, open_timeout=0.05)
+    model = ScriptedChatModel.from_script(latency_mean=10, latency_distribution="constant",
+                                          callbacks=[CircuitBreakerCallbackHandler(breaker)])
+    _half_open(breaker)
+
+    async def run():
+        task = asyncio.create_task(model.ainvoke([HumanMessage(content="hello")]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+def test_probe_outside_a_task_is_allowed():
+    """A half-open probe started from a loop callback, where there is no current task, still goes through"""
+    breaker = CircuitBreaker("test", min_calls=1, open_timeout=0.05)
+    handler = CircuitBreakerCallbackHandler(breaker)
+    _half_open(breaker)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        def start():
+            assert asyncio.current_task() is None
+            handler.on_chat_model_start({}, [[HumanMessage(content="hello")]], run_id="probe")
+            started.set_result(None)
+        loop.call_soon(start)
+        await started
+
+    asyncio.run(run())
+    handler.on_llm_end(None, run_id="probe")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def _guarded(breaker, answer=None):
+    """Fake model behind ``breaker``; answers ``answer`` to everything, else replays the default script"""
+    kwargs = {"latency_mean": 0, "latency_distribution": "constant",
+              "callbacks": [CircuitBreakerCallbackHandler(breaker)]}
+    if answer:
+        return ScriptedChatModel(default_response=answer, **kwargs)
+    return ScriptedChatModel.from_script(**kwargs)
+
+def test_open_circuit_falls_back_to_next_provider():
+    """Calls refused by an open circuit are answered by the next provider, and go back once it closes"""
+    primary_breaker = CircuitBreaker("primary", min_calls=1, open_timeout=0.05)
+    fallback_breaker = CircuitBreaker("fallback", min_calls=1)
+    llm = ProviderFallbackChatModel(models=[_guarded(primary_breaker, "primary"),
+                                            _guarded(fallback_breaker, "fallback")])
+    assert llm.invoke([HumanMessage(content="hello")]).content == "primary"
+
+    primary_breaker.record_failure()
+    assert llm.invoke([HumanMessage(content="hello")]).content == "fallback"
+    assert asyncio.run(llm.ainvoke([HumanMessage(content="hello")])).content == "fallback"
+    assert fallback_breaker.stats()["calls_in_window"] == 2
+
+    time.sleep(0.06)
+    assert llm.invoke([HumanMessage(content="hello")]).content == "primary"
+    assert primary_breaker.state == CircuitBreaker.CLOSED
+
+def test_agent_runs_on_fallback_provider():
+    """A Browser-Use agent keeps working on the fallback while the primary circuit is open"""
+    primary_breaker, fallback_breaker = CircuitBreaker("primary", min_calls=1), CircuitBreaker("fallback", min_calls=1)
+    primary_breaker.record_failure()
+    llm = ProviderFallbackChatModel(models=[_guarded(primary_breaker), _guarded(fallback_breaker)])
+    agent = Agent(task="Conduct market sizing research for the business idea: AI tool for validating startup ideas",
+                  llm=llm, **get_agent_llm_options(llm))
+    output = asyncio.run(agent.get_next_action(agent._message_manager.get_messages()))
+    assert "done" in output.action[0].model_dump(exclude_unset=True)
+    assert primary_breaker.stats()["calls_in_window"] == 0
+    assert fallback_breaker.stats()["calls_in_window"] >= 1
+
+def test_openai_models_fall_back_to_anthropic():
+    """With an Anthropic key, service models put Anthropic behind OpenAI, each on its shared breaker"""
+    saved = os.environ.pop("ANTHROPIC_API_KEY", None)
+    try:
+        assert isinstance(create_chat_model(api_key="sk-test", provider="openai"), ChatOpenAI)
+        os.environ["ANTHROPIC_API_KEY"] = "sk-ant-test"
+        llm = create_chat_model(api_key="sk-test", provider="openai")
+        assert isinstance(create_chat_model(api_key="sk-test", provider="openai", use_breaker=False), ChatOpenAI)
+    finally:
+        os.environ.pop("ANTHROPIC_API_KEY", None)
+        if saved is not None:
+            os.environ["ANTHROPIC_API_KEY"] = saved
+
+    primary, fallback = llm.models
+    assert isinstance(primary, ChatOpenAI) and isinstance(fallback, ChatAnthropic)
+    breakers = [[h.breaker for h in model.callbacks if isinstance(h, CircuitBreakerCallbackHandler)]
+                for model in llm.models]
+    assert breakers == [[get_circuit_breaker("openai")], [get_circuit_breaker("anthropic")]]
+    assert llm.model_name == primary.model_name
+    assert get_agent_llm_options(llm) == {"tool_calling_method": "function_calling"}
+
+if __name__ == "__main__":
+    test_opens_on_failure_rate()
+    test_opens_on_slow_calls()
+    test_half_open_probe_recovers()
+    test_half_open_probe_failure_reopens()
+    test_cancelled_probe_releases_slot()
+    test_service_models_go_through_breaker()
+    test_cancelled_model_probe_releases_slot()
+    test_probe_outside_a_task_is_allowed()
+    test_open_circuit_falls_back_to_next_provider()
+    test_agent_runs_on_fallback_provider()
+    test_openai_models_fall_back_to_anthropic()
+    print("✅ Circuit breaker tests passed")
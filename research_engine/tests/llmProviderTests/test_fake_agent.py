@@ -0,0 +1,40 @@
+# test_fake_agent.py - Checks a real Browser-Use Agent runs offline on the fake model
+import sys
+import os
+import asyncio
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+os.environ.setdefault("ANONYMIZED_TELEMETRY", "false")
+
+from browser_use import Agent
+
+from fake_llm import ScriptedChatModel
+from llm_provider import get_agent_llm_options
+
+TASK = "Conduct market sizing research for the business idea: AI tool for validating startup ideas"
+
+def _fake_model():
+    return ScriptedChatModel.from_script(latency_mean=0, latency_distribution="constant")
+
+def test_agent_passes_connection_probe():
+    """Constructing an Agent answers Browser-Use's model probe instead of raising ConnectionError"""
+    llm = _fake_model()
+    agent = Agent(task=TASK, llm=llm, **get_agent_llm_options(llm))
+    assert agent.tool_calling_method == "raw"
+
+def test_agent_step_returns_done_action():
+    """One model step of the agent parses the scripted done action and its recorded result"""
+    llm = _fake_model()
+    agent = Agent(task=TASK, llm=llm, **get_agent_llm_options(llm))
+    output = asyncio.run(agent.get_next_action(agent._message_manager.get_messages()))
+    action = output.action[0].model_dump(exclude_unset=True)
+    assert "done" in action
+    assert action["done"]["success"] is True
+    assert "market_data" in action["done"]["text"]
+
+if __name__ == "__main__":
+    test_agent_passes_connection_probe()
+    test_agent_step_returns_done_action()
+    print("All fake agent tests passed!")
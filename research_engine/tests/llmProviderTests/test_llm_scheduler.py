@@ -0,0 +1,125 @@
+# test_llm_scheduler.py - Checks the token buckets, header syncing and fair queuing of LLM calls
+import sys
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from llm_scheduler import LLMScheduler, TokenBucket, begin_analysis, _parse_reset
+
+def test_bucket_refills_up_to_capacity():
+    """A drained bucket refills at its rate and never past its capacity"""
+    bucket = TokenBucket(10, 5)
+    bucket.consume(10)
+    assert abs(bucket.wait_time(5) - 1.0) < 0.05
+
+    bucket._updated -= 1
+    assert abs(bucket.wait_time(8) - 0.6) < 0.05
+    bucket._updated -= 60
+    assert bucket.wait_time(10) == 0
+    assert bucket.tokens == 10
+
+def test_bucket_limits_and_refunds():
+    """Oversized calls wait for a full bucket, refunds are capped, and blocks hold every call"""
+    bucket = TokenBucket(10, 5)
+    assert bucket.wait_time(50) == 0
+    bucket.consume(4)
+    assert abs(bucket.wait_time(50) - 0.8) < 0.05
+    bucket.consume(-100)
+    assert bucket.tokens == 10
+
+    bucket.block_for(2)
+    assert 1.9 < bucket.wait_time(1) <= 2
+
+def test_parse_reset_formats():
+    """Duration strings, RFC 3339 and Unix timestamps all become seconds from now"""
+    assert _parse_reset("1m30s") == 90
+    assert abs(_parse_reset("6ms") - 0.006) < 1e-9
+    assert _parse_reset("1h2m3.5s") == 3723.5
+    assert _parse_reset("20") == 20
+    assert _parse_reset(None) is None
+    assert _parse_reset("soon") is None
+
+    in_a_minute = (datetime.now(timezone.utc) + timedelta(seconds=60)).isoformat().replace("+00:00", "Z")
+    assert 58 < _parse_reset(in_a_minute) <= 60
+    assert 28 < _parse_reset(str(int(time.time()) + 30)) <= 31
+    assert _parse_reset("2020-01-01T00:00:00Z") == 0
+
+def test_headers_sync_buckets():
+    """OpenAI and Anthropic rate-limit headers correct the buckets and block on exhaustion"""
+    scheduler = LLMScheduler({"openai": {"rpm": 500, "tpm": 30000}, "anthropic": {"rpm": 50, "tpm": 40000}})
+    scheduler.update_from_headers("openai", {
+        "x-ratelimit-limit-requests": "100",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "1m30s",
+        "x-ratelimit-remaining-tokens": "1200",
+    })
+    limits = scheduler._provider("openai")
+    assert limits.requests.capacity == 100
+    assert 89 < limits.requests.wait_time(1) <= 90
+    assert limits.tokens.tokens <= 1200
+
+    reset = (datetime.now(timezone.utc) + timedelta(seconds=30)).isoformat()
+    scheduler.update_from_headers("anthropic", {
+        "Anthropic-RateLimit-Tokens-Remaining": "0",
+        "Anthropic-RateLimit-Tokens-Reset": reset,
+    })
+    assert 28 < scheduler._provider("anthropic").tokens.wait_time(1) <= 30
+
+    scheduler.update_from_headers("anthropic", {"retry-after": "5"})
+    assert 4.9 < scheduler._provider("anthropic").requests.wait_time(1) <= 5
+
+def test_analyses_take_turns():
+    """A second analysis is interleaved with a busy one instead of waiting behind all of its calls"""
+    scheduler = LLMScheduler({"test": {"rpm": 1200, "tpm": 10 ** 6}})
+    scheduler._provider("test").requests.consume(1200)
+    order = []
+
+    async def call(name):
+        await scheduler.acquire("test", 10)
+        order.append(name)
+
+    async def analysis(name, calls, delay):
+        begin_analysis(name)
+        await asyncio.sleep(delay)
+        await asyncio.gather(*(call(name) for _ in range(calls)))
+
+    async def run():
+        await asyncio.gather(analysis("busy", 6, 0), analysis("quick", 2, 0.01))
+
+    started = time.monotonic()
+    asyncio.run(run())
+    # 20 requests a second from an empty bucket: paced by the deficit, not a poll
+    assert 0.35 < time.monotonic() - started < 0.8
+    assert order == ["busy", "quick", "busy", "quick", "busy", "busy", "busy", "busy"]
+    assert scheduler.stats()[0]["waiting_calls"] == 0
+
+def test_cancelled_head_lets_next_call_go():
+    """Cancelling the call at the head of the queue wakes the one behind it"""
+    scheduler = LLMScheduler({"test": {"rpm": 60, "tpm": 10 ** 6}})
+    scheduler._provider("test").requests.consume(60)
+
+    async def run():
+        head = asyncio.create_task(scheduler.acquire("test", 10, analysis_id="a"))
+        await asyncio.sleep(0.01)
+        behind = asyncio.create_task(scheduler.acquire("test", 10, analysis_id="b"))
+        await asyncio.sleep(0.01)
+        # Capacity returns silently while the head sleeps out its one-second deficit
+        scheduler._provider("test").requests.consume(-1)
+        head.cancel()
+        await asyncio.wait_for(behind, timeout=0.5)
+
+    asyncio.run(run())
+    assert scheduler._waiters == {}
+
+if __name__ == "__main__":
+    test_bucket_refills_up_to_capacity()
+    test_bucket_limits_and_refunds()
+    test_parse_reset_formats()
+    test_headers_sync_buckets()
+    test_analyses_take_turns()
+    test_cancelled_head_lets_next_call_go()
+    print("All LLM scheduler tests passed")
@@ -0,0 +1,71 @@
+# test_speculative_search.py - Checks the speculative browser warm-up and search query merging
+import sys
+import os
+import asyncio
+import logging
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from browser_config_fix import merge_search_queries, warm_up_browser
+
+class _Page:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.visited = []
+
+    async def goto(self, url, **kwargs):
+        if self.fail:
+            raise TimeoutError("Timeout 15000ms exceeded")
+        self.visited.append(url)
+
+class _Session:
+    """Stands in for a Browser-Use session that can fail to start or to load the page"""
+
+    def __init__(self, fail_start=False, fail_goto=False):
+        self.fail_start = fail_start
+        self.page = _Page(fail_goto)
+
+    async def start(self):
+        if self.fail_start:
+            raise RuntimeError("Chromium failed to launch")
+
+    async def get_current_page(self):
+        return self.page
+
+def test_merge_keeps_speculative_first_without_duplicates():
+    """Speculative queries lead, and repeats differing only in case or spacing are dropped"""
+    merged = merge_search_queries(
+        ["clinic scheduling market size", "Dental  Software Market", "patient reminder apps"],
+        ["dental software market", "Clinic scheduling market size"])
+    assert merged == ["dental software market", "Clinic scheduling market size", "patient reminder apps"]
+    assert merge_search_queries(["", "  ", "a"], []) == ["a"]
+
+def test_merge_respects_limit():
+    """Only the first queries up to the limit are kept, counting speculative ones"""
+    speculative = [f"speculative {i}" for i in range(3)]
+    llm = [f"generated {i}" for i in range(10)]
+    assert merge_search_queries(llm, speculative) == speculative + llm[:6]
+    assert merge_search_queries(llm, speculative, limit=2) == speculative[:2]
+
+def test_warm_up_opens_the_search():
+    """A successful warm-up opens the encoded search for the query"""
+    session = _Session()
+    assert asyncio.run(warm_up_browser(session, "clinic scheduling & billing")) is True
+    assert session.page.visited == ["https://duckduckgo.com/?q=clinic+scheduling+%26+billing"]
+
+def test_warm_up_failures_are_logged_not_raised(caplog):
+    """A browser that will not start or load returns False and logs a warning instead of failing the analysis"""
+    with caplog.at_level(logging.WARNING, logger="browser_config_fix"):
+        assert asyncio.run(warm_up_browser(_Session(fail_start=True), "query")) is False
+        assert asyncio.run(warm_up_browser(_Session(fail_goto=True), "query")) is False
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 2
+    assert "Chromium failed to launch" in messages[0] and "Timeout" in messages[1]
+
+if __name__ == "__main__":
+    test_merge_keeps_speculative_first_without_duplicates()
+    test_merge_respects_limit()
+    test_warm_up_opens_the_search()
+    assert asyncio.run(warm_up_browser(_Session(fail_start=True), "query")) is False
+    print("All speculative search tests passed")
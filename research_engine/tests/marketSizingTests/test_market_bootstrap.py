@@ -0,0 +1,82 @@
+# test_market_bootstrap.py - Checks bootstrap confidence intervals over market data sources
+import sys
+import os
+import json
+import math
+import time
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from market_bootstrap import bootstrap_batch, bootstrap_result, _growth_rate
+
+def _source(publisher, size, growth_rate=None, year=2023):
+    return {"publisher": publisher, "market_size": size, "market_size_unit": "billion",
+            "base_year": year, "growth_rate": growth_rate}
+
+def test_interval_brackets_the_mean():
+    batch = bootstrap_batch([[1.0, 2.0, 3.0, 4.0], [10.0, float("nan"), 12.0], [5.0], []])
+    assert list(batch["count"]) == [4, 2, 1, 0]
+    assert batch["estimate"][0] == 2.5 and batch["estimate"][1] == 11.0
+    assert 1.0 <= batch["low"][0] < 2.5 < batch["high"][0] <= 4.0
+    assert 10.0 <= batch["low"][1] < batch["high"][1] <= 12.0
+    # One value resamples to itself, so it gets no interval
+    assert batch["estimate"][2] == 5.0 and batch["low"][2] != batch["low"][2]
+    assert batch["estimate"][3] != batch["estimate"][3]
+
+def test_wider_level_gives_wider_interval():
+    values = [[3.1, 4.7, 5.2, 6.0, 8.4]]
+    narrow = bootstrap_batch(values, level=0.5)
+    wide = bootstrap_batch(values, level=0.95)
+    assert wide["low"][0] < narrow["low"][0] and narrow["high"][0] < wide["high"][0]
+    assert bootstrap_batch(values, seed=1)["low"][0] == bootstrap_batch(values, seed=1)["low"][0]
+    for bad in ({"level": 1.5}, {"resamples": 0}):
+        try:
+            bootstrap_batch(values, **bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_result_block_skips_outliers():
+    result = {"market_data": {"sources": [
+        _source("A", 4.0, 12.0), _source("B", 5.0, "15.5%"), _source("C", 6.0), _source("D", 150.0, 40.0),
+    ]}}
+    block = bootstrap_result(result)
+    assert result["market_data"]["confidence_intervals"] is block
+    assert block["tam_usd"]["sources"] == 3  # D is flagged as an outlier
+    assert 4e9 < block["tam_usd"]["low"] < block["tam_usd"]["estimate"] < block["tam_usd"]["high"] < 6e9
+    assert block["growth_rate"]["sources"] == 2 and block["growth_rate"]["estimate"] == 13.75
+    assert block["price_year"] == 2023
+
+def test_growth_rate_reads_the_percentage():
+    """The figure next to "%" is the rate; years, bare non-numbers and absurd values are not"""
+    assert _growth_rate("CAGR 2023-2030: 12.5%") == 12.5
+    assert _growth_rate("-3.2 % annually") == -3.2
+    assert _growth_rate(" 8.1 ") == 8.1 and _growth_rate(7) == 7.0
+    for value in ("from 2023 to 2030", "high", None, True, 2023, "450%"):
+        assert math.isnan(_growth_rate(value))
+
+def test_block_is_optional():
+    result = {"market_data": {"sources": [_source("A", 4.0, 12.0)]}}
+    assert bootstrap_result(result) is None and "confidence_intervals" not in result["market_data"]
+    assert bootstrap_result({"market_data": {"sources": [_source("A", 4.0), _source("B", 5.0)]}}, resamples=0) is None
+    assert bootstrap_result({"status": "error"}) is None
+
+def test_resampling_is_cheap():
+    result = {"market_data": {"sources": [_source(str(i), 3.0 + i, 10.0 + i) for i in range(8)]}}
+    bootstrap_result(result)
+    started = time.perf_counter()
+    for _ in range(20):
+        bootstrap_result(result, resamples=5000)
+    assert (time.perf_counter() - started) / 20 < 0.05
+    json.dumps(result)
+
+
+if __name__ == "__main__":
+    test_interval_brackets_the_mean()
+    test_wider_level_gives_wider_interval()
+    test_result_block_skips_outliers()
+    test_growth_rate_reads_the_percentage()
+    test_block_is_optional()
+    test_resampling_is_cheap()
+    print("All market bootstrap tests passed")
@@ -0,0 +1,83 @@
+# test_market_normalization.py - Checks market size parsing and USD normalization
+import sys
+import os
+import time
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from market_normalization import (parse_market_size, normalize_market_size, normalize_sources,
+                                  normalize_batch, split_unit, CURRENCY_PER_USD, TABLE_FIRST_YEAR)
+
+def test_parses_common_notations():
+    cases = {
+        "USD 4.5B": (4.5e9, "USD"),
+        "€3,2 Mrd": (3.2e9, "EUR"),
+        "$450M": (4.5e8, "USD"),
+        "US$ 12.3bn": (1.23e10, "USD"),
+        "£800m": (8e8, "GBP"),
+        "₹1,200 crore": (1.2e10, "INR"),
+        "$3,900 million (2023)": (3.9e9, "USD"),
+        "3.2 billion EUR": (3.2e9, "EUR"),
+        "450,000,000": (4.5e8, "USD"),
+    }
+    for text, (value, currency) in cases.items():
+        parsed = parse_market_size(text)
+        assert abs(parsed["value"] - value) < 1, text
+        assert parsed["currency"] == currency, text
+
+def test_ranges_and_non_amounts():
+    for text in ("$4.5-5.2 billion", "$4.5B to $5.2B", "between USD 4.5 and 5.2 billion"):
+        parsed = parse_market_size(text)
+        assert (parsed["low"], parsed["high"]) == (4.5e9, 5.2e9), text
+    assert parse_market_size("$5.2 billion by 2030")["high"] == 5.2e9
+    assert parse_market_size("$5.2B and 15% growth")["high"] == 5.2e9
+    for text in ("Not Found", "15.8% CAGR (2024-2030)", "B2B market since 2023", "7.8", None):
+        assert parse_market_size(text) is None, text
+
+def test_keeps_quoted_unit():
+    parsed = parse_market_size("$3,900 million")
+    assert split_unit(parsed["value"], parsed["scale"]) == (3900.0, "million")
+    parsed = parse_market_size("₹1,200 crore")
+    assert split_unit(parsed["value"], parsed["scale"]) == (12.0, "billion")
+
+def test_currency_and_inflation_conversion():
+    eur = normalize_market_size("€1 billion (2022)")
+    assert eur["base_year"] == 2022 and eur["currency"] == "EUR"
+    assert abs(eur["value_usd"] - 1e9 / CURRENCY_PER_USD["EUR"][2022 - TABLE_FIRST_YEAR]) < 1
+    # Restating in later dollars inflates; the same year is a no-op
+    usd = normalize_market_size("$1 billion (2020)", price_year=2024)
+    assert usd["value_usd"] > 1.2e9 and usd["price_year"] == 2024
+    assert normalize_market_size("$1 billion (2020)", price_year=2020)["value_usd"] == 1e9
+
+def test_normalize_sources_batch():
+    sources = [
+        {"market_size": 5.2, "market_size_unit": "billion", "base_year": 2023},
+        {"market_size": "€3,2 Mrd", "publication_date": "2021-06-01"},
+        {"market_size": 4.5, "market_size_low": 4.0, "market_size_high": 5.0, "market_size_unit": "USD bn"},
+        {"market_size": None},
+        "not a source",
+    ]
+    normalized = normalize_sources(sources)
+    assert normalized[0]["value_usd"] == 5.2e9 and normalized[0]["base_year"] == 2023
+    assert normalized[1]["currency"] == "EUR" and normalized[1]["base_year"] == 2021
+    assert (normalized[2]["low_usd"], normalized[2]["high_usd"]) == (4e9, 5e9)
+    assert normalized[3] is None and normalized[4] is None
+
+def test_batch_conversion_is_vectorized():
+    n = 200000
+    started = time.perf_counter()
+    batch = normalize_batch([1e9] * n, ["EUR", "GBP", "USD", "XXX"] * (n // 4), [2019, None, 2030, 2020] * (n // 4), price_year=2024)
+    assert time.perf_counter() - started < 2.0
+    assert batch["value_usd"].shape == (n,)
+    assert batch["value_usd"][3] != batch["value_usd"][3]  # unknown currency gives NaN
+
+
+if __name__ == "__main__":
+    test_parses_common_notations()
+    test_ranges_and_non_amounts()
+    test_keeps_quoted_unit()
+    test_currency_and_inflation_conversion()
+    test_normalize_sources_batch()
+    test_batch_conversion_is_vectorized()
+    print("All market normalization tests passed")
@@ -0,0 +1,95 @@
+# test_market_reconciliation.py - Checks consensus estimates, outlier flags and batch re-scoring
+import sys
+import os
+import time
+import random
+import tempfile
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from market_reconciliation import reconcile_sizes, reconcile_batch, reconcile_results, reconcile_result
+from research_cache import ResearchCache, FileBackend
+from scripts.rescore_cache import rescore_namespace
+
+def _source(publisher, size, year=2023, unit="billion"):
+    return {"publisher": publisher, "market_size": size, "market_size_unit": unit, "base_year": year}
+
+def test_flags_order_of_magnitude_outliers():
+    """$36B next to two ~$1B estimates is an outlier; a 4x spread is not"""
+    reconciled = reconcile_sizes([1e9, 1.2e9, 36e9])
+    assert reconciled["outliers"] == [2] and reconciled["sources_used"] == 2
+    assert 1e9 < reconciled["consensus_usd"] < 1.2e9
+    assert reconcile_sizes([1e9, 2e9, 4e9])["outliers"] == []
+    assert reconcile_sizes([5e9, 5e9, 6e9])["outliers"] == []
+    assert reconcile_sizes([5.2e9, 7.8e9, 3.9e9, 4.4e9, 60e9])["outliers"] == [4]
+
+def test_consensus_is_geometric_mean_with_dispersion():
+    reconciled = reconcile_sizes([1e9, 4e9])
+    assert round(reconciled["consensus_usd"]) == 2e9
+    assert reconciled["median_usd"] == 2.5e9
+    assert reconciled["range_usd"] == [1e9, 4e9] and reconciled["dispersion"]["spread_ratio"] == 4.0
+    assert reconcile_sizes([5e9])["agreement"] == "single_source"
+    empty = reconcile_sizes([])
+    assert empty["agreement"] == "no_data" and empty["consensus_usd"] is None
+
+def test_batch_matches_one_at_a_time():
+    random.seed(7)
+    groups = [[random.lognormvariate(21, 1.5) for _ in range(random.randint(0, 9))] for _ in range(300)]
+    batch = reconcile_batch(groups)
+    for row in range(0, 300, 37):
+        single = reconcile_sizes(groups[row])
+        assert single["sources_used"] == int(batch["used"][row])
+        if single["consensus_usd"] is not None:
+            assert abs(single["consensus_usd"] - batch["consensus"][row]) <= 1
+
+def test_results_gain_reconciliation_and_flags():
+    result = {"market_data": {"sources": [
+        _source("A", 1.0, 2020), _source("B", 1.1, 2022), _source("C", 30, 2022),
+        {"publisher": "D", "market_size": None},
+    ]}}
+    reconciliation = reconcile_result(result)
+    assert result["market_data"]["reconciliation"] is reconciliation
+    assert reconciliation["price_year"] == 2022
+    assert [s["outlier"] for s in result["market_data"]["sources"]] == [False, False, True, False]
+    assert reconciliation["outliers"][0]["publisher"] == "C"
+    # A's 2020 dollars are restated in 2022 dollars before comparing
+    assert reconciliation["range_usd"][0] > 1.0e9
+    assert reconcile_results([{"status": "error"}, result])[0] is None
+
+def test_thousands_of_results_batch_quickly():
+    random.seed(3)
+    results = [{"market_data": {"sources": [_source(str(j), random.lognormvariate(1, 0.7), random.choice([2021, 2022, 2023]))
+                                            for j in range(random.randint(0, 8))]}} for _ in range(3000)]
+    started = time.perf_counter()
+    reconciliations = reconcile_results(results)
+    assert time.perf_counter() - started < 5.0
+    assert all("reconciliation" in result["market_data"] for result in results)
+    assert len(reconciliations) == 3000
+
+def test_rescore_keeps_store_time():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FileBackend(tmp_dir)
+        cache = ResearchCache(backend)
+        stored_at = time.time() - 3600
+        backend.set("market_sizing", "k", {"market_data": {"sources": [_source("A", 1), _source("B", 1.2), _source("C", 36)]}}, stored_at)
+
+        assert rescore_namespace(cache, "market_sizing", dry_run=True)["with_outliers"] == 1
+        assert "reconciliation" not in backend.get("market_sizing", "k")[0]["market_data"]
+
+        summary = rescore_namespace(cache, "market_sizing", batch_size=1)
+        # Three unattributed sources score below the cache threshold, so the entry moves tier
+        assert summary["demoted"] == 1 and backend.get("market_sizing", "k") is None
+        value, rewritten_at = backend.get("lowconf_market_sizing", "k")
+        assert summary["reconciled"] == 1 and value["market_data"]["reconciliation"]["sources_used"] == 2
+        assert abs(rewritten_at - stored_at) < 1
+
+
+if __name__ == "__main__":
+    test_flags_order_of_magnitude_outliers()
+    test_consensus_is_geometric_mean_with_dispersion()
+    test_batch_matches_one_at_a_time()
+    test_results_gain_reconciliation_and_flags()
+    test_thousands_of_results_batch_quickly()
+    test_rescore_keeps_store_time()
+    print("All market reconciliation tests passed")
@@ -0,0 +1,64 @@
+# test_market_sensitivity.py - Checks tornado rankings, scenarios and threshold answers
+import sys
+import os
+import time
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from market_sensitivity import sensitivity_analysis, ASSUMPTIONS
+
+def test_tornado_is_ranked_by_swing():
+    analysis = sensitivity_analysis(5e9)
+    tornado = analysis["tornado"]
+    assert sorted(entry["assumption"] for entry in tornado) == sorted(ASSUMPTIONS)
+    swings = [entry["swing"] for entry in tornado]
+    assert swings == sorted(swings, reverse=True)
+    # segments defaults to 1.0 and cannot go higher, so it swings least
+    assert tornado[-1]["assumption"] == "segments" and tornado[-1]["high_value"] == 1.0
+    assert tornado[0]["swing_pct"] == 40.0
+
+def test_scenarios_bracket_the_base():
+    analysis = sensitivity_analysis(5e9, {"geographic": 0.5, "conversion": [0.02, 0.04, 0.1]})
+    base = analysis["base"]
+    assert base["sam"] == round(5e9 * 0.5 * 1.0 * 0.7)
+    assert base["som"] == round(base["sam"] * 0.03 * 0.15 * 0.04)
+    scenarios = analysis["scenarios"]
+    assert scenarios["conservative"]["som"] < scenarios["moderate"]["som"] == base["som"] < scenarios["optimistic"]["som"]
+
+def test_thresholds_work_backwards_from_target():
+    analysis = sensitivity_analysis(5e9, targets_usd=[100_000_000, 200_000])
+    big, small = analysis["thresholds"]
+    som = analysis["base"]["som"]
+    assert big["target_usd"] == 100_000_000
+    assert abs(big["required_penetration"] * analysis["base"]["sam"] - 1e8) < 1e3
+    assert abs(big["required"]["tam"]["value"] - 5e9 * 1e8 / som) < 1e3
+    assert big["required"]["conversion"]["achievable"] is False
+    assert small["required"]["conversion"]["achievable"] is True
+    assert abs(small["required"]["conversion"]["value"] - 0.05 * 200_000 / som) < 1e-6
+
+def test_rejects_bad_models():
+    for args, options in (((0,), {}), ((5e9,), {"variation": 1.5}), ((5e9,), {"targets_usd": [0]}),
+                          ((5e9, {"churn": 0.1}), {}), ((5e9, {"conversion": 0}), {}),
+                          ((float("inf"),), {}), ((float("nan"),), {}), ((5e9,), {"targets_usd": [float("inf")]}),
+                          ((5e9, {"conversion": float("nan")}), {}), ((5e9, {"geographic": [0.1, float("inf")]}), {})):
+        try:
+            sensitivity_analysis(*args, **options)
+            assert False, (args, options)
+        except ValueError:
+            pass
+
+def test_fast_enough_for_a_slider():
+    started = time.perf_counter()
+    for step in range(200):
+        sensitivity_analysis(5e9, {"conversion": 0.01 + step / 10000})
+    assert (time.perf_counter() - started) / 200 < 0.01
+
+
+if __name__ == "__main__":
+    test_tornado_is_ranked_by_swing()
+    test_scenarios_bracket_the_base()
+    test_thresholds_work_backwards_from_target()
+    test_rejects_bad_models()
+    test_fast_enough_for_a_slider()
+    print("All market sensitivity tests passed")
@@ -0,0 +1,66 @@
+# test_market_simulation.py - Checks the Monte Carlo TAM/SAM/SOM bands
+import sys
+import os
+import time
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from market_simulation import simulate_market, simulate_result, multiplier_bounds, DEFAULT_MULTIPLIERS
+
+def test_bands_are_ordered_and_centred():
+    simulation = simulate_market(5e9, 0.2)
+    for level in ("tam", "sam", "som"):
+        band = simulation[level]
+        assert band["p10"] < band["p50"] < band["p90"], level
+    # The TAM median sits on the consensus; SOM is TAM times the six multipliers
+    assert abs(simulation["tam"]["p50"] / 5e9 - 1) < 0.02
+    point = 5e9
+    for value in DEFAULT_MULTIPLIERS.values():
+        point *= value
+    assert simulation["som"]["p10"] < point < simulation["som"]["p90"]
+
+def test_seed_makes_runs_reproducible():
+    assert simulate_market(1e9, seed=7) == simulate_market(1e9, seed=7)
+    assert simulate_market(1e9, seed=7)["som"] != simulate_market(1e9, seed=8)["som"]
+
+def test_multiplier_specs():
+    assert multiplier_bounds(0.5, spread=0.2) == (0.4, 0.5, 0.6)
+    assert multiplier_bounds([0.1, 0.3]) == (0.1, 0.2, 0.3)
+    assert multiplier_bounds(1.0) == (0.7, 1.0, 1.0)  # fractions are capped at 1
+    fixed = simulate_market(1e9, 0.1, {name: [v, v] for name, v in DEFAULT_MULTIPLIERS.items()}, draws=1000)
+    assert fixed["sam"]["p50"] == round(fixed["tam"]["p50"] * 0.4 * 1.0 * 0.7)
+    for bad in ({"penetration": 0.1}, {"conversion": [0.3, 0.2, 0.1]}, {"conversion": [1, 2, 3, 4]}):
+        try:
+            simulate_market(1e9, multipliers=bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_result_uses_reconciled_sources():
+    result = {"market_data": {"sources": [
+        {"publisher": "A", "market_size": 4.0, "market_size_unit": "billion", "base_year": 2023},
+        {"publisher": "B", "market_size": 6.0, "market_size_unit": "billion", "base_year": 2023},
+    ]}}
+    simulation = simulate_result(result, draws=20000)
+    assert result["market_data"]["simulation"] is simulation
+    assert simulation["price_year"] == 2023 and simulation["draws"] == 20000
+    assert 4e9 < simulation["tam"]["p50"] < 6e9
+    assert simulate_result({"market_data": {"sources": []}}) is None
+    assert simulate_result({"status": "error"}) is None
+
+def test_hundred_thousand_draws_are_fast():
+    simulate_market(5e9, 0.2)
+    started = time.perf_counter()
+    simulation = simulate_market(5e9, 0.2, draws=100000)
+    assert time.perf_counter() - started < 1.0
+    assert simulation["draws"] == 100000
+
+
+if __name__ == "__main__":
+    test_bands_are_ordered_and_centred()
+    test_seed_makes_runs_reproducible()
+    test_multiplier_specs()
+    test_result_uses_reconciled_sources()
+    test_hundred_thousand_draws_are_fast()
+    print("All market simulation tests passed")
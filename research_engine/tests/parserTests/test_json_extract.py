@@ -0,0 +1,51 @@
+# test_json_extract.py - Checks the shared JSON extractor used by the research services
+import sys
+import os
+import time
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from json_extract import extract_json
+
+ANSWER = '{"market_data": {"sources": [{"publisher": "Statista", "note": "see {appendix} \\"B\\""}], "confidence_score": 7}}'
+
+def test_finds_answer_in_fences_and_prose():
+    """Fenced, bare and prose-wrapped answers all come back whole, braces inside strings included"""
+    for text in (f"```json\n{ANSWER}\n```", ANSWER, f"Done {{step 40}}. Result: {ANSWER} Thanks!"):
+        result = extract_json(text, expected_keys=("market_data",))
+        assert result["market_data"]["sources"][0]["note"] == 'see {appendix} "B"'
+
+def test_prefers_schema_match_over_size():
+    """An object with the expected keys beats a larger unrelated one"""
+    noise = '{"action": "click", "index": 4, "details": {"x": 1, "y": 2, "text": "Accept all cookies"}}'
+    assert "market_data" in extract_json(f"{noise} {ANSWER} {noise}", expected_keys=("market_data",))
+    assert extract_json(noise, expected_keys=("market_data",), require_match=True) is None
+    assert extract_json(noise, expected_keys=("market_data",))["action"] == "click"
+
+def test_recovers_complete_objects_inside_broken_ones():
+    """A truncated or malformed wrapper still yields the complete answer it contains"""
+    assert "market_data" in extract_json('{"result": ' + ANSWER + ', "status": tru', expected_keys=("market_data",))
+    assert "market_data" in extract_json('{"result": ' + ANSWER + ' oops}', expected_keys=("market_data",))
+    assert extract_json(ANSWER[:-5])["publisher"] == "Statista"
+    assert extract_json(ANSWER[:-5], expected_keys=("market_data",), require_match=True) is None
+    assert extract_json("no json here") is None and extract_json(None) is None
+
+def test_validate_filters_candidates():
+    assert extract_json(ANSWER, validate=lambda obj: "competitors" in obj) is None
+
+def test_pathological_inputs_stay_fast():
+    """Inputs that made the old lazy patterns backtrack are scanned in linear time"""
+    for text in ('{"market_data" ' * 20000, "{ " * 50000 + ANSWER, '{"a": ' * 20000 + ANSWER, "{" * 50000 + "}" * 50000):
+        started = time.perf_counter()
+        extract_json(text, expected_keys=("market_data",))
+        assert time.perf_counter() - started < 2.0
+
+
+if __name__ == "__main__":
+    test_finds_answer_in_fences_and_prose()
+    test_prefers_schema_match_over_size()
+    test_recovers_complete_objects_inside_broken_ones()
+    test_validate_filters_candidates()
+    test_pathological_inputs_stay_fast()
+    print("All JSON extraction tests passed")
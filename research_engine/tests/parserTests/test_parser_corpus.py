@@ -0,0 +1,36 @@
+# test_parser_corpus.py - Every sample in fixtures/parser_corpus parses to what its manifest expects
+import sys
+import os
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.bench_parsers import build_services, load_corpus, parse_case, check_expectations
+
+def test_corpus_matches_manifest():
+    services = build_services()
+    failures = []
+    for case in load_corpus():
+        failures.extend(check_expectations(case, parse_case(case, services)))
+    assert not failures, "\n".join(failures)
+
+def test_corpus_covers_every_format():
+    """Each service has JSON, fenced JSON, markdown-bold and numbered-list samples"""
+    covered = {(case["service"], case["format"]) for case in load_corpus()}
+    for service in ("market_sizing", "competition", "problem_validation"):
+        for fmt in ("json", "fenced_json", "markdown_bold", "numbered_list"):
+            assert (service, fmt) in covered
+
+def test_market_text_sources_split_on_headings_only():
+    """Decimals inside source details ("$5.2 billion") no longer start a new source"""
+    services = build_services()
+    case = next(case for case in load_corpus() if case["file"] == "market_sizing_numbered_list.txt")
+    sources = parse_case(case, services)["market_data"]["sources"]
+    assert [source["publisher"] for source in sources] == ["Grand View Research", "Fortune Business Insights", "Statista"]
+
+
+if __name__ == "__main__":
+    test_corpus_matches_manifest()
+    test_corpus_covers_every_format()
+    test_market_text_sources_split_on_headings_only()
+    print("All parser corpus tests passed")
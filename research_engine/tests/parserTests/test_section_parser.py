@@ -0,0 +1,73 @@
+# test_section_parser.py - Checks the line tokenizer and section splitter behind the text-format parsers
+import sys
+import os
+import time
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from section_parser import (SectionSplitter, tokenize_lines, section_text, first_fields,
+                            numbered_items, bullet_items, leading_number, number_or_zero)
+
+SPLITTER = SectionSplitter({
+    "competitors": "Competitors",
+    "barriers": r"Barriers(?: to Entry)?",
+    "confidence": "Confidence Score",
+})
+
+TEXT = """Intro line
+**Competitors:**
+1. **Zocdoc**
+   - **Website:** [zocdoc.com](https://www.zocdoc.com)
+   - **Founded Year**: 2007
+**Barriers to Entry:**
+1. Network effects
+2. Regulation: HIPAA compliance
+- Sources: not a header when bulleted
+## Confidence Score: 8
+"""
+
+def test_tokenizer_splits_markers_and_labels():
+    """List markers, numbers and bold labels are separated from the line text"""
+    lines = list(tokenize_lines(TEXT))
+    website = lines[3]
+    assert website.bullet and website.label == "Website" and website.value == "[zocdoc.com](https://www.zocdoc.com)"
+    assert lines[4].label == "Founded Year" and lines[4].value == "2007"
+    assert lines[2].number == 1 and lines[2].label is None and lines[2].text == "**Zocdoc**"
+    assert [line.number for line in tokenize_lines("4.5 billion\n12) item")] == [None, 12]
+
+def test_splitter_groups_lines_under_headers():
+    """Headers in bold or after # marks open sections; inline header text is kept"""
+    sections = SPLITTER.split(tokenize_lines(TEXT))
+    assert set(sections) == {"competitors", "barriers", "confidence"}
+    assert numbered_items(sections["barriers"]) == ["Network effects", "Regulation: HIPAA compliance"]
+    assert bullet_items(sections["barriers"]) == ["Sources: not a header when bulleted"]
+    assert leading_number(sections["confidence"][0].text) == 8.0
+    assert [number_or_zero(v) for v in (7, "8/10", " 6.5 out of 10", "high", None, True)] == [7.0, 8.0, 6.5, 0.0, 0.0, 0.0]
+    assert first_fields(sections["competitors"])["founded year"] == "2007"
+
+def test_section_text_and_repeated_headers():
+    """Raw section text is recoverable and the first of a repeated header wins"""
+    text = "Confidence Score: 6\n\nsecond line\nConfidence Score: 9\n"
+    sections = SPLITTER.split(tokenize_lines(text))
+    assert section_text(text, sections["confidence"]) == "6\n\nsecond line"
+
+def test_parse_cost_is_linear():
+    """Ten times the lines takes roughly ten times as long, not a hundred"""
+    block = "1. **Competitor**\n   - **Website:** example.com\n   - **Funding:** $5M\n"
+    def parse_seconds(repeat):
+        text = "**Competitors:**\n" + block * repeat
+        started = time.perf_counter()
+        SPLITTER.split(tokenize_lines(text))
+        return time.perf_counter() - started
+    small = min(parse_seconds(1000) for _ in range(3))
+    large = min(parse_seconds(10000) for _ in range(3))
+    assert large < small * 30
+
+
+if __name__ == "__main__":
+    test_tokenizer_splits_markers_and_labels()
+    test_splitter_groups_lines_under_headers()
+    test_section_text_and_repeated_headers()
+    test_parse_cost_is_linear()
+    print("All section parser tests passed")
@@ -0,0 +1,164 @@
+# test_confidence_scoring.py - Checks quality-weighted confidence scores and cache re-scoring
+import sys
+import os
+import time
+import random
+import tempfile
+import json
+
+# Add the research_engine directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from confidence_scoring import (source_authority, recency_multiplier, score_batch, score_result,
+                                score_results, year_of, current_year)
+from market_reconciliation import reconcile_result
+from research_cache import ResearchCache, FileBackend
+from scripts.rescore_cache import rescore_namespace, rescore_output
+
+def _market(publisher, size, date):
+    return {"publisher": publisher, "market_size": size, "market_size_unit": "billion", "publication_date": date}
+
+def test_authority_by_publisher_and_type():
+    assert source_authority({"publisher": "Grand View Research"}) == ("market_research_report", 10.0)
+    assert source_authority({"url": "https://www.reddit.com/r/startups"})[0] == "forum_discussion"
+    assert source_authority({"url": "https://www.census.gov/data"})[0] == "government_data"
+    assert source_authority({"source": "Some Lab", "type": "research_study"})[0] == "academic_study"
+    assert source_authority({"name": "TechCrunch"})[0] == "news_article"
+    # Unrecognised sources fall back to their self-reported quality
+    assert source_authority({"publisher": "Acme", "source_quality": "high"}) == ("unknown", 8.0)
+    assert source_authority({"publisher": "Acme", "credibility": "low"}) == ("unknown", 2.0)
+    assert source_authority({"publisher": "Acme", "methodology": "Bottom-up survey"})[1] == 6.0
+
+def test_recency_uses_the_current_year():
+    this_year = current_year()
+    multipliers = recency_multiplier([this_year, this_year - 2, this_year - 4, this_year - 9, float("nan")])
+    assert list(multipliers) == [1.0, 0.8, 0.6, 0.4, 0.6]
+    assert list(recency_multiplier([2024], today=2025)) == [1.0]
+    assert year_of("2023-05-12") == 2023 and year_of("Date not found") is None and year_of(2021) == 2021
+
+def test_quality_beats_quantity():
+    this_year = current_year()
+    reports = [{"publisher": "Gartner", "publication_date": str(this_year)}, {"publisher": "Statista", "publication_date": str(this_year)}]
+    forums = [{"url": f"https://reddit.com/r/{i}", "date": str(this_year)} for i in range(10)]
+    batch = score_batch([reports, forums, []], [1.0, 1.0, 1.0])
+    assert batch["score"][0] > batch["score"][1] > batch["score"][2] == 2
+    assert batch["evidence"][2] == 0
+    stale = score_batch([[{"publisher": "Gartner", "publication_date": "2012"}] * 2], [1.0])
+    assert stale["score"][0] < batch["score"][0]
+
+def test_outliers_and_blocked_sources_count_less():
+    this_year = str(current_year())
+    result = {"market_data": {"market_breakdown": {"tam": 5}, "sources": [
+        _market("Grand View Research", 1.0, this_year), _market("Statista", 1.1, this_year), _market("Mordor Intelligence", 30, this_year),
+    ]}}
+    reconcile_result(result)
+    breakdown = score_result("market_sizing", result)
+    sources = result["market_data"]["sources"]
+    assert sources[2]["quality_weight"] < sources[0]["quality_weight"] == 1.0
+    assert result["market_data"]["confidence_score"] == breakdown["score"]
+    assert result["market_data"]["data_quality"]["confidence"] is breakdown
+
+    open_source = {"sources": [{"url": "https://techcrunch.com/a", "access_status": "accessible"}]}
+    blocked = {"sources": [{"url": "https://techcrunch.com/a", "access_status": "blocked_by_captcha"}]}
+    score_results("competition", [open_source, blocked])
+    assert blocked["sources"][0]["quality_weight"] < open_source["sources"][0]["quality_weight"]
+
+def test_knowledge_base_sources_count_less():
+    fresh = {"sources": [{"url": "https://gartner.com/r", "publisher": "Gartner"}]}
+    carried = {"sources": [{"url": "https://gartner.com/r", "publisher": "Gartner", "from_knowledge_base": True}]}
+    score_results("competition", [fresh, carried])
+    assert carried["sources"][0]["quality_weight"] == fresh["sources"][0]["quality_weight"] / 2
+
+def test_services_and_errors():
+    result = {"evidence": [{"source": "Reddit", "type": "forum_post"}], "alternative_solutions": [{"name": "a"}, {"name": "b"}],
+              "problem_validation": {"exists": True, "severity": 7, "frequency": 6}}
+    assert score_result("problem_validation", result)["completeness"] == 1.0
+    result["problem_validation"].update(severity="8/10", frequency="6 out of 10")
+    assert score_result("problem_validation", result)["completeness"] == 1.0
+    result["problem_validation"].update(severity="high", frequency=None)
+    assert score_result("problem_validation", result)["completeness"] == 0.5
+    assert score_results("market_sizing", [{"status": "error"}, "not a result"]) == [None, None]
+    try:
+        score_result("pricing", result)
+        assert False
+    except ValueError:
+        pass
+
+def test_thousands_of_results_score_quickly():
+    random.seed(5)
+    publishers = ["Gartner", "Statista", "reddit.com", "TechCrunch", "Acme", "census.gov"]
+    results = [{"market_data": {"sources": [_market(random.choice(publishers), 1.0, str(random.randint(2015, 2026)))
+                                            for _ in range(random.randint(0, 8))]}} for _ in range(5000)]
+    started = time.perf_counter()
+    breakdowns = score_results("market_sizing", results)
+    assert time.perf_counter() - started < 5.0
+    assert all(0 <= breakdown["score"] <= 10 for breakdown in breakdowns)
+
+def test_rescore_updates_every_service():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FileBackend(tmp_dir)
+        cache = ResearchCache(backend)
+        stored_at = time.time() - 3600
+        backend.set("competition", "k", {"competitors": [], "confidence_score": 9,
+                                         "sources": [{"url": "https://reddit.com/r/x", "access_status": "accessible"}]}, stored_at)
+
+        assert rescore_namespace(cache, "competition", dry_run=True)["score_down"] == 1
+        assert backend.get("competition", "k")[0]["confidence_score"] == 9
+
+        summary = rescore_namespace(cache, "competition")
+        assert summary["rescored"] == 1 and summary["reconciled"] == 0
+        # A single forum source no longer clears the threshold, so the entry is demoted
+        assert summary["demoted"] == 1 and backend.get("competition", "k") is None
+        value, rewritten_at = backend.get("lowconf_competition", "k")
+        assert value["confidence_score"] < 5 and value["data_quality"]["confidence"]["score"] == value["confidence_score"]
+        assert abs(rewritten_at - stored_at) < 1
+
+def test_rescore_promotes_strong_low_confidence_entries():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FileBackend(tmp_dir)
+        cache = ResearchCache(backend)
+        stored_at = time.time() - 60
+        evidence = [{"source": name, "type": "research_study", "date": str(current_year())}
+                    for name in ("Harvard Business Review", "Stanford University", "Journal of Business Venturing")]
+        backend.set("lowconf_problem_validation", "k", {
+            "evidence": evidence, "alternative_solutions": [{"name": "a"}, {"name": "b"}], "confidence_score": 2,
+            "problem_validation": {"exists": True, "severity": "8/10", "frequency": 7}}, stored_at)
+
+        summary = rescore_namespace(cache, "lowconf_problem_validation")
+        assert summary["promoted"] == 1 and backend.get("lowconf_problem_validation", "k") is None
+        value, moved_at = backend.get("problem_validation", "k")
+        assert value["confidence_score"] >= 4 and abs(moved_at - stored_at) < 1
+
+def test_rescore_output_files():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        single = {"competitors": [], "confidence_score": 9,
+                  "sources": [{"url": "https://reddit.com/r/x", "access_status": "accessible"}]}
+        run = {"test_session": "s", "results": {"competitive_analysis": dict(single), "unrelated": {"confidence_score": 9}}}
+        for name, data in (("competitive_analysis_result.json", single), ("enhanced_modules_test_results_1.json", run),
+                           ("notes.json", {"confidence_score": 9})):
+            with open(os.path.join(tmp_dir, name), "w") as f:
+                json.dump(data, f)
+
+        assert rescore_output(tmp_dir, dry_run=True)["files_rewritten"] == 2
+        summary = rescore_output(tmp_dir)
+        assert summary["files"] == 2 and summary["entries"] == 2 and summary["score_down"] == 2
+        with open(os.path.join(tmp_dir, "enhanced_modules_test_results_1.json")) as f:
+            rewritten = json.load(f)
+        assert rewritten["results"]["competitive_analysis"]["confidence_score"] < 9
+        assert rewritten["results"]["unrelated"]["confidence_score"] == 9
+        with open(os.path.join(tmp_dir, "notes.json")) as f:
+            assert json.load(f) == {"confidence_score": 9}
+
+
+if __name__ == "__main__":
+    test_authority_by_publisher_and_type()
+    test_recency_uses_the_current_year()
+    test_quality_beats_quantity()
+    test_outliers_and_blocked_sources_count_less()
+    test_knowledge_base_sources_count_less()
+    test_services_and_errors()
+    test_thousands_of_results_score_quickly()
+    test_rescore_updates_every_service()
+    test_rescore_promotes_strong_low_confidence_entries()
+    test_rescore_output_files()
+    print("All confidence scoring tests passed")
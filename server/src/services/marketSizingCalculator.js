@@ -19,7 +19,17 @@ function calculateMarketSizing(marketData, segmentation, problemValidation = nul
     const sources = marketData.market_data.sources;
     
     // STEP 1: Process and normalize all market sizes to the same unit (USD)
+    // The research engine attaches normalized_size (USD at the figure's year);
+    // parsing market_size/market_size_unit is the fallback for older results
     const normalizedSizes = sources.map(source => {
+      if (source.normalized_size?.value_usd != null) {
+        return {
+          value: source.normalized_size.value_usd,
+          year: source.normalized_size.base_year,
+          publisher: source.publisher || "Unknown",
+          quality: calculateSourceQuality(source)
+        };
+      }
       const value = parseFloat(source.market_size);
       const multiplier = getUnitMultiplier(source.market_size_unit);
       return {